@@ -0,0 +1,81 @@
+"""Add numeric lab result values and reference ranges
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 12:00:00
+
+Adds value_num, range_low and range_high to lab_results, backfills them from
+the existing result_value/normal_range strings in bulk, and indexes
+(patient_id, test_name, date).
+
+Databases created with Base.metadata.create_all() already have the new
+columns; the upgrade only adds what is missing and always runs the backfill.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services.lab_values import parse_lab_result
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+INDEX_NAME = "ix_lab_results_patient_test_date"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_columns = {column["name"] for column in inspector.get_columns("lab_results")}
+    existing_indexes = {index["name"] for index in inspector.get_indexes("lab_results")}
+    
+    with op.batch_alter_table("lab_results") as batch_op:
+        for name in ("value_num", "range_low", "range_high"):
+            if name not in existing_columns:
+                batch_op.add_column(sa.Column(name, sa.Float(), nullable=True))
+    
+    if INDEX_NAME not in existing_indexes:
+        op.create_index(INDEX_NAME, "lab_results", ["patient_id", "test_name", "date"])
+    
+    # Backfill in id-ordered batches with one executemany UPDATE per batch
+    lab_results = sa.table(
+        "lab_results",
+        sa.column("id", sa.Integer),
+        sa.column("result_value", sa.String),
+        sa.column("normal_range", sa.String),
+        sa.column("value_num", sa.Float),
+        sa.column("range_low", sa.Float),
+        sa.column("range_high", sa.Float),
+    )
+    update = lab_results.update().where(lab_results.c.id == sa.bindparam("row_id")).values(
+        value_num=sa.bindparam("value_num"),
+        range_low=sa.bindparam("range_low"),
+        range_high=sa.bindparam("range_high"),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(lab_results.c.id, lab_results.c.result_value, lab_results.c.normal_range)
+            .where(lab_results.c.id > last_id)
+            .order_by(lab_results.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {"row_id": row_id, **parse_lab_result(result_value, normal_range)}
+            for row_id, result_value, normal_range in rows
+        ])
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="lab_results")
+    with op.batch_alter_table("lab_results") as batch_op:
+        batch_op.drop_column("range_high")
+        batch_op.drop_column("range_low")
+        batch_op.drop_column("value_num")
@@ -0,0 +1,49 @@
+"""Add attachments for reports and lab results
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 15:00:00
+
+Chunked uploads attached to reports and lab results (see routers/attachments.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "attachments" in sa.inspect(op.get_bind()).get_table_names():
+        # Created by Base.metadata.create_all()
+        return
+    op.create_table(
+        "attachments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id"), nullable=True),
+        sa.Column("lab_result_id", sa.Integer(), sa.ForeignKey("lab_results.id"), nullable=True),
+        sa.Column("uploaded_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("received_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_attachments_id", "attachments", ["id"])
+    op.create_index("ix_attachments_report_id", "attachments", ["report_id"])
+    op.create_index("ix_attachments_lab_result_id", "attachments", ["lab_result_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attachments_lab_result_id", table_name="attachments")
+    op.drop_index("ix_attachments_report_id", table_name="attachments")
+    op.drop_index("ix_attachments_id", table_name="attachments")
+    op.drop_table("attachments")
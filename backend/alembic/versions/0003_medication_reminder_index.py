@@ -0,0 +1,30 @@
+"""Index medication reminders by medication
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 18:00:00
+
+The reminder scheduler reloads the reminders of changed medications
+(services/reminder_scheduler.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_medication_reminders_medication_id"
+
+
+def upgrade() -> None:
+    existing_indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("medication_reminders")}
+    if INDEX_NAME not in existing_indexes:
+        op.create_index(INDEX_NAME, "medication_reminders", ["medication_id"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="medication_reminders")
@@ -0,0 +1,67 @@
+"""Add daily medication adherence rollups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 19:00:00
+
+Taken/missed counts per (medication, day), maintained incrementally by
+services/adherence.py. An empty rollup table is backfilled from the existing
+intakes with one INSERT ... SELECT.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "medication_adherence_days" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "medication_adherence_days",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("medication_id", sa.Integer(), sa.ForeignKey("medications.id"), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("taken", sa.Integer(), nullable=False),
+            sa.Column("missed", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("medication_id", "day", name="uq_medication_adherence_days_medication_day"),
+        )
+        op.create_index("ix_medication_adherence_days_id", "medication_adherence_days", ["id"])
+    
+    rollups = sa.table(
+        "medication_adherence_days",
+        sa.column("medication_id", sa.Integer),
+        sa.column("day", sa.Date),
+        sa.column("taken", sa.Integer),
+        sa.column("missed", sa.Integer),
+    )
+    if bind.execute(sa.select(sa.func.count()).select_from(rollups)).scalar():
+        return
+    intakes = sa.table(
+        "medication_intakes",
+        sa.column("medication_id", sa.Integer),
+        sa.column("planned_datetime", sa.DateTime),
+        sa.column("status", sa.String),
+    )
+    # SQLite stores datetimes as text; CAST(... AS DATE) would yield a number there
+    if bind.dialect.name == "sqlite":
+        day = sa.func.date(intakes.c.planned_datetime)
+    else:
+        day = sa.cast(intakes.c.planned_datetime, sa.Date)
+    # Enum columns store the member name
+    taken = sa.func.sum(sa.case((intakes.c.status == "TAKEN", 1), else_=0))
+    missed = sa.func.sum(sa.case((intakes.c.status == "MISSED", 1), else_=0))
+    bind.execute(rollups.insert().from_select(
+        ["medication_id", "day", "taken", "missed"],
+        sa.select(intakes.c.medication_id, day, taken, missed).group_by(intakes.c.medication_id, day)
+    ))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_medication_adherence_days_id", table_name="medication_adherence_days")
+    op.drop_table("medication_adherence_days")
@@ -0,0 +1,36 @@
+"""Add client ids to medication intakes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 20:00:00
+
+Offline clients sync intakes under their own ids; the unique
+(medication_id, client_id) index is the upsert target of
+POST /api/medications/intakes:sync.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "uq_medication_intakes_medication_client"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "client_id" not in {column["name"] for column in inspector.get_columns("medication_intakes")}:
+        with op.batch_alter_table("medication_intakes") as batch_op:
+            batch_op.add_column(sa.Column("client_id", sa.String(64), nullable=True))
+    if INDEX_NAME not in {index["name"] for index in inspector.get_indexes("medication_intakes")}:
+        op.create_index(INDEX_NAME, "medication_intakes", ["medication_id", "client_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="medication_intakes")
+    with op.batch_alter_table("medication_intakes") as batch_op:
+        batch_op.drop_column("client_id")
@@ -0,0 +1,52 @@
+"""Add structured dosing schedules to medications
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 21:00:00
+
+Adds medications.schedule and backfills it from frequency_description. Each
+distinct description is parsed once and written with one executemany UPDATE
+keyed by the description.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services.dosing_schedule import parse_frequency
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "schedule" not in {column["name"] for column in sa.inspect(bind).get_columns("medications")}:
+        with op.batch_alter_table("medications") as batch_op:
+            batch_op.add_column(sa.Column("schedule", sa.JSON(), nullable=True))
+    
+    medications = sa.table(
+        "medications",
+        sa.column("frequency_description", sa.String),
+        sa.column("schedule", sa.JSON(none_as_null=True)),
+    )
+    descriptions = bind.execute(sa.select(medications.c.frequency_description).distinct()).scalars().all()
+    rows = [
+        {"description": text, "parsed": parse_frequency(text)}
+        for text in descriptions
+        if text is not None
+    ]
+    if rows:
+        bind.execute(
+            medications.update().where(
+                medications.c.frequency_description == sa.bindparam("description")
+            ).values(schedule=sa.bindparam("parsed", type_=sa.JSON(none_as_null=True))),
+            rows
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("medications") as batch_op:
+        batch_op.drop_column("schedule")
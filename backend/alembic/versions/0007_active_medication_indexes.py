@@ -0,0 +1,36 @@
+"""Index active medication lookups
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 22:00:00
+
+GET /api/medications/active goes from the patient to their prescriptions
+(prescriptions.patient_id) and filters each prescription's medications by
+date range (medications.prescription_id, start_date, end_date).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_prescriptions_patient_id", "prescriptions", ["patient_id"]),
+    ("ix_medications_prescription_dates", "medications", ["prescription_id", "start_date", "end_date"]),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
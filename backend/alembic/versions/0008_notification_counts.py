@@ -0,0 +1,55 @@
+"""Add per-user unread notification counters
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 23:00:00
+
+Unread notifications per user, maintained transactionally by
+services/notification_counts.py. An empty counter table is backfilled from
+the existing notifications with one INSERT ... SELECT.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "notification_counts" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "notification_counts",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("unread", sa.Integer(), nullable=False),
+        )
+    
+    counts = sa.table(
+        "notification_counts",
+        sa.column("user_id", sa.Integer),
+        sa.column("unread", sa.Integer),
+    )
+    if bind.execute(sa.select(sa.func.count()).select_from(counts)).scalar():
+        return
+    notifications = sa.table(
+        "notifications",
+        sa.column("user_id", sa.Integer),
+        sa.column("is_read", sa.Boolean),
+    )
+    users = sa.table("users", sa.column("id", sa.Integer))
+    bind.execute(counts.insert().from_select(
+        ["user_id", "unread"],
+        sa.select(notifications.c.user_id, sa.func.count()).join(
+            users, users.c.id == notifications.c.user_id
+        ).where(
+            notifications.c.is_read == sa.false()
+        ).group_by(notifications.c.user_id)
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table("notification_counts")
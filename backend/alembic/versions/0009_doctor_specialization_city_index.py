@@ -0,0 +1,30 @@
+"""Index doctor directory facets
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-20 09:00:00
+
+The facet counts of GET /api/doctors/facets group by (specialization, city)
+and the filtered directory search filters on both. Base.metadata.create_all()
+never adds indexes to existing tables, so the index is created here.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_doctors_specialization_city"
+
+
+def upgrade() -> None:
+    if INDEX_NAME not in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("doctors")}:
+        op.create_index(INDEX_NAME, "doctors", ["specialization", "city"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="doctors")
@@ -0,0 +1,83 @@
+"""Add doctor coordinates for proximity search
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 09:30:00
+
+Adds postal_code, latitude, longitude and geocell (indexed) to doctors and
+geocodes the doctors that have no grid cell yet with services.geo, which the
+model only does on insert/update.
+"""
+from types import SimpleNamespace
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.geo import geocode_doctor
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+INDEX_NAME = "ix_doctors_geocell"
+COLUMNS = (
+    ("postal_code", sa.String),
+    ("latitude", sa.Float),
+    ("longitude", sa.Float),
+    ("geocell", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_columns = {column["name"] for column in inspector.get_columns("doctors")}
+    existing_indexes = {index["name"] for index in inspector.get_indexes("doctors")}
+    
+    with op.batch_alter_table("doctors") as batch_op:
+        for name, type_ in COLUMNS:
+            if name not in existing_columns:
+                batch_op.add_column(sa.Column(name, type_(), nullable=True))
+    
+    if INDEX_NAME not in existing_indexes:
+        op.create_index(INDEX_NAME, "doctors", ["geocell"])
+    
+    # Backfill in id-ordered batches with one executemany UPDATE per batch
+    doctors = sa.table(
+        "doctors",
+        sa.column("id", sa.Integer),
+        sa.column("city", sa.String),
+        sa.column("clinic_address", sa.String),
+        *(sa.column(name, type_) for name, type_ in COLUMNS),
+    )
+    update = doctors.update().where(doctors.c.id == sa.bindparam("row_id")).values(
+        **{name: sa.bindparam(name) for name, _ in COLUMNS}
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(doctors.c.id, doctors.c.city, doctors.c.clinic_address)
+            .where(doctors.c.id > last_id, doctors.c.geocell.is_(None))
+            .order_by(doctors.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row_id, city, clinic_address in rows:
+            doctor = SimpleNamespace(city=city, clinic_address=clinic_address)
+            geocode_doctor(doctor)
+            params.append({"row_id": row_id, **{name: getattr(doctor, name) for name, _ in COLUMNS}})
+        bind.execute(update, params)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="doctors")
+    with op.batch_alter_table("doctors") as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
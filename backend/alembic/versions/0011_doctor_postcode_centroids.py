@@ -0,0 +1,71 @@
+"""Re-geocode doctors with five-digit postcode centroids
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-21 10:00:00
+
+The bundled centroid table used to hold mostly two-digit Leitregion rows, so
+doctors geocoded before it was replaced share one point per region. Recompute
+the coordinates and grid cell of every doctor with services.geo.
+"""
+from types import SimpleNamespace
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.geo import centroids_available, geocode_doctor
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+COLUMNS = (
+    ("postal_code", sa.String),
+    ("latitude", sa.Float),
+    ("longitude", sa.Float),
+    ("geocell", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    # Without the table every doctor would lose its coordinates
+    if not centroids_available():
+        raise RuntimeError("Postcode centroid table not found; set PLZ_CENTROIDS_PATH")
+    
+    bind = op.get_bind()
+    doctors = sa.table(
+        "doctors",
+        sa.column("id", sa.Integer),
+        sa.column("city", sa.String),
+        sa.column("clinic_address", sa.String),
+        *(sa.column(name, type_) for name, type_ in COLUMNS),
+    )
+    update = doctors.update().where(doctors.c.id == sa.bindparam("row_id")).values(
+        **{name: sa.bindparam(name) for name, _ in COLUMNS}
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(doctors.c.id, doctors.c.city, doctors.c.clinic_address)
+            .where(doctors.c.id > last_id)
+            .order_by(doctors.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row_id, city, clinic_address in rows:
+            doctor = SimpleNamespace(city=city, clinic_address=clinic_address)
+            geocode_doctor(doctor)
+            params.append({"row_id": row_id, **{name: getattr(doctor, name) for name, _ in COLUMNS}})
+        bind.execute(update, params)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    # Coordinates are derived data; the previous coarse values are not restored
+    pass
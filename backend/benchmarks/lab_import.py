@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark the bulk lab result import.
+
+Starts the API with uvicorn against a temporary seeded SQLite database, uploads
+a generated CSV or NDJSON file (100k rows by default) to
+POST /api/lab-results/import as a streamed body and prints rows per second.
+For comparison it also creates a sample of results one request at a time
+through POST /api/lab-results/patients/{id} and extrapolates:
+
+    python benchmarks/lab_import.py
+    python benchmarks/lab_import.py --format ndjson --rows 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TESTS = (("Blutzucker", "mg/dL", "70-100"), ("Cholesterin", "mg/dL", "<200"), ("Hämoglobin", "g/dL", "12-16"))
+
+def generate_rows(rows: int, fmt: str, patient_id: int, block_rows: int = 2000):
+    """Yield the upload body in blocks of encoded rows (never the whole file at once)."""
+    start = date(2015, 1, 1)
+    if fmt == "csv":
+        yield b"patient_id,test_name,result_value,unit,normal_range,date\n"
+    for block in range(0, rows, block_rows):
+        lines = []
+        for index in range(block, min(block + block_rows, rows)):
+            test_name, unit, normal_range = TESTS[index % len(TESTS)]
+            value = f"{60 + index % 90},{index % 10}"
+            day = (start + timedelta(days=index % 3650)).isoformat()
+            if fmt == "csv":
+                lines.append(f'{patient_id},{test_name},"{value}",{unit},{normal_range},{day}\n')
+            else:
+                lines.append(json.dumps({
+                    "patient_id": patient_id, "test_name": test_name, "result_value": value,
+                    "unit": unit, "normal_range": normal_range, "date": day,
+                }) + "\n")
+        yield "".join(lines).encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--single-sample", type=int, default=500, help="results created one request at a time")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="import-bench-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        STORAGE_DIR=os.path.join(workdir, "storage"),
+        PDF_RENDER_WORKERS="0",
+    )
+    os.chdir(BACKEND_DIR)
+    subprocess.run([sys.executable, "seed_data.py"], env=env, check=True, capture_output=True)
+
+    import httpx
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        token = httpx.post(
+            f"{base_url}/api/auth/login",
+            data={"username": "demo.doctor@example.com", "password": "password123"},
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with httpx.Client(base_url=base_url, headers=headers, timeout=600) as client:
+            content_type = "text/csv" if args.format == "csv" else "application/x-ndjson"
+            started = time.perf_counter()
+            response = client.post(
+                "/api/lab-results/import",
+                content=generate_rows(args.rows, args.format, patient_id=1),
+                headers={"Content-Type": content_type},
+            )
+            elapsed = time.perf_counter() - started
+            result = response.json()
+            print(f"import ({args.format}): {result['imported']}/{args.rows} rows in {elapsed:.2f}s "
+                  f"= {result['imported'] / elapsed:,.0f} rows/s, failed: {result['failed']}")
+
+            started = time.perf_counter()
+            for index in range(args.single_sample):
+                client.post("/api/lab-results/patients/1", json={
+                    "patient_id": 1, "test_name": "Blutzucker", "result_value": str(60 + index % 90),
+                    "unit": "mg/dL", "normal_range": "70-100", "date": "2024-01-01",
+                })
+            per_row = (time.perf_counter() - started) / args.single_sample
+            print(f"one request per result: {1 / per_row:,.0f} rows/s "
+                  f"(~{per_row * args.rows:.0f}s for {args.rows} rows)")
+    finally:
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
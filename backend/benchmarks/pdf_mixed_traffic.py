@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Benchmark API latency while PDFs are rendering.
+
+Starts the API with uvicorn against a temporary seeded SQLite database, then
+downloads long reports concurrently (every download is a PDF cache miss) while
+other threads keep calling a light endpoint. Prints latency percentiles for
+both kinds of traffic. Run it once per render setting to compare:
+
+    python benchmarks/pdf_mixed_traffic.py --render-workers 0   # render in request threads
+    python benchmarks/pdf_mixed_traffic.py --render-workers 4   # process pool
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+def prepare_database(reports: int, pages: int) -> None:
+    """Seed demo data and add long reports for the demo patient."""
+    sys.path.insert(0, BACKEND_DIR)
+    from seed_data import seed_database
+    from database import SessionLocal
+    from models.patient import Patient
+    from models.report import Report
+    
+    seed_database()
+    db = SessionLocal()
+    try:
+        patient = db.query(Patient).first()
+        content = "\n".join(
+            f"Zeile {line}: Befund unauffällig, Kontrolle in sechs Monaten empfohlen."
+            for line in range(pages * 45)
+        )
+        for i in range(reports):
+            db.add(Report(patient_id=patient.id, doctor_id=1, title=f"Benchmark {i}", content=content))
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--render-workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--reports", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--pdf-clients", type=int, default=8)
+    parser.add_argument("--api-clients", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix="pdf-bench-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        STORAGE_DIR=os.path.join(workdir, "storage"),
+        PDF_RENDER_WORKERS=str(args.render_workers),
+        PDF_RENDER_QUEUE_SIZE=str(args.queue_size),
+    )
+    os.environ.update(env)
+    os.chdir(BACKEND_DIR)
+    prepare_database(args.reports, args.pages)
+    
+    import httpx
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        
+        token = httpx.post(
+            f"{base_url}/api/auth/login",
+            data={"username": "demo.patient@example.com", "password": "password123"},
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        report_ids = [r["id"] for r in httpx.get(f"{base_url}/api/reports", headers=headers).json()]
+        
+        pending = list(report_ids)
+        pending_lock = threading.Lock()
+        pdf_latencies, api_latencies, rejected = [], [], []
+        done = threading.Event()
+        
+        def pdf_client():
+            with httpx.Client(base_url=base_url, headers=headers, timeout=120) as client:
+                while True:
+                    with pending_lock:
+                        if not pending:
+                            return
+                        report_id = pending.pop()
+                    started = time.perf_counter()
+                    response = client.get(f"/api/reports/{report_id}/download")
+                    if response.status_code == 503:
+                        rejected.append(report_id)
+                        continue
+                    pdf_latencies.append(time.perf_counter() - started)
+        
+        def api_client():
+            with httpx.Client(base_url=base_url, timeout=120) as client:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    client.get("/api/doctors")
+                    api_latencies.append(time.perf_counter() - started)
+        
+        api_threads = [threading.Thread(target=api_client) for _ in range(args.api_clients)]
+        pdf_threads = [threading.Thread(target=pdf_client) for _ in range(args.pdf_clients)]
+        started = time.perf_counter()
+        for thread in api_threads + pdf_threads:
+            thread.start()
+        for thread in pdf_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in api_threads:
+            thread.join()
+        
+        print(f"render workers: {args.render_workers}, reports: {len(report_ids)} x ~{args.pages} pages")
+        print(f"wall time: {elapsed:.2f}s, PDF throughput: {len(pdf_latencies) / elapsed:.1f}/s, rejected (503): {len(rejected)}")
+        for label, values in (("PDF download", pdf_latencies), ("GET /api/doctors", api_latencies)):
+            print(
+                f"{label:>18}: n={len(values):5d}  p50={percentile(values, 0.5):7.1f}ms  "
+                f"p95={percentile(values, 0.95):7.1f}ms  max={percentile(values, 1.0):7.1f}ms"
+            )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
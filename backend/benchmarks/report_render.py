@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark report PDF rendering throughput.
+
+Renders a long report (50 pages by default) into memory repeatedly and prints
+reports and pages per second for the current renderer and for the previous
+one (line-by-line text objects, no page templates, lines cut at 90
+characters), which is kept here for comparison:
+
+    python benchmarks/report_render.py
+    python benchmarks/report_render.py --short-lines   # identical text for both
+    python benchmarks/report_render.py --pages 200 --iterations 10
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.pdf_templates import generate_report_pdf  # noqa: E402
+from services.pdf_stream import LETTER, StreamingPdfWriter, text_op  # noqa: E402
+
+def legacy_generate_report_pdf(report, patient_name, doctor_name, output) -> None:
+    """Report renderer before page templates and text wrapping (template version 2)."""
+    writer = StreamingPdfWriter(output, title=f"Arztbericht: {report.title}")
+    width, height = LETTER
+    page = [text_op(50, height - 50, "F2", 16, f"Arztbericht: {report.title}")]
+    page.append(text_op(50, height - 80, "F1", 12, f"Patient: {patient_name}"))
+    page.append(text_op(50, height - 100, "F1", 12, f"Arzt: {doctor_name}"))
+    page.append(text_op(50, height - 120, "F1", 12, f"Datum: {report.created_at.strftime('%d.%m.%Y')}"))
+    y = height - 160
+    for line in report.content.split('\n'):
+        if y < 50:
+            writer.add_page(b"".join(page))
+            page = []
+            y = height - 50
+        page.append(text_op(50, y, "F1", 11, line[:90]))
+        y -= 15
+    writer.add_page(b"".join(page))
+    writer.close()
+
+def make_report(pages: int, short_lines: bool = False) -> SimpleNamespace:
+    """A report of roughly `pages` pages mixing short lines and paragraphs that need wrapping."""
+    lines = []
+    for line in range(pages * 40):
+        if line % 4 == 0 and not short_lines:
+            lines.append(
+                f"Befund {line}: Die Kontrolluntersuchung zeigt unauffällige Werte, der Patient berichtet über "
+                "gelegentliche Müdigkeit; eine erneute Blutabnahme in sechs Monaten wird empfohlen."
+            )
+        else:
+            lines.append(f"Zeile {line}: Blutdruck 120/80 mmHg, Puls 72/min.")
+    return SimpleNamespace(id=1, title="Verlaufsbericht", content="\n".join(lines), created_at=datetime(2024, 5, 1))
+
+def run(render, report, iterations: int):
+    """Return (seconds per report, pages per report)."""
+    sizes = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        output = io.BytesIO()
+        render(report, "Max Mustermann", "Dr. Erika Musterfrau", output)
+        sizes.append(output.tell())
+    elapsed = (time.perf_counter() - start) / iterations
+    pages = output.getvalue().count(b"/Type /Page ")
+    return elapsed, pages, sizes[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--short-lines", action="store_true",
+        help="only lines that fit the page width, so both renderers lay out the same text"
+    )
+    args = parser.parse_args()
+
+    report = make_report(args.pages, args.short_lines)
+    # Warm up imports and metric caches
+    run(generate_report_pdf, report, 1)
+    run(legacy_generate_report_pdf, report, 1)
+
+    print(f"{'renderer':<10} {'pages':>6} {'ms/report':>10} {'reports/s':>10} {'pages/s':>9} {'bytes':>9}")
+    for name, render in (("legacy", legacy_generate_report_pdf), ("current", generate_report_pdf)):
+        elapsed, pages, size = run(render, report, args.iterations)
+        print(f"{name:<10} {pages:>6} {elapsed * 1000:>10.1f} {1 / elapsed:>10.1f} {pages / elapsed:>9.0f} {size:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -23,4 +23,68 @@ class Settings:
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     API_PREFIX: str = "/api"
     
+    # Global search: worker threads and per-section time budgets
+    SEARCH_WORKERS: int = int(os.getenv("SEARCH_WORKERS", "12"))
+    SEARCH_DOCTORS_TIMEOUT_MS: int = int(os.getenv("SEARCH_DOCTORS_TIMEOUT_MS", "300"))
+    SEARCH_HEALTH_TIPS_TIMEOUT_MS: int = int(os.getenv("SEARCH_HEALTH_TIPS_TIMEOUT_MS", "300"))
+    SEARCH_FAQS_TIMEOUT_MS: int = int(os.getenv("SEARCH_FAQS_TIMEOUT_MS", "300"))
+    SEARCH_CACHE_SIZE: int = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+    
+    # Local file storage (snapshots, caches, generated files)
+    STORAGE_DIR: str = os.getenv("STORAGE_DIR", "./storage")
+    CONTENT_SNAPSHOT_DIR: str = os.getenv("CONTENT_SNAPSHOT_DIR", os.path.join(STORAGE_DIR, "content_snapshots"))
+    
+    # Generated PDF cache
+    PDF_CACHE_DIR: str = os.getenv("PDF_CACHE_DIR", os.path.join(STORAGE_DIR, "pdf_cache"))
+    PDF_CACHE_MAX_MB: int = int(os.getenv("PDF_CACHE_MAX_MB", "256"))
+    
+    # PDFs pre-rendered when a report or lab result is created (never evicted)
+    PDF_STORAGE_DIR: str = os.getenv("PDF_STORAGE_DIR", os.path.join(STORAGE_DIR, "documents"))
+    
+    # Report and lab result attachments (chunked uploads)
+    ATTACHMENT_STORAGE_DIR: str = os.getenv("ATTACHMENT_STORAGE_DIR", os.path.join(STORAGE_DIR, "attachments"))
+    ATTACHMENT_MAX_MB: int = int(os.getenv("ATTACHMENT_MAX_MB", "200"))
+    ATTACHMENT_CHUNK_MB: int = int(os.getenv("ATTACHMENT_CHUNK_MB", "4"))
+    ATTACHMENT_MAX_CHUNK_MB: int = int(os.getenv("ATTACHMENT_MAX_CHUNK_MB", "16"))
+    
+    # PDF rendering process pool (0 workers renders inline in the request thread)
+    PDF_RENDER_WORKERS: int = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PDF_RENDER_QUEUE_SIZE: int = int(os.getenv("PDF_RENDER_QUEUE_SIZE", "16"))
+    PDF_RENDER_TIMEOUT_SECONDS: float = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "30"))
+    PDF_RENDER_RETRY_AFTER_SECONDS: int = int(os.getenv("PDF_RENDER_RETRY_AFTER_SECONDS", "2"))
+    
+    # Per-patient cache of today's active medications
+    ACTIVE_MEDICATIONS_CACHE_SIZE: int = int(os.getenv("ACTIVE_MEDICATIONS_CACHE_SIZE", "4096"))
+    
+    # Drug interaction check (offline dataset of interacting substance pairs and name aliases)
+    DRUG_INTERACTIONS_PATH: str = os.getenv(
+        "DRUG_INTERACTIONS_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "drug_interactions.csv")
+    )
+    DRUG_ALIASES_PATH: str = os.getenv(
+        "DRUG_ALIASES_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "drug_aliases.csv")
+    )
+    
+    # Medication reminder scheduler (enable in one worker only)
+    REMINDER_SCHEDULER_ENABLED: bool = os.getenv("REMINDER_SCHEDULER_ENABLED", "True").lower() == "true"
+    REMINDER_TICK_SECONDS: float = float(os.getenv("REMINDER_TICK_SECONDS", "5"))
+    
+    # Notification stream (Server-Sent Events): idle heartbeat interval
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", "15"))
+    
+    # Recount of the unread notification counters (0 disables; enable in one worker only)
+    NOTIFICATION_COUNT_RECONCILE_SECONDS: float = float(os.getenv("NOTIFICATION_COUNT_RECONCILE_SECONDS", "3600"))
+    
+    # Doctors (comma-separated emails) allowed to send system broadcasts to all users of a role
+    BROADCAST_ADMIN_EMAILS: list = [
+        email.strip().lower() for email in os.getenv("BROADCAST_ADMIN_EMAILS", "").split(",") if email.strip()
+    ]
+    
+    # Doctor proximity search (offline postcode centroid dataset)
+    PLZ_CENTROIDS_PATH: str = os.getenv(
+        "PLZ_CENTROIDS_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "plz_centroids.csv")
+    )
+    
 settings = Settings()
@@ -1,14 +1,21 @@
 """Database configuration and session management."""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from services.text_fold import register_sqlite_function
 
 # Create SQLAlchemy engine
 # For SQLite, we add check_same_thread=False to allow multiple threads
 connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _register_functions(dbapi_connection, connection_record):
+        """Provide search_fold(text) for case- and diacritic-insensitive search."""
+        register_sqlite_function(dbapi_connection)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
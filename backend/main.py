@@ -2,6 +2,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
+from services.pdf_cache import pdf_cache
+from services.pdf_renderer import pdf_renderer
+from services.reminder_scheduler import reminder_scheduler
+from services.interactions import interaction_index
+from services.notification_hub import notification_hub
+from services.notification_counts import counter_reconciler
+from services.notification_broadcast import broadcast_jobs
+from services.content_snapshot import content_snapshots
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -44,24 +52,47 @@ from routers import (
     doctors,
     appointments,
     prescriptions,
+    medications,
     reports,
     lab_results,
     health_content,
     symptom_checker,
     notifications,
-    search
+    search,
+    export,
+    attachments
 )
 
 app.include_router(auth.router)
 app.include_router(doctors.router)
 app.include_router(appointments.router)
 app.include_router(prescriptions.router)
+app.include_router(medications.router)
 app.include_router(reports.router)
 app.include_router(lab_results.router)
 app.include_router(health_content.router)
 app.include_router(symptom_checker.router)
 app.include_router(notifications.router)
 app.include_router(search.router)
+app.include_router(export.router)
+app.include_router(attachments.router)
+
+
+# Cache and worker metrics
+@app.get("/metrics")
+async def metrics():
+    """In-process cache statistics for this worker."""
+    return {
+        "search_cache": search.search_cache.stats(),
+        "active_medications_cache": medications.active_medications_cache.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "pdf_renderer": pdf_renderer.stats(),
+        "reminder_scheduler": reminder_scheduler.stats(),
+        "interaction_index": interaction_index.stats(),
+        "notification_hub": notification_hub.stats(),
+        "notification_count_reconciler": counter_reconciler.stats(),
+        "notification_broadcasts": broadcast_jobs.stats(),
+    }
 
 
 # Startup event
@@ -71,9 +102,17 @@ async def startup_event():
     print(" Telemedicine API starting...")
     print(f" Database: {settings.DATABASE_URL}")
     print(f" Debug mode: {settings.DEBUG}")
+    interaction_index.load()
+    content_snapshots.warm()
+    if settings.REMINDER_SCHEDULER_ENABLED:
+        reminder_scheduler.start()
+    counter_reconciler.start()
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown."""
+    pdf_renderer.shutdown()
+    reminder_scheduler.stop()
+    counter_reconciler.stop()
     print("👋 Telemedicine API shutting down...")
@@ -7,12 +7,15 @@ from .prescription import Prescription
 from .medication import Medication
 from .medication_reminder import MedicationReminder
 from .medication_intake import MedicationIntake
+from .medication_adherence_day import MedicationAdherenceDay
 from .report import Report
 from .lab_result import LabResult
+from .attachment import Attachment
 from .health_tip import HealthTip
 from .faq import FAQ
 from .symptom_check_session import SymptomCheckSession
 from .notification import Notification
+from .notification_count import NotificationCount
 
 __all__ = [
     "User",
@@ -23,10 +26,13 @@ __all__ = [
     "Medication",
     "MedicationReminder",
     "MedicationIntake",
+    "MedicationAdherenceDay",
     "Report",
     "LabResult",
+    "Attachment",
     "HealthTip",
     "FAQ",
     "SymptomCheckSession",
     "Notification",
+    "NotificationCount",
 ]
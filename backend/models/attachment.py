@@ -0,0 +1,51 @@
+"""Attachment model for files uploaded to reports and lab results."""
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from database import Base
+
+class Attachment(Base):
+    """
+    File attached to a report or lab result (scans, imaging exports).
+    
+    Created in the "uploading" state; chunks are appended in order until
+    received_bytes reaches size, then the file is verified and the status
+    becomes "complete". Files live under ATTACHMENT_STORAGE_DIR.
+    """
+    __tablename__ = "attachments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(Integer, ForeignKey("reports.id"), nullable=True, index=True)
+    lab_result_id = Column(Integer, ForeignKey("lab_results.id"), nullable=True, index=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False, default="application/octet-stream")
+    size = Column(BigInteger, nullable=False)  # Declared total size in bytes
+    chunk_size = Column(Integer, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+    sha256 = Column(String(64), nullable=True)  # Whole-file checksum, verified on completion if given
+    status = Column(String, nullable=False, default="uploading")  # uploading, complete
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    report = relationship("Report", back_populates="attachments")
+    lab_result = relationship("LabResult", back_populates="attachments")
+    
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+    
+    @property
+    def next_chunk(self):
+        """Index of the next chunk to upload, or None once every byte has arrived."""
+        if self.status == "complete":
+            return None
+        return self.received_bytes // self.chunk_size
+    
+    def chunk_length(self, index: int) -> int:
+        """Expected byte length of chunk index (the last chunk may be shorter)."""
+        return max(0, min(self.chunk_size, self.size - index * self.chunk_size))
+    
+    def __repr__(self):
+        return f"<Attachment(id={self.id}, filename={self.filename}, status={self.status})>"
@@ -1,11 +1,16 @@
 """Doctor model extending User."""
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index, Float, event
 from sqlalchemy.orm import relationship
 from database import Base
+from services.geo import geocode_doctor
 
 class Doctor(Base):
     """Doctor model with professional information."""
     __tablename__ = "doctors"
+    __table_args__ = (
+        # Covers the GROUP BY used for directory facet counts
+        Index("ix_doctors_specialization_city", "specialization", "city"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -15,6 +20,12 @@ class Doctor(Base):
     description = Column(Text, nullable=True)  # Professional bio
     availability_notes = Column(Text, nullable=True)  # e.g., "Mo-Fr 9-17 Uhr"
     
+    # Derived from clinic_address/city on write (see services.geo)
+    postal_code = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geocell = Column(Integer, nullable=True, index=True)  # Grid cell id for proximity search
+    
     # Relationships
     user = relationship("User", back_populates="doctor")
     appointments = relationship("Appointment", back_populates="doctor", foreign_keys="Appointment.doctor_id")
@@ -24,3 +35,9 @@ class Doctor(Base):
     
     def __repr__(self):
         return f"<Doctor(id={self.id}, specialization={self.specialization}, city={self.city})>"
+
+@event.listens_for(Doctor, "before_insert")
+@event.listens_for(Doctor, "before_update")
+def _geocode_on_write(mapper, connection, target):
+    """Keep the stored coordinates and grid cell in sync with the address."""
+    geocode_doctor(target)
@@ -1,11 +1,16 @@
 """Lab result model for laboratory test results."""
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, Float, Index, event
 from sqlalchemy.orm import relationship
 from database import Base
+from services.lab_values import parse_lab_result
 
 class LabResult(Base):
     """Laboratory test result model."""
     __tablename__ = "lab_results"
+    __table_args__ = (
+        # Serves per-patient, per-test range and trend queries
+        Index("ix_lab_results_patient_test_date", "patient_id", "test_name", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -17,9 +22,22 @@ class LabResult(Base):
     date = Column(Date, nullable=False)
     file_path = Column(String, nullable=True)  # Optional file attachment
     
+    # Parsed from result_value/normal_range on write (see services.lab_values)
+    value_num = Column(Float, nullable=True)
+    range_low = Column(Float, nullable=True)
+    range_high = Column(Float, nullable=True)
+    
     # Relationships
     patient = relationship("Patient", back_populates="lab_results")
     doctor = relationship("Doctor", back_populates="lab_results")
+    attachments = relationship("Attachment", back_populates="lab_result")
     
     def __repr__(self):
         return f"<LabResult(id={self.id}, test_name={self.test_name}, patient_id={self.patient_id})>"
+
+@event.listens_for(LabResult, "before_insert")
+@event.listens_for(LabResult, "before_update")
+def _parse_numeric_values(mapper, connection, target):
+    """Keep the numeric columns in sync with the value and range strings."""
+    for column, value in parse_lab_result(target.result_value, target.normal_range).items():
+        setattr(target, column, value)
@@ -1,11 +1,16 @@
 """Medication model for individual medications within prescriptions."""
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, JSON, Index, event
 from sqlalchemy.orm import relationship
 from database import Base
+from services.dosing_schedule import parse_frequency
 
 class Medication(Base):
     """Medication model within a prescription."""
     __tablename__ = "medications"
+    __table_args__ = (
+        # Active medications of a patient: per prescription, range on the dates
+        Index("ix_medications_prescription_dates", "prescription_id", "start_date", "end_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     prescription_id = Column(Integer, ForeignKey("prescriptions.id"), nullable=False)
@@ -15,11 +20,20 @@ class Medication(Base):
     start_date = Column(Date, nullable=True)
     end_date = Column(Date, nullable=True)
     notes = Column(Text, nullable=True)  # Additional instructions
+    # Parsed from frequency_description on write (see services.dosing_schedule); None if not understood
+    schedule = Column(JSON(none_as_null=True), nullable=True)
     
     # Relationships
     prescription = relationship("Prescription", back_populates="medications")
     reminders = relationship("MedicationReminder", back_populates="medication", cascade="all, delete-orphan")
     intakes = relationship("MedicationIntake", back_populates="medication", cascade="all, delete-orphan")
+    adherence_days = relationship("MedicationAdherenceDay", back_populates="medication", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Medication(id={self.id}, name={self.name}, prescription_id={self.prescription_id})>"
+
+@event.listens_for(Medication, "before_insert")
+@event.listens_for(Medication, "before_update")
+def _parse_schedule(mapper, connection, target):
+    """Keep the structured schedule in sync with the frequency description."""
+    target.schedule = parse_frequency(target.frequency_description)
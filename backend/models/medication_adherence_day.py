@@ -0,0 +1,24 @@
+"""Daily medication adherence rollup model."""
+from sqlalchemy import Column, Integer, ForeignKey, Date, UniqueConstraint
+from sqlalchemy.orm import relationship
+from database import Base
+
+class MedicationAdherenceDay(Base):
+    """Taken/missed intake counts of one medication on one day (kept current by services.adherence)."""
+    __tablename__ = "medication_adherence_days"
+    __table_args__ = (
+        # Upsert target; also serves per-medication date range queries
+        UniqueConstraint("medication_id", "day", name="uq_medication_adherence_days_medication_day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
+    day = Column(Date, nullable=False)  # Day of the planned dose
+    taken = Column(Integer, default=0, nullable=False)
+    missed = Column(Integer, default=0, nullable=False)
+    
+    # Relationships
+    medication = relationship("Medication", back_populates="adherence_days")
+    
+    def __repr__(self):
+        return f"<MedicationAdherenceDay(medication_id={self.medication_id}, day={self.day}, taken={self.taken}, missed={self.missed})>"
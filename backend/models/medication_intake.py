@@ -1,6 +1,6 @@
 """Medication intake model for tracking adherence."""
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, Enum as SQLEnum
+from sqlalchemy.orm import column_property, relationship
 from datetime import datetime
 import enum
 from database import Base
@@ -13,12 +13,18 @@ class IntakeStatus(str, enum.Enum):
 class MedicationIntake(Base):
     """Medication intake record for adherence tracking."""
     __tablename__ = "medication_intakes"
+    __table_args__ = (
+        # Deduplicates offline client syncs (upsert target)
+        Index("uq_medication_intakes_medication_client", "medication_id", "client_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
-    planned_datetime = Column(DateTime, nullable=False)  # When the dose was planned
-    status = Column(SQLEnum(IntakeStatus), nullable=False)
+    # active_history keeps the previous values on change for the adherence rollups (services.adherence)
+    medication_id = column_property(Column(Integer, ForeignKey("medications.id"), nullable=False), active_history=True)
+    planned_datetime = column_property(Column(DateTime, nullable=False), active_history=True)  # When the dose was planned
+    status = column_property(Column(SQLEnum(IntakeStatus), nullable=False), active_history=True)
     recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # When marked
+    client_id = Column(String(64), nullable=True)  # Id generated by an offline client
     
     # Relationships
     medication = relationship("Medication", back_populates="intakes")
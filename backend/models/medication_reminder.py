@@ -9,7 +9,7 @@ class MedicationReminder(Base):
     __tablename__ = "medication_reminders"
     
     id = Column(Integer, primary_key=True, index=True)
-    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
+    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False, index=True)
     reminder_time = Column(String, nullable=False)  # e.g., "08:00", "14:00", "20:00"
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 from datetime import datetime
 import enum
 from database import Base
@@ -15,11 +15,12 @@ class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    # active_history keeps the previous values on change for the unread counters (services.notification_counts)
+    user_id = column_property(Column(Integer, ForeignKey("users.id")), active_history=True)
     title = Column(String, nullable=False)
     message = Column(String, nullable=False)
     type = Column(Enum(NotificationType), default=NotificationType.SYSTEM)
-    is_read = Column(Boolean, default=False)
+    is_read = column_property(Column(Boolean, default=False), active_history=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     link = Column(String, nullable=True)  # Optional link to redirect user
 
@@ -0,0 +1,17 @@
+"""Per-user unread notification counter model."""
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from database import Base
+
+class NotificationCount(Base):
+    """Unread notifications of one user (kept current by services.notification_counts)."""
+    __tablename__ = "notification_counts"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, default=0, nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="notification_count")
+    
+    def __repr__(self):
+        return f"<NotificationCount(user_id={self.user_id}, unread={self.unread})>"
@@ -9,7 +9,7 @@ class Prescription(Base):
     __tablename__ = "prescriptions"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
     description = Column(Text, nullable=True)  # General notes about the prescription
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
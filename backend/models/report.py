@@ -19,6 +19,7 @@ class Report(Base):
     # Relationships
     patient = relationship("Patient", back_populates="reports")
     doctor = relationship("Doctor", back_populates="reports")
+    attachments = relationship("Attachment", back_populates="report")
     
     def __repr__(self):
         return f"<Report(id={self.id}, title={self.title}, patient_id={self.patient_id})>"
@@ -0,0 +1,225 @@
+"""Router for report and lab result attachments (chunked upload, ranged download)."""
+import os
+from datetime import datetime
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+
+from database import get_db
+from models.attachment import Attachment
+from models.lab_result import LabResult
+from models.report import Report
+from models.user import User, UserRole
+from schemas.attachment import AttachmentCreate, AttachmentResponse
+from auth.utils import get_current_user, get_current_doctor
+from services.attachments import attachment_store, iter_file_range, parse_range
+from config import settings
+
+router = APIRouter(prefix=settings.API_PREFIX, tags=["Attachments"])
+
+def _can_access(record, user: User) -> bool:
+    """The record's patient and the doctor who created it may see its attachments."""
+    if user.role == UserRole.PATIENT:
+        return record.patient.user_id == user.id
+    return record.doctor is not None and record.doctor.user_id == user.id
+
+def _get_record(db: Session, model, record_id: int, user: User):
+    record = db.query(model).filter(model.id == record_id).first()
+    if not record or not _can_access(record, user):
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    return record
+
+def _get_attachment(db: Session, attachment_id: int, user: User) -> Attachment:
+    attachment = db.query(Attachment).filter(Attachment.id == attachment_id).first()
+    if not attachment or not _can_access(attachment.report or attachment.lab_result, user):
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return attachment
+
+def _start_upload(db: Session, data: AttachmentCreate, user: User, **owner) -> Attachment:
+    """Create the attachment row and its empty partial file."""
+    if data.size > settings.ATTACHMENT_MAX_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Attachments are limited to {settings.ATTACHMENT_MAX_MB} MB")
+    chunk_size = min(
+        data.chunk_size or settings.ATTACHMENT_CHUNK_MB * 1024 * 1024,
+        settings.ATTACHMENT_MAX_CHUNK_MB * 1024 * 1024
+    )
+    attachment = Attachment(
+        uploaded_by=user.id,
+        filename=os.path.basename(data.filename),
+        content_type=data.content_type or "application/octet-stream",
+        size=data.size,
+        chunk_size=chunk_size,
+        received_bytes=0,
+        sha256=data.sha256.lower() if data.sha256 else None,
+        status="uploading",
+        **owner
+    )
+    db.add(attachment)
+    db.commit()
+    db.refresh(attachment)
+    attachment_store.create(attachment.id)
+    return attachment
+
+@router.post("/reports/{report_id}/attachments", response_model=AttachmentResponse, status_code=201)
+def create_report_attachment(
+    report_id: int,
+    data: AttachmentCreate,
+    current_user: User = Depends(get_current_doctor),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a chunked upload of a file attached to a report (doctor of the report only).
+    Upload the chunks with PUT /attachments/{id}/chunks/{index}.
+    """
+    _get_record(db, Report, report_id, current_user)
+    return _start_upload(db, data, current_user, report_id=report_id)
+
+@router.post("/lab-results/{result_id}/attachments", response_model=AttachmentResponse, status_code=201)
+def create_lab_result_attachment(
+    result_id: int,
+    data: AttachmentCreate,
+    current_user: User = Depends(get_current_doctor),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a chunked upload of a file attached to a lab result (doctor of the result only).
+    Upload the chunks with PUT /attachments/{id}/chunks/{index}.
+    """
+    _get_record(db, LabResult, result_id, current_user)
+    return _start_upload(db, data, current_user, lab_result_id=result_id)
+
+@router.get("/reports/{report_id}/attachments", response_model=List[AttachmentResponse])
+def list_report_attachments(
+    report_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the attachments of a report."""
+    report = _get_record(db, Report, report_id, current_user)
+    return report.attachments
+
+@router.get("/lab-results/{result_id}/attachments", response_model=List[AttachmentResponse])
+def list_lab_result_attachments(
+    result_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the attachments of a lab result."""
+    result = _get_record(db, LabResult, result_id, current_user)
+    return result.attachments
+
+@router.get("/attachments/{attachment_id}", response_model=AttachmentResponse)
+def get_attachment(
+    attachment_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get an attachment and its upload state.
+    Clients resume an interrupted upload at next_chunk.
+    """
+    return _get_attachment(db, attachment_id, current_user)
+
+def _prepare_chunk(db: Session, attachment_id: int, index: int, user: User) -> Optional[Attachment]:
+    """Check that chunk index is the next one; returns None if it was already received."""
+    attachment = _get_attachment(db, attachment_id, user)
+    if attachment.uploaded_by != user.id:
+        raise HTTPException(status_code=403, detail="Only the uploader can add chunks")
+    if attachment.status == "complete" or index < attachment.next_chunk:
+        # Retried chunk whose first attempt succeeded
+        return None
+    if index >= attachment.total_chunks:
+        raise HTTPException(status_code=400, detail=f"Chunk index must be below {attachment.total_chunks}")
+    if index > attachment.next_chunk:
+        raise HTTPException(status_code=409, detail=f"Expected chunk {attachment.next_chunk}")
+    return attachment
+
+def _commit_chunk(db: Session, attachment: Attachment, length: int) -> Attachment:
+    """Record a received chunk; verify and finalize the file after the last one."""
+    attachment.received_bytes += length
+    if attachment.received_bytes >= attachment.size:
+        if attachment.sha256 and attachment_store.file_sha256(attachment.id) != attachment.sha256:
+            # Every chunk matched its own checksum, so the client declared the wrong file
+            attachment.received_bytes = 0
+            db.commit()
+            attachment_store.create(attachment.id)
+            raise HTTPException(status_code=400, detail="File checksum mismatch; restart the upload")
+        attachment_store.finish(attachment.id)
+        attachment.status = "complete"
+        attachment.completed_at = datetime.utcnow()
+    db.commit()
+    db.refresh(attachment)
+    return attachment
+
+@router.put("/attachments/{attachment_id}/chunks/{index}", response_model=AttachmentResponse)
+async def upload_attachment_chunk(
+    attachment_id: int,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(..., pattern=r"^[0-9a-fA-F]{64}$", description="SHA-256 of this chunk (hex)"),
+    current_user: User = Depends(get_current_doctor),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload chunk `index` (0-based) of an attachment as the raw request body.
+    
+    Chunks must be sent in order and be exactly chunk_size bytes (the last one
+    the remainder). The body is streamed to disk; a chunk with the wrong length
+    or checksum is discarded and can be re-sent. Re-sending an already stored
+    chunk is acknowledged without writing it again.
+    """
+    async with attachment_store.lock(attachment_id):
+        attachment = await run_in_threadpool(_prepare_chunk, db, attachment_id, index, current_user)
+        if attachment is None:
+            return await run_in_threadpool(_get_attachment, db, attachment_id, current_user)
+    
+        length = attachment.chunk_length(index)
+        await attachment_store.receive_chunk(
+            attachment_id, attachment.received_bytes, length, x_chunk_sha256, request.stream()
+        )
+        return await run_in_threadpool(_commit_chunk, db, attachment, length)
+
+@router.get("/attachments/{attachment_id}/download")
+def download_attachment(
+    attachment_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a completed attachment.
+    Supports single byte ranges (Range/If-Range) for resuming and seeking in large files.
+    """
+    attachment = _get_attachment(db, attachment_id, current_user)
+    path = attachment_store.path(attachment.id)
+    if attachment.status != "complete" or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Attachment upload is not complete")
+    
+    size = attachment.size
+    etag = f'"{attachment.sha256 or f"{attachment.id}-{size}"}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(attachment.filename)}",
+    }
+    # A stale If-Range validator means the client's partial copy is outdated: send everything
+    byte_range = parse_range(range_header, size) if not if_range or if_range == etag else None
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    if size == 0:
+        return Response(b"", media_type=attachment.content_type, headers=headers)
+    return StreamingResponse(
+        iter_file_range(path, start, end),
+        status_code=status_code,
+        media_type=attachment.content_type,
+        headers=headers
+    )
@@ -1,56 +1,144 @@
 """Router for doctor search and information."""
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, contains_eager
 from typing import List, Optional
 
 from database import get_db
 from models.doctor import Doctor
 from models.user import User
-from schemas.doctor import DoctorResponse
+from schemas.doctor import DoctorResponse, DoctorNearbyResponse, DoctorFacets
+from services.geo import lookup_postcode, cell_ranges, haversine_km
 from config import settings
 
 router = APIRouter(prefix=f"{settings.API_PREFIX}/doctors", tags=["Doctors"])
 
+def _apply_filters(query, name: Optional[str], specialization: Optional[str], city: Optional[str]):
+    """Apply the directory filters to a query that already joins Doctor and User."""
+    if name:
+        query = query.filter(User.name.ilike(f"%{name}%"))
+    
+    if specialization:
+        query = query.filter(Doctor.specialization.ilike(f"%{specialization}%"))
+    
+    if city:
+        query = query.filter(Doctor.city.ilike(f"%{city}%"))
+    
+    return query
+
+def _doctor_to_dict(doctor: Doctor) -> dict:
+    """Build the response payload for a doctor including user information."""
+    return {
+        "id": doctor.id,
+        "user_id": doctor.user_id,
+        "name": doctor.user.name,
+        "email": doctor.user.email,
+        "phone": doctor.user.phone,
+        "specialization": doctor.specialization,
+        "city": doctor.city,
+        "clinic_address": doctor.clinic_address,
+        "description": doctor.description,
+        "availability_notes": doctor.availability_notes,
+    }
+
 @router.get("", response_model=List[DoctorResponse])
 def search_doctors(
     name: Optional[str] = Query(None, description="Search by doctor name"),
     specialization: Optional[str] = Query(None, description="Filter by specialization"),
     city: Optional[str] = Query(None, description="Filter by city"),
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=200, description="Maximum number of records to return"),
     db: Session = Depends(get_db)
 ):
     """
-    Search and filter doctors by name, specialization, and city.
+    Search and filter doctors by name, specialization, and city, with pagination.
+    Use /doctors/facets with the same filters for the total and facet counts.
     """
-    query = db.query(Doctor).join(User, Doctor.user_id == User.id)
+    query = db.query(Doctor).join(User, Doctor.user_id == User.id).options(contains_eager(Doctor.user))
+    query = _apply_filters(query, name, specialization, city)
     
-    if name:
-        query = query.filter(User.name.ilike(f"%{name}%"))
+    # Stable ordering so that pages do not overlap
+    doctors = query.order_by(User.name, Doctor.id).offset(skip).limit(limit).all()
     
-    if specialization:
-        query = query.filter(Doctor.specialization.ilike(f"%{specialization}%"))
+    return [_doctor_to_dict(doctor) for doctor in doctors]
+
+@router.get("/facets", response_model=DoctorFacets)
+def get_doctor_facets(
+    name: Optional[str] = Query(None, description="Search by doctor name"),
+    specialization: Optional[str] = Query(None, description="Filter by specialization"),
+    city: Optional[str] = Query(None, description="Filter by city"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the total and the specialization/city facet counts for the current filters.
     
-    if city:
-        query = query.filter(Doctor.city.ilike(f"%{city}%"))
+    Both facets come from a single GROUP BY over (specialization, city); the
+    number of rows returned is bounded by the distinct pairs, not by the number
+    of doctors.
+    """
+    query = db.query(
+        Doctor.specialization,
+        Doctor.city,
+        func.count(Doctor.id)
+    ).join(User, Doctor.user_id == User.id)
+    query = _apply_filters(query, name, specialization, city)
+    rows = query.group_by(Doctor.specialization, Doctor.city).all()
+    
+    specialization_counts = {}
+    city_counts = {}
+    total = 0
+    for spec, doctor_city, count in rows:
+        specialization_counts[spec] = specialization_counts.get(spec, 0) + count
+        city_counts[doctor_city] = city_counts.get(doctor_city, 0) + count
+        total += count
+    
+    def to_facet(counts: dict) -> list:
+        ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"value": value, "count": count} for value, count in ordered]
+    
+    return {
+        "total": total,
+        "specialization": to_facet(specialization_counts),
+        "city": to_facet(city_counts),
+    }
+
+@router.get("/nearby", response_model=List[DoctorNearbyResponse])
+def search_nearby_doctors(
+    plz: str = Query(..., pattern=r"^\d{5}$", description="German postal code (PLZ)"),
+    radius_km: float = Query(25, gt=0, le=300, description="Search radius in kilometers"),
+    specialization: Optional[str] = Query(None, description="Filter by specialization"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of records to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    Find doctors within a radius of a postal code, nearest first.
+    
+    Candidates are selected by grid cell ranges on the indexed geocell column,
+    then filtered by exact great-circle distance.
+    """
+    origin = lookup_postcode(plz)
+    if origin is None:
+        raise HTTPException(status_code=404, detail="Postal code not found")
+    latitude, longitude = origin
     
-    doctors = query.all()
+    cell_filter = or_(*[
+        Doctor.geocell.between(first, last)
+        for first, last in cell_ranges(latitude, longitude, radius_km)
+    ])
+    query = db.query(Doctor).join(User, Doctor.user_id == User.id).options(contains_eager(Doctor.user))
+    query = _apply_filters(query.filter(cell_filter), None, specialization, None)
     
-    # Build response with user information
-    result = []
-    for doctor in doctors:
-        result.append({
-            "id": doctor.id,
-            "user_id": doctor.user_id,
-            "name": doctor.user.name,
-            "email": doctor.user.email,
-            "phone": doctor.user.phone,
-            "specialization": doctor.specialization,
-            "city": doctor.city,
-            "clinic_address": doctor.clinic_address,
-            "description": doctor.description,
-            "availability_notes": doctor.availability_notes,
-        })
+    matches = []
+    for doctor in query.all():
+        distance = haversine_km(latitude, longitude, doctor.latitude, doctor.longitude)
+        if distance <= radius_km:
+            matches.append((distance, doctor))
+    matches.sort(key=lambda match: (match[0], match[1].id))
     
-    return result
+    return [
+        {**_doctor_to_dict(doctor), "distance_km": round(distance, 1)}
+        for distance, doctor in matches[:limit]
+    ]
 
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
@@ -62,15 +150,4 @@ def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
-    return {
-        "id": doctor.id,
-        "user_id": doctor.user_id,
-        "name": doctor.user.name,
-        "email": doctor.user.email,
-        "phone": doctor.user.phone,
-        "specialization": doctor.specialization,
-        "city": doctor.city,
-        "clinic_address": doctor.clinic_address,
-        "description": doctor.description,
-        "availability_notes": doctor.availability_notes,
-    }
+    return _doctor_to_dict(doctor)
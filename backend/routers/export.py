@@ -0,0 +1,149 @@
+"""Router for exporting a patient's complete record."""
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Callable, Iterator, List, Tuple
+
+from database import get_db
+from models.report import Report
+from models.lab_result import LabResult
+from models.prescription import Prescription
+from models.patient import Patient
+from models.doctor import Doctor
+from models.user import User
+from auth.utils import get_current_patient
+from routers.reports import render_report_pdf
+from routers.lab_results import render_lab_result_pdf
+from routers.prescriptions import render_prescription_pdf
+from services.pdf_cache import PinnedFile
+from services.pdf_renderer import pdf_renderer
+from config import settings
+
+router = APIRouter(prefix=f"{settings.API_PREFIX}/export", tags=["Export"])
+
+CHUNK_SIZE = 64 * 1024
+
+class _ZipSink:
+    """
+    Write-only buffer handed to ZipFile. It has no tell()/seek(), so zipfile
+    writes data descriptors instead of seeking back, and the archive can be
+    drained to the client piece by piece.
+    """
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _render_members(jobs: List[Tuple[str, Callable[[], PinnedFile]]]) -> List[Tuple[str, PinnedFile]]:
+    """
+    Render (or look up) all PDFs in parallel and return them pinned, in job order.
+    If any render fails, the others are released and its error is raised, so the
+    request fails with an error status instead of sending a truncated ZIP.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, pdf_renderer.workers), thread_name_prefix="export") as pool:
+        futures = [(arcname, pool.submit(render)) for arcname, render in jobs]
+    
+    members = []
+    error = None
+    for arcname, future in futures:
+        try:
+            members.append((arcname, future.result()))
+        except Exception as exc:
+            error = error or exc
+    if error is not None:
+        for _, pdf in members:
+            pdf.release()
+        raise error
+    return members
+
+def _archive_chunks(members: List[Tuple[str, PinnedFile]]) -> Iterator[bytes]:
+    """
+    Stream already rendered PDFs into a ZIP, releasing each once it is copied.
+    Only the file currently being copied is buffered, in CHUNK_SIZE pieces.
+    """
+    sink = _ZipSink()
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for arcname, pdf in members:
+                with pdf, open(pdf.path, "rb") as source, archive.open(arcname, "w") as target:
+                    while True:
+                        chunk = source.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                yield sink.drain()
+        # Central directory, written when the archive is closed
+        yield sink.drain()
+    finally:
+        # The client may leave mid-download
+        for _, pdf in members:
+            pdf.release()
+
+@router.get("/archive.zip")
+def export_archive(
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Download all reports, lab results and prescriptions of the current patient as one ZIP of PDFs.
+    """
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    if not patient:
+        raise HTTPException(status_code=400, detail="Patient profile not found")
+    patient_name = current_user.name
+    
+    reports = db.query(Report).filter(Report.patient_id == patient.id).options(
+        joinedload(Report.doctor).joinedload(Doctor.user)
+    ).all()
+    lab_results = db.query(LabResult).filter(LabResult.patient_id == patient.id).all()
+    prescriptions = db.query(Prescription).filter(Prescription.patient_id == patient.id).options(
+        selectinload(Prescription.medications),
+        joinedload(Prescription.doctor).joinedload(Doctor.user)
+    ).all()
+    
+    # Everything the renders need is loaded here, before the response starts streaming.
+    # Batch renders wait for a free render slot instead of failing with 503.
+    jobs = []
+    for report in reports:
+        jobs.append((
+            f"reports/report_{report.id}.pdf",
+            lambda report=report, doctor_name=report.doctor.user.name: render_report_pdf(
+                report, patient_name, doctor_name, wait_for_slot=True
+            )
+        ))
+    for result in lab_results:
+        jobs.append((
+            f"lab_results/lab_result_{result.id}.pdf",
+            lambda result=result: render_lab_result_pdf(result, patient_name, wait_for_slot=True)
+        ))
+    for prescription in prescriptions:
+        jobs.append((
+            f"prescriptions/prescription_{prescription.id}.pdf",
+            lambda prescription=prescription, doctor_name=prescription.doctor.user.name: render_prescription_pdf(
+                prescription, patient_name, doctor_name, wait_for_slot=True
+            )
+        ))
+    
+    # Every member is rendered and pinned before the first byte is sent
+    members = _render_members(jobs)
+    return StreamingResponse(
+        _archive_chunks(members),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=patient_record.zip"}
+    )
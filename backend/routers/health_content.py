@@ -1,14 +1,14 @@
 """Router for health tips and FAQ with pagination and caching."""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
-from functools import lru_cache
 
 from database import get_db
 from models.health_tip import HealthTip, HealthTipCategory
 from models.faq import FAQ
+from services.content_snapshot import content_snapshots
 from config import settings
 
 router = APIRouter(prefix=f"{settings.API_PREFIX}/content", tags=["Health Content"])
@@ -35,8 +35,8 @@ class FAQResponse(BaseModel):
         from_attributes = True
 
 @router.get("/health-tips", response_model=List[HealthTipResponse])
-@lru_cache(maxsize=128)
 def get_health_tips(
+    request: Request,
     category: Optional[str] = Query(None, description="Filter by category"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=200, description="Maximum number of records to return"),
@@ -45,26 +45,43 @@ def get_health_tips(
     """
     Retrieve health tips, optionally filtered by category, with pagination.
     Categories: bewegung, ernährung, prävention, gesundheit
+    
+    Requests for a complete list are served from the precompressed snapshot.
     """
-    query = db.query(HealthTip)
+    cat_enum = None
     if category:
         try:
             cat_enum = HealthTipCategory(category)
-            query = query.filter(HealthTip.category == cat_enum)
         except ValueError:
             pass  # Invalid category, ignore filter
+    
+    snapshot_name = f"health_tips.{cat_enum.name.lower()}" if cat_enum else "health_tips"
+    if skip == 0:
+        snapshot = content_snapshots.current(db)
+        if limit >= snapshot.counts[snapshot_name]:
+            return snapshot.response(snapshot_name, request)
+    
+    query = db.query(HealthTip)
+    if cat_enum:
+        query = query.filter(HealthTip.category == cat_enum)
     query = query.order_by(HealthTip.created_at.desc()).offset(skip).limit(limit)
     return query.all()
 
 @router.get("/faq", response_model=List[FAQResponse])
-@lru_cache(maxsize=128)
 def get_faqs(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=200, description="Maximum number of records to return"),
     db: Session = Depends(get_db)
 ):
     """
     Retrieve FAQs with pagination support.
+    Requests for the complete list are served from the precompressed snapshot.
     """
+    if skip == 0:
+        snapshot = content_snapshots.current(db)
+        if limit >= snapshot.counts["faq"]:
+            return snapshot.response("faq", request)
+    
     query = db.query(FAQ).order_by(FAQ.created_at.desc()).offset(skip).limit(limit)
     return query.all()
@@ -1,42 +1,86 @@
 """Router for lab results."""
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session
-from typing import List
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import date
+from types import SimpleNamespace
 
 from database import get_db
 from models.lab_result import LabResult
 from models.patient import Patient
 from models.doctor import Doctor
 from models.user import User
-from schemas.report import LabResultCreate, LabResultResponse
+from schemas.report import LabResultCreate, LabResultImportResponse, LabResultResponse, LabSeriesResponse
 from auth.utils import get_current_user, get_current_patient, get_current_doctor
+from services.pdf_cache import PinnedFile, PinnedFileResponse, pdf_cache
+from services.pdf_renderer import pdf_renderer
+from services.pdf_storage import pdf_storage
+from services.pdf_templates import generate_lab_result_pdf
+from services.lab_series import build_series
+from services.lab_import import LabResultImportParser, import_lab_results
 from config import settings
 
 router = APIRouter(prefix=f"{settings.API_PREFIX}/lab-results", tags=["Lab Results"])
 
-def generate_lab_result_pdf(result: LabResult, patient_name: str) -> bytes:
-    """Generate a simple PDF from lab result data."""
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, height - 50, f"Laborergebnis: {result.test_name}")
-    
-    p.setFont("Helvetica", 12)
-    p.drawString(50, height - 80, f"Patient: {patient_name}")
-    p.drawString(50, height - 100, f"Datum: {result.date.strftime('%d.%m.%Y')}")
-    p.drawString(50, height - 140, f"Test: {result.test_name}")
-    p.drawString(50, height - 160, f"Wert: {result.result_value} {result.unit or ''}")
-    if result.normal_range:
-        p.drawString(50, height - 180, f"Normalbereich: {result.normal_range}")
-    
-    p.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+# Bump whenever the layout changes so cached PDFs are re-rendered
+LAB_RESULT_PDF_TEMPLATE_VERSION = 1
+
+def lab_result_pdf_cache_key(result: LabResult, patient_name: str) -> str:
+    """Cache key covering every value rendered into the lab result PDF."""
+    return pdf_cache.make_key(
+        "lab_result",
+        result.id,
+        LAB_RESULT_PDF_TEMPLATE_VERSION,
+        test_name=result.test_name,
+        result_value=result.result_value,
+        unit=result.unit,
+        normal_range=result.normal_range,
+        date=result.date,
+        patient_name=patient_name,
+    )
+
+def _lab_result_render_data(result: LabResult) -> SimpleNamespace:
+    """Plain copy of the rendered lab result fields (only plain values cross the process boundary)."""
+    return SimpleNamespace(
+        id=result.id,
+        test_name=result.test_name,
+        result_value=result.result_value,
+        unit=result.unit,
+        normal_range=result.normal_range,
+        date=result.date,
+    )
+
+def render_lab_result_pdf(result: LabResult, patient_name: str, wait_for_slot: bool = False) -> PinnedFile:
+    """
+    Return the lab result PDF (release it once sent): the stored pre-rendered file
+    if it matches the current cache key, otherwise the cached copy, rendering it
+    in the PDF process pool on a miss.
+    """
+    key = lab_result_pdf_cache_key(result, patient_name)
+    path = pdf_storage.resolve(result.file_path, "lab_result", result.id, key)
+    if path is not None:
+        return PinnedFile(path)
+    data = _lab_result_render_data(result)
+    return pdf_cache.get_or_render(
+        key,
+        lambda output: pdf_renderer.render(
+            generate_lab_result_pdf, data, patient_name, output, wait_for_slot=wait_for_slot
+        )
+    )
+
+def prerender_lab_result_pdf(result_id: int, data: SimpleNamespace, patient_name: str) -> None:
+    """Render a new lab result's PDF into storage and record it in file_path (background task)."""
+    pdf_storage.prerender(
+        LabResult,
+        result_id,
+        "lab_result",
+        lab_result_pdf_cache_key(data, patient_name),
+        lambda output: pdf_renderer.render(
+            generate_lab_result_pdf, data, patient_name, output, wait_for_slot=True
+        )
+    )
 
 @router.get("", response_model=List[LabResultResponse])
 def list_lab_results(
@@ -59,6 +103,117 @@ def list_lab_results(
     
     return response
 
+@router.get("/out-of-range", response_model=List[LabResultResponse])
+def list_out_of_range_lab_results(
+    test_name: Optional[str] = Query(None, description="Restrict to one test, e.g. Blutzucker"),
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    List the current patient's lab results outside their reference range, newest first.
+    Uses the parsed numeric columns, so results without a numeric value or range are skipped.
+    """
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    query = db.query(LabResult).filter(
+        LabResult.patient_id == patient.id,
+        or_(
+            LabResult.value_num < LabResult.range_low,
+            LabResult.value_num > LabResult.range_high
+        )
+    )
+    if test_name:
+        query = query.filter(LabResult.test_name == test_name)
+    results = query.options(
+        joinedload(LabResult.doctor).joinedload(Doctor.user)
+    ).order_by(LabResult.date.desc()).all()
+    
+    return [
+        {
+            **result.__dict__,
+            "patient_name": current_user.name,
+            "doctor_name": result.doctor.user.name if result.doctor else None
+        }
+        for result in results
+    ]
+
+@router.get("/series", response_model=LabSeriesResponse)
+def get_lab_result_series(
+    test_name: str = Query(..., description="Test to chart, e.g. Blutzucker"),
+    date_from: Optional[date] = Query(None, alias="from", description="First date (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last date (inclusive)"),
+    max_points: int = Query(500, ge=3, le=5000, description="Maximum number of chart points"),
+    window: int = Query(5, ge=1, le=365, description="Rolling mean window in samples"),
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Time series of one lab test for the current patient.
+    
+    Statistics cover every numeric result in the range; long histories are
+    downsampled to max_points with LTTB for charting.
+    """
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    # Plain columns only, served by the (patient_id, test_name, date) index
+    query = db.query(
+        LabResult.date, LabResult.value_num, LabResult.range_low, LabResult.range_high, LabResult.unit
+    ).filter(
+        LabResult.patient_id == patient.id,
+        LabResult.test_name == test_name,
+        LabResult.value_num.isnot(None)
+    )
+    if date_from:
+        query = query.filter(LabResult.date >= date_from)
+    if date_to:
+        query = query.filter(LabResult.date <= date_to)
+    rows = query.order_by(LabResult.date, LabResult.id).all()
+    
+    return {
+        "test_name": test_name,
+        "unit": rows[-1].unit if rows else None,
+        "window": window,
+        **build_series(rows, window, max_points)
+    }
+
+@router.post("/import", response_model=LabResultImportResponse)
+async def import_lab_results_endpoint(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$", description="Defaults to the Content-Type"),
+    current_user: User = Depends(get_current_doctor),
+    db: Session = Depends(get_db)
+):
+    """
+    Import many lab results at once (doctor only), e.g. a lab's daily delivery.
+    
+    The body is CSV with a header row or NDJSON (one object per line) with the
+    columns patient_id or patient_email, test_name, result_value, unit,
+    normal_range and date. It is parsed while it streams in; valid rows for
+    known patients are inserted in one transaction, invalid rows are reported
+    by line number and skipped.
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+    doctor = await run_in_threadpool(
+        lambda: db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    )
+    
+    parser = LabResultImportParser(fmt)
+    try:
+        async for data in request.stream():
+            await run_in_threadpool(parser.feed, data)
+        parser.close()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import body must be UTF-8 encoded")
+    
+    imported = await run_in_threadpool(import_lab_results, db, parser, doctor.id)
+    return {
+        "received": parser.received,
+        "imported": imported,
+        "failed": parser.error_count,
+        "errors": sorted(parser.errors, key=lambda error: error["row"]),
+        "errors_truncated": parser.error_count > len(parser.errors),
+    }
+
 @router.get("/{result_id}", response_model=LabResultResponse)
 def get_lab_result(
     result_id: int,
@@ -101,10 +256,11 @@ def download_lab_result(
     if not result:
         raise HTTPException(status_code=404, detail="Lab result not found")
     
-    pdf_data = generate_lab_result_pdf(result, current_user.name)
+    # Pre-rendered when the result was created; otherwise (or if stale) rendered on demand and cached
+    pdf = render_lab_result_pdf(result, current_user.name)
     
-    return Response(
-        content=pdf_data,
+    return PinnedFileResponse(
+        pdf,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=lab_result_{result_id}.pdf"}
     )
@@ -113,6 +269,7 @@ def download_lab_result(
 def create_lab_result(
     patient_id: int,
     result_data: LabResultCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_doctor),
     db: Session = Depends(get_db)
 ):
@@ -138,6 +295,11 @@ def create_lab_result(
     db.commit()
     db.refresh(result)
     
+    # Render the PDF after the response is sent so the first download is a file read
+    background_tasks.add_task(
+        prerender_lab_result_pdf, result.id, _lab_result_render_data(result), patient.user.name
+    )
+    
     return {
         **result.__dict__,
         "patient_name": patient.user.name,
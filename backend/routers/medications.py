@@ -0,0 +1,263 @@
+"""Router for medication intakes and adherence."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date, timedelta
+
+from database import get_db
+from models.medication import Medication
+from models.medication_adherence_day import MedicationAdherenceDay
+from models.prescription import Prescription
+from models.patient import Patient
+from models.doctor import Doctor
+from models.user import User, UserRole
+from schemas.medication import (
+    ActiveMedicationResponse,
+    IntakeSyncRequest,
+    IntakeSyncResponse,
+    MedicationAdherenceResponse,
+    PatientAdherenceSummary,
+)
+from auth.utils import get_current_user, get_current_patient, get_current_doctor
+from services.adherence import adherence_rate
+from services import write_versions
+from services.dosing_schedule import expand_planned_doses, planned_dose_count, planned_doses_per_day
+from services.tinylfu import TinyLFUCache
+from services.intake_sync import sync_intakes
+from config import settings
+
+router = APIRouter(prefix=f"{settings.API_PREFIX}/medications", tags=["Medications"])
+
+# Range used when from/to are not given
+DEFAULT_ADHERENCE_DAYS = 30
+
+# Active medications per patient, valid for the day they were loaded until the next prescription write
+write_versions.track("active_medications", Prescription, Medication)
+active_medications_cache = TinyLFUCache(settings.ACTIVE_MEDICATIONS_CACHE_SIZE)
+
+def _date_range(date_from: Optional[date], date_to: Optional[date]):
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_ADHERENCE_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    return date_from, date_to
+
+def _get_medication(db: Session, medication_id: int, user: User) -> Medication:
+    """The patient and the prescribing doctor may see a medication."""
+    row = db.query(Medication, Patient.user_id, Doctor.user_id).join(
+        Prescription, Medication.prescription_id == Prescription.id
+    ).join(
+        Patient, Prescription.patient_id == Patient.id
+    ).join(
+        Doctor, Prescription.doctor_id == Doctor.id
+    ).filter(Medication.id == medication_id).first()
+    
+    if row:
+        medication, patient_user_id, doctor_user_id = row
+        allowed_user_id = patient_user_id if user.role == UserRole.PATIENT else doctor_user_id
+        if allowed_user_id == user.id:
+            return medication
+    raise HTTPException(status_code=404, detail="Medication not found")
+
+def _patient_summary(db: Session, patient_id: int, date_from: date, date_to: date, doctor_id: Optional[int] = None) -> dict:
+    """Planned doses from the stored schedules and recorded doses summed from the daily rollups, per medication."""
+    query = db.query(
+        Medication.id, Medication.name, Medication.schedule, Medication.start_date, Medication.end_date
+    ).join(
+        Prescription, Medication.prescription_id == Prescription.id
+    ).filter(Prescription.patient_id == patient_id)
+    if doctor_id is not None:
+        query = query.filter(Prescription.doctor_id == doctor_id)
+    medications = query.order_by(Medication.name, Medication.id).all()
+    
+    recorded = {}
+    if medications:
+        recorded = {
+            medication_id: (taken, missed)
+            for medication_id, taken, missed in db.query(
+                MedicationAdherenceDay.medication_id,
+                func.sum(MedicationAdherenceDay.taken),
+                func.sum(MedicationAdherenceDay.missed),
+            ).filter(
+                MedicationAdherenceDay.medication_id.in_([medication.id for medication in medications]),
+                MedicationAdherenceDay.day >= date_from,
+                MedicationAdherenceDay.day <= date_to
+            ).group_by(MedicationAdherenceDay.medication_id)
+        }
+    
+    totals = []
+    for medication in medications:
+        taken, missed = recorded.get(medication.id, (0, 0))
+        totals.append({
+            "medication_id": medication.id,
+            "name": medication.name,
+            "planned": planned_dose_count(
+                medication.schedule, date_from, date_to, medication.start_date, medication.end_date
+            ),
+            "taken": taken,
+            "missed": missed,
+            "adherence_rate": adherence_rate(taken, missed),
+        })
+    planned = [item["planned"] for item in totals if item["planned"] is not None]
+    taken = sum(item["taken"] for item in totals)
+    missed = sum(item["missed"] for item in totals)
+    return {
+        "patient_id": patient_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "planned": sum(planned) if planned else None,
+        "taken": taken,
+        "missed": missed,
+        "adherence_rate": adherence_rate(taken, missed),
+        "medications": totals,
+    }
+
+def _load_active_medications(db: Session, patient_id: int, today: date) -> List[dict]:
+    rows = db.query(Medication, User.name).join(
+        Prescription, Medication.prescription_id == Prescription.id
+    ).join(
+        Doctor, Prescription.doctor_id == Doctor.id
+    ).join(
+        User, Doctor.user_id == User.id
+    ).filter(
+        Prescription.patient_id == patient_id,
+        or_(Medication.start_date.is_(None), Medication.start_date <= today),
+        or_(Medication.end_date.is_(None), Medication.end_date >= today)
+    ).order_by(Medication.name, Medication.id).all()
+    
+    return [
+        {
+            **ActiveMedicationResponse.model_validate(medication).model_dump(),
+            "doctor_name": doctor_name,
+            "doses_today": [
+                dose.strftime("%H:%M")
+                for dose in expand_planned_doses(
+                    medication.schedule, today, today, medication.start_date, medication.end_date
+                ).tolist()
+            ],
+        }
+        for medication, doctor_name in rows
+    ]
+
+@router.get("/active", response_model=List[ActiveMedicationResponse])
+def list_active_medications(
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Medications the current patient takes today, with today's dose times.
+    Cached per patient until midnight or the next prescription change.
+    """
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    today = date.today()
+    version = write_versions.current("active_medications")
+    cached = active_medications_cache.get(
+        patient.id, is_valid=lambda entry: entry[0] == version and entry[1] == today
+    )
+    if cached is not None:
+        return cached[2]
+    
+    medications = _load_active_medications(db, patient.id, today)
+    active_medications_cache.put(patient.id, (version, today, medications))
+    return medications
+
+@router.post("/intakes:sync", response_model=IntakeSyncResponse)
+def sync_medication_intakes(
+    data: IntakeSyncRequest,
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Sync intakes recorded offline (up to 1000 per request).
+    
+    Each intake carries a client-generated client_id; sending the same batch
+    again is safe. An intake that already exists is only updated when the new
+    record has a later recorded_at.
+    """
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    return sync_intakes(db, patient.id, data.intakes)
+
+@router.get("/adherence", response_model=PatientAdherenceSummary)
+def get_my_adherence(
+    date_from: Optional[date] = Query(None, alias="from", description="First day (inclusive, default 30 days ago)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day (inclusive, default today)"),
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Adherence summary of all medications of the current patient.
+    """
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    return _patient_summary(db, patient.id, *_date_range(date_from, date_to))
+
+@router.get("/patients/{patient_id}/adherence", response_model=PatientAdherenceSummary)
+def get_patient_adherence(
+    patient_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="First day (inclusive, default 30 days ago)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day (inclusive, default today)"),
+    current_user: User = Depends(get_current_doctor),
+    db: Session = Depends(get_db)
+):
+    """
+    Adherence summary of a patient's medications prescribed by the current doctor.
+    """
+    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    if not db.query(Patient.id).filter(Patient.id == patient_id).first():
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return _patient_summary(db, patient_id, *_date_range(date_from, date_to), doctor_id=doctor.id)
+
+@router.get("/{medication_id}/adherence", response_model=MedicationAdherenceResponse)
+def get_medication_adherence(
+    medication_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="First day (inclusive, default 30 days ago)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day (inclusive, default today)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Daily adherence of one medication (patient or prescribing doctor).
+    Planned doses come from the medication's parsed schedule; days without
+    planned or recorded doses are omitted.
+    """
+    medication = _get_medication(db, medication_id, current_user)
+    date_from, date_to = _date_range(date_from, date_to)
+    rows = db.query(
+        MedicationAdherenceDay.day, MedicationAdherenceDay.taken, MedicationAdherenceDay.missed
+    ).filter(
+        MedicationAdherenceDay.medication_id == medication_id,
+        MedicationAdherenceDay.day >= date_from,
+        MedicationAdherenceDay.day <= date_to
+    ).order_by(MedicationAdherenceDay.day).all()
+    
+    recorded = {day: (taken, missed) for day, taken, missed in rows if taken or missed}
+    planned_total = planned_dose_count(
+        medication.schedule, date_from, date_to, medication.start_date, medication.end_date
+    )
+    planned = planned_doses_per_day(
+        medication.schedule, date_from, date_to, medication.start_date, medication.end_date
+    )
+    
+    days = []
+    for day in sorted(recorded.keys() | planned.keys()):
+        taken, missed = recorded.get(day, (0, 0))
+        days.append({
+            "day": day,
+            "planned": None if planned_total is None else planned.get(day, 0),
+            "taken": taken,
+            "missed": missed,
+            "adherence_rate": adherence_rate(taken, missed),
+        })
+    taken = sum(day["taken"] for day in days)
+    missed = sum(day["missed"] for day in days)
+    return {
+        "medication_id": medication.id,
+        "name": medication.name,
+        "date_from": date_from,
+        "date_to": date_to,
+        "planned": planned_total,
+        "taken": taken,
+        "missed": missed,
+        "adherence_rate": adherence_rate(taken, missed),
+        "days": days,
+    }
@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-from models import Notification, User
+from typing import List, Optional
+from config import settings
+from database import get_db, SessionLocal
+from models import Doctor, Notification, User
+from models.user import UserRole
 from schemas import notification as notification_schema
-from auth import get_current_user
+from auth import get_current_user, get_current_doctor
+from auth.utils import decode_access_token
+from services.notification_broadcast import BroadcastJob, broadcast_jobs, doctor_patient_user_ids
+from services.notification_counts import apply_unread_deltas, unread_count
+from services.notification_hub import format_event, notification_event, notification_hub, publish_after_commit
 
 router = APIRouter(
     prefix="/notifications",
     tags=["notifications"]
 )
 
+# Notifications sent on reconnect (Last-Event-ID); clients missing more get a resync event
+STREAM_REPLAY_LIMIT = 100
+# Reconnect delay suggested to EventSource clients
+STREAM_RETRY_MS = 5000
+
 @router.get("/", response_model=List[notification_schema.Notification])
 def get_notifications(
     db: Session = Depends(get_db),
@@ -21,17 +36,104 @@ def get_notifications(
         Notification.user_id == current_user.id
     ).order_by(Notification.created_at.desc()).all()
 
+def _stream_user_id(token: Optional[str]) -> int:
+    """Authenticate the stream once at connect; EventSource cannot send an Authorization header."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if not token:
+        raise credentials_exception
+    email = decode_access_token(token).get("sub")
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == email).scalar() if email else None
+    finally:
+        db.close()
+    if user_id is None:
+        raise credentials_exception
+    return user_id
+
+def _missed_notifications(user_id: int, last_event_id: int) -> List[Notification]:
+    db = SessionLocal()
+    try:
+        return db.query(Notification).filter(
+            Notification.user_id == user_id,
+            Notification.id > last_event_id
+        ).order_by(Notification.id).limit(STREAM_REPLAY_LIMIT + 1).all()
+    finally:
+        db.close()
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    token: Optional[str] = Query(None, description="Access token (EventSource cannot set headers)"),
+    authorization: Optional[str] = Header(None),
+    last_event_id: Optional[str] = Header(None, description="Id of the last notification received, sent by EventSource on reconnect")
+):
+    """
+    Server-Sent Events stream of the current user's notifications.
+    
+    Events: `notification` (a new notification, event id = notification id),
+    `read` (`{"ids": [...]}` or `{"all": true}`) and `resync` (more was missed
+    than can be replayed; reload the list). A comment line is sent as
+    heartbeat when there is nothing else to send.
+    """
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    user_id = await run_in_threadpool(_stream_user_id, token)
+    resume_after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    # Subscribe before reading what was missed so nothing falls in between
+    subscriber = notification_hub.subscribe(user_id)
+    try:
+        missed = await run_in_threadpool(_missed_notifications, user_id, resume_after) if resume_after is not None else []
+    except BaseException:
+        notification_hub.unsubscribe(subscriber)
+        raise
+    
+    async def events():
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            last_sent = resume_after or 0
+            if len(missed) > STREAM_REPLAY_LIMIT:
+                yield format_event("resync", {})
+            else:
+                for notification in missed:
+                    yield notification_event(notification)
+                    last_sent = notification.id
+            while not subscriber.overflowed:
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                # Skip notifications already replayed
+                if message.startswith("id: ") and int(message[4:message.index("\n")]) <= last_sent:
+                    continue
+                yield message
+            # An overflowed stream ends here; the client reconnects with Last-Event-ID
+        finally:
+            notification_hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/unread-count")
 def get_unread_count(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get count of unread notifications."""
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
-    return {"count": count}
+    """Get count of unread notifications (from the per-user counter)."""
+    return {"count": unread_count(db, current_user.id)}
 
 @router.post("/{notification_id}/read")
 def mark_as_read(
@@ -58,10 +160,13 @@ def mark_all_as_read(
     current_user: User = Depends(get_current_user)
 ):
     """Mark all notifications as read."""
-    db.query(Notification).filter(
+    marked = db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.is_read == False
     ).update({"is_read": True})
+    # Bulk updates bypass the flush hook that maintains the counter
+    apply_unread_deltas(db.connection(), {current_user.id: -marked})
+    publish_after_commit(db, current_user.id, format_event("read", {"all": True}))
     
     db.commit()
     return {"message": "All notifications marked as read"}
@@ -80,3 +185,62 @@ def create_notification(
     db.commit()
     db.refresh(db_notification)
     return db_notification
+
+@router.post("/broadcast", response_model=notification_schema.BroadcastJob, status_code=status.HTTP_201_CREATED)
+def broadcast_notification(
+    broadcast: notification_schema.NotificationBroadcast,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_doctor)
+):
+    """
+    Send a notification to all of the doctor's patients (role PATIENT) or to a
+    list of their user ids. With system=true, broadcast admins
+    (BROADCAST_ADMIN_EMAILS) can reach all users of a role or any user ids.
+    
+    The notifications are created with INSERT ... SELECT, committed per chunk.
+    With background=true the broadcast runs as a job (202); poll its progress
+    at GET /notifications/broadcast/{job_id}.
+    """
+    if (broadcast.role is None) == (broadcast.user_ids is None):
+        raise HTTPException(status_code=400, detail="Specify either role or user_ids")
+    if broadcast.system:
+        if current_user.email.lower() not in settings.BROADCAST_ADMIN_EMAILS:
+            raise HTTPException(status_code=403, detail="System broadcasts require broadcast admin rights")
+    elif broadcast.role is not None and broadcast.role != UserRole.PATIENT:
+        raise HTTPException(status_code=403, detail="Broadcasts can only be sent to your patients")
+    
+    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    if broadcast.user_ids is not None and not broadcast.system:
+        user_ids = set(broadcast.user_ids)
+        own = db.query(func.count(User.id)).filter(
+            User.id.in_(user_ids),
+            User.id.in_(doctor_patient_user_ids(doctor.id))
+        ).scalar()
+        if own != len(user_ids):
+            raise HTTPException(status_code=403, detail="Broadcasts can only be sent to your patients")
+    
+    job = BroadcastJob(
+        broadcast.model_dump(include={"title", "message", "type", "link"}),
+        doctor.id,
+        broadcast.role,
+        broadcast.user_ids,
+        system=broadcast.system
+    )
+    if broadcast.background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return broadcast_jobs.submit(job)
+    return broadcast_jobs.run(db, job)
+
+@router.get("/broadcast/{job_id}", response_model=notification_schema.BroadcastJob)
+def get_broadcast(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_doctor)
+):
+    """Progress of one of the doctor's broadcast jobs (kept in memory of the worker that runs it)."""
+    job = broadcast_jobs.get(job_id)
+    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    if not job or job.doctor_id != doctor.id:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return job
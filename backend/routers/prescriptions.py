@@ -1,7 +1,10 @@
 """Router for prescriptions and medications."""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session, selectinload
 from typing import List
+from types import SimpleNamespace
+from datetime import date
 
 from database import get_db
 from models.prescription import Prescription
@@ -11,10 +14,87 @@ from models.doctor import Doctor
 from models.user import User
 from schemas.prescription import PrescriptionCreate, PrescriptionResponse
 from auth.utils import get_current_user, get_current_patient, get_current_doctor
+from services.pdf_cache import PinnedFile, pdf_cache
+from services.pdf_renderer import pdf_renderer
+from services.pdf_templates import generate_prescription_pdf
+from services.dosing_schedule import parse_frequency
+from services.interactions import interaction_index
+from services.reminder_scheduler import mark_changed_after_commit
 from config import settings
 
 router = APIRouter(prefix=f"{settings.API_PREFIX}/prescriptions", tags=["Prescriptions"])
 
+# Bump whenever the layout changes so cached PDFs are re-rendered
+PRESCRIPTION_PDF_TEMPLATE_VERSION = 2
+
+def prescription_pdf_cache_key(prescription: Prescription, patient_name: str, doctor_name: str) -> str:
+    """Cache key covering every value rendered into the prescription PDF."""
+    return pdf_cache.make_key(
+        "prescription",
+        prescription.id,
+        PRESCRIPTION_PDF_TEMPLATE_VERSION,
+        description=prescription.description,
+        created_at=prescription.created_at,
+        medications=[
+            [m.name, m.dosage, m.frequency_description, m.start_date, m.end_date, m.notes]
+            for m in prescription.medications
+        ],
+        patient_name=patient_name,
+        doctor_name=doctor_name,
+    )
+
+def render_prescription_pdf(
+    prescription: Prescription,
+    patient_name: str,
+    doctor_name: str,
+    wait_for_slot: bool = False
+) -> PinnedFile:
+    """Return the prescription PDF (release it once sent), rendering it in the PDF process pool on a cache miss."""
+    key = prescription_pdf_cache_key(prescription, patient_name, doctor_name)
+    # Only plain values cross the process boundary
+    data = SimpleNamespace(
+        id=prescription.id,
+        description=prescription.description,
+        created_at=prescription.created_at,
+        medications=[
+            SimpleNamespace(
+                name=m.name,
+                dosage=m.dosage,
+                frequency_description=m.frequency_description,
+                start_date=m.start_date,
+                end_date=m.end_date,
+                notes=m.notes,
+            )
+            for m in prescription.medications
+        ],
+    )
+    return pdf_cache.get_or_render(
+        key,
+        lambda output: pdf_renderer.render(
+            generate_prescription_pdf, data, patient_name, doctor_name, output, wait_for_slot=wait_for_slot
+        )
+    )
+
+def _prescriptions_with_doctor_name(db: Session):
+    """
+    Query (prescription, doctor name) pairs with medications preloaded.
+    Always two statements: the prescriptions joined to the doctor's user, then one
+    SELECT ... WHERE prescription_id IN (...) for all medications.
+    """
+    return db.query(Prescription, User.name).join(
+        Doctor, Prescription.doctor_id == Doctor.id
+    ).join(
+        User, Doctor.user_id == User.id
+    ).options(selectinload(Prescription.medications))
+
+def _prescription_to_dict(prescription: Prescription, patient_name: str, doctor_name: str) -> dict:
+    return {
+        **prescription.__dict__,
+        "medications": prescription.medications,
+        "patient_name": patient_name,
+        "doctor_name": doctor_name
+    }
+
 @router.get("", response_model=List[PrescriptionResponse])
 def list_prescriptions(
     current_user: User = Depends(get_current_patient),
@@ -24,18 +104,14 @@ def list_prescriptions(
     List all prescriptions for the current patient.
     """
     patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    prescriptions = db.query(Prescription).filter(Prescription.patient_id == patient.id).all()
-    
-    result = []
-    for prescription in prescriptions:
-        result.append({
-            **prescription.__dict__,
-            "medications": prescription.medications,
-            "patient_name": current_user.name,
-            "doctor_name": prescription.doctor.user.name
-        })
+    rows = _prescriptions_with_doctor_name(db).filter(
+        Prescription.patient_id == patient.id
+    ).order_by(Prescription.created_at.desc(), Prescription.id.desc()).all()
     
-    return result
+    return [
+        _prescription_to_dict(prescription, current_user.name, doctor_name)
+        for prescription, doctor_name in rows
+    ]
 
 @router.get("/{prescription_id}", response_model=PrescriptionResponse)
 def get_prescription(
@@ -47,20 +123,16 @@ def get_prescription(
     Get a specific prescription with medications.
     """
     patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    prescription = db.query(Prescription).filter(
+    row = _prescriptions_with_doctor_name(db).filter(
         Prescription.id == prescription_id,
         Prescription.patient_id == patient.id
     ).first()
     
-    if not prescription:
+    if not row:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
-    return {
-        **prescription.__dict__,
-        "medications": prescription.medications,
-        "patient_name": current_user.name,
-        "doctor_name": prescription.doctor.user.name
-    }
+    prescription, doctor_name = row
+    return _prescription_to_dict(prescription, current_user.name, doctor_name)
 
 @router.post("/patients/{patient_id}", response_model=PrescriptionResponse, status_code=201)
 def create_prescription(
@@ -71,6 +143,9 @@ def create_prescription(
 ):
     """
     Create a new prescription for a patient (doctor only).
+    
+    The new medications are checked against each other and the patient's
+    active medications; known interactions are returned as interaction_warnings.
     """
     doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
@@ -78,6 +153,18 @@ def create_prescription(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
+    today = date.today()
+    active_medications = db.query(Medication.name, Medication.prescription_id).join(
+        Prescription, Medication.prescription_id == Prescription.id
+    ).filter(
+        Prescription.patient_id == patient_id,
+        or_(Medication.start_date.is_(None), Medication.start_date <= today),
+        or_(Medication.end_date.is_(None), Medication.end_date >= today)
+    ).all()
+    interaction_warnings = interaction_index.check(
+        [med_data.name for med_data in prescription_data.medications], active_medications
+    )
+    
     # Create prescription
     prescription = Prescription(
         patient_id=patient_id,
@@ -87,20 +174,29 @@ def create_prescription(
     db.add(prescription)
     db.flush()
     
-    # Add medications
-    for med_data in prescription_data.medications:
-        medication = Medication(
-            prescription_id=prescription.id,
-            **med_data.dict()
-        )
-        db.add(medication)
+    # Add all medications with one multi-row INSERT ... RETURNING
+    # (bulk inserts skip the mapper and flush events, so the schedule is parsed
+    # here and the reminder scheduler is told about the new medications)
+    medications = []
+    if prescription_data.medications:
+        medications = db.scalars(
+            insert(Medication).returning(Medication),
+            [
+                {
+                    "prescription_id": prescription.id,
+                    **med_data.model_dump(),
+                    "schedule": parse_frequency(med_data.frequency_description)
+                }
+                for med_data in prescription_data.medications
+            ]
+        ).all()
+        mark_changed_after_commit(db, [medication.id for medication in medications])
     
+    # Serialize before commit expires the instances (avoids one reload per medication)
+    response = PrescriptionResponse.model_validate(
+        _prescription_to_dict(prescription, patient.user.name, current_user.name)
+        | {"medications": medications, "interaction_warnings": interaction_warnings}
+    )
     db.commit()
-    db.refresh(prescription)
     
-    return {
-        **prescription.__dict__,
-        "medications": prescription.medications,
-        "patient_name": patient.user.name,
-        "doctor_name": current_user.name
-    }
+    return response
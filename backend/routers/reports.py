@@ -1,10 +1,9 @@
 """Router for medical reports."""
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from types import SimpleNamespace
 
 from database import get_db
 from models.report import Report
@@ -13,39 +12,70 @@ from models.doctor import Doctor
 from models.user import User
 from schemas.report import ReportCreate, ReportResponse
 from auth.utils import get_current_user, get_current_patient, get_current_doctor
+from services.pdf_cache import PinnedFile, PinnedFileResponse, pdf_cache
+from services.pdf_renderer import pdf_renderer
+from services.pdf_storage import pdf_storage
+from services.pdf_templates import generate_report_pdf
 from config import settings
 
 router = APIRouter(prefix=f"{settings.API_PREFIX}/reports", tags=["Reports"])
 
-def generate_report_pdf(report: Report, patient_name: str, doctor_name: str) -> bytes:
-    """Generate a simple PDF from report data."""
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Title
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, height - 50, f"Arztbericht: {report.title}")
-    
-    # Metadata
-    p.setFont("Helvetica", 12)
-    p.drawString(50, height - 80, f"Patient: {patient_name}")
-    p.drawString(50, height - 100, f"Arzt: {doctor_name}")
-    p.drawString(50, height - 120, f"Datum: {report.created_at.strftime('%d.%m.%Y')}")
-    
-    # Content
-    p.setFont("Helvetica", 11)
-    y = height - 160
-    for line in report.content.split('\n'):
-        if y < 50:
-            p.showPage()
-            y = height - 50
-        p.drawString(50, y, line[:90])  # Truncate long lines
-        y -= 15
-    
-    p.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+# Bump whenever the layout changes so cached PDFs are re-rendered
+REPORT_PDF_TEMPLATE_VERSION = 3
+
+def report_pdf_cache_key(report: Report, patient_name: str, doctor_name: str) -> str:
+    """Cache key covering every value rendered into the report PDF."""
+    return pdf_cache.make_key(
+        "report",
+        report.id,
+        REPORT_PDF_TEMPLATE_VERSION,
+        title=report.title,
+        content=report.content,
+        created_at=report.created_at,
+        patient_name=patient_name,
+        doctor_name=doctor_name,
+    )
+
+def _report_render_data(report: Report) -> SimpleNamespace:
+    """Plain copy of the rendered report fields (only plain values cross the process boundary)."""
+    return SimpleNamespace(
+        id=report.id,
+        title=report.title,
+        content=report.content,
+        created_at=report.created_at,
+    )
+
+def render_report_pdf(
+    report: Report, patient_name: str, doctor_name: str, wait_for_slot: bool = False
+) -> PinnedFile:
+    """
+    Return the report PDF (release it once sent): the stored pre-rendered file if
+    it matches the current cache key, otherwise the cached copy, rendering it in
+    the PDF process pool on a miss.
+    """
+    key = report_pdf_cache_key(report, patient_name, doctor_name)
+    path = pdf_storage.resolve(report.file_path, "report", report.id, key)
+    if path is not None:
+        return PinnedFile(path)
+    data = _report_render_data(report)
+    return pdf_cache.get_or_render(
+        key,
+        lambda output: pdf_renderer.render(
+            generate_report_pdf, data, patient_name, doctor_name, output, wait_for_slot=wait_for_slot
+        )
+    )
+
+def prerender_report_pdf(report_id: int, data: SimpleNamespace, patient_name: str, doctor_name: str) -> None:
+    """Render a new report's PDF into storage and record it in file_path (background task)."""
+    pdf_storage.prerender(
+        Report,
+        report_id,
+        "report",
+        report_pdf_cache_key(data, patient_name, doctor_name),
+        lambda output: pdf_renderer.render(
+            generate_report_pdf, data, patient_name, doctor_name, output, wait_for_slot=True
+        )
+    )
 
 @router.get("", response_model=List[ReportResponse])
 def list_reports(
@@ -110,19 +140,39 @@ def download_report(
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    # Generate PDF
-    pdf_data = generate_report_pdf(report, current_user.name, report.doctor.user.name)
+    headers = {"Content-Disposition": f"attachment; filename=report_{report_id}.pdf"}
     
-    return Response(
-        content=pdf_data,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=report_{report_id}.pdf"}
-    )
+    doctor_name = report.doctor.user.name
+    key = report_pdf_cache_key(report, current_user.name, doctor_name)
+    
+    # Pre-rendered when the report was created, unless the template or a name has changed since
+    path = pdf_storage.resolve(report.file_path, "report", report.id, key)
+    if path is not None:
+        return PinnedFileResponse(PinnedFile(path), media_type="application/pdf", headers=headers)
+    
+    # Reports are immutable, so repeat downloads are served from the PDF cache
+    pdf = pdf_cache.acquire(key)
+    if pdf is not None:
+        return PinnedFileResponse(pdf, media_type="application/pdf", headers=headers)
+    
+    # Cache miss: stream pages while the renderer writes them; the finished file is cached.
+    # Returns once the first page is written, so failed renders still get an error status
+    data = _report_render_data(report)
+    try:
+        chunks = pdf_cache.stream_render(
+            key,
+            lambda output: pdf_renderer.submit(generate_report_pdf, data, current_user.name, doctor_name, output),
+            timeout=pdf_renderer.timeout,
+        )
+    except TimeoutError:
+        raise pdf_renderer.timeout_error()
+    return StreamingResponse(chunks, media_type="application/pdf", headers=headers)
 
 @router.post("/patients/{patient_id}", response_model=ReportResponse, status_code=201)
 def create_report(
     patient_id: int,
     report_data: ReportCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_doctor),
     db: Session = Depends(get_db)
 ):
@@ -145,6 +195,11 @@ def create_report(
     db.commit()
     db.refresh(report)
     
+    # Render the PDF after the response is sent so the first download is a file read
+    background_tasks.add_task(
+        prerender_report_pdf, report.id, _report_render_data(report), patient.user.name, current_user.name
+    )
+    
     return {
         **report.__dict__,
         "patient_name": patient.user.name,
@@ -1,59 +1,164 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Dict, Any
-from database import get_db
+from typing import List, Dict, Any, Optional
+from database import SessionLocal
 from models.doctor import Doctor
 from models.health_tip import HealthTip
 from models.faq import FAQ
 from models.user import User
 from auth.utils import get_current_user
+from config import settings
+from services import write_versions
+from services.text_fold import SQLITE_FUNCTION_NAME, fold
+from services.tinylfu import TinyLFUCache
 
 router = APIRouter(
     prefix="/search",
     tags=["search"]
 )
 
+# Sections run concurrently; each one uses its own session because
+# SQLAlchemy sessions must not be shared between threads.
+_executor = ThreadPoolExecutor(max_workers=settings.SEARCH_WORKERS, thread_name_prefix="search")
+
+# SQLite virtual machine instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 1000
+
+def _folded_match(db: Session, q: str, *columns):
+    """Match a folded query (see normalize_query) against the folded columns."""
+    if db.get_bind().dialect.name == "sqlite":
+        fold_column = getattr(func, SQLITE_FUNCTION_NAME)
+    else:
+        fold_column = lambda column: func.lower(func.unaccent(column))
+    return or_(*(fold_column(column).like(f"%{q}%") for column in columns))
+
+def _search_doctors(db: Session, q: str) -> List[Dict[str, Any]]:
+    """Search doctors by name or specialization."""
+    rows = db.query(Doctor.id, User.name, Doctor.specialization, Doctor.city).join(
+        User, Doctor.user_id == User.id
+    ).filter(
+        _folded_match(db, q, User.name, Doctor.specialization)
+    ).limit(5).all()
+    return [
+        {"id": id, "name": name, "specialization": specialization, "city": city}
+        for id, name, specialization, city in rows
+    ]
+
+def _search_health_tips(db: Session, q: str) -> List[Dict[str, Any]]:
+    """Search health tips by title or content."""
+    rows = db.query(HealthTip.id, HealthTip.title, HealthTip.category).filter(
+        _folded_match(db, q, HealthTip.title, HealthTip.content)
+    ).limit(5).all()
+    return [
+        {"id": id, "title": title, "category": category.value}
+        for id, title, category in rows
+    ]
+
+def _search_faqs(db: Session, q: str) -> List[Dict[str, Any]]:
+    """Search FAQs by question or answer."""
+    rows = db.query(FAQ.id, FAQ.question).filter(
+        _folded_match(db, q, FAQ.question, FAQ.answer)
+    ).limit(5).all()
+    return [{"id": id, "question": question} for id, question in rows]
+
+@contextmanager
+def _statement_deadline(db: Session, seconds: float):
+    """
+    Abort the session's queries once the budget is used up: SQLite checks a
+    deadline from a progress handler, PostgreSQL gets a statement_timeout.
+    Either way the database stops working and raises OperationalError.
+    """
+    connection = db.connection()
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        dbapi_connection = connection.connection.dbapi_connection
+        deadline = time.monotonic() + seconds
+        dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+        try:
+            yield
+        finally:
+            dbapi_connection.set_progress_handler(None, 0)
+    else:
+        if dialect == "postgresql":
+            # Reset when the session's transaction ends
+            db.execute(text(f"SET LOCAL statement_timeout = {max(1, int(seconds * 1000))}"))
+        yield
+
+def _run_section(search, q: str, budget: float) -> Optional[List[Dict[str, Any]]]:
+    """
+    Run one section in a worker thread; None if it missed its budget.
+    The budget starts when the section starts running, not when it was queued.
+    """
+    db = SessionLocal()
+    try:
+        with _statement_deadline(db, budget):
+            return search(db, q)
+    except OperationalError:
+        return None
+    finally:
+        db.close()
+
+# Results are cached per folded query and invalidated by any committed write
+# to the searched models.
+write_versions.track("search", Doctor, User, HealthTip, FAQ)
+search_cache = TinyLFUCache(settings.SEARCH_CACHE_SIZE)
+
+def normalize_query(q: str) -> str:
+    """
+    Normalize a search query: trimmed, whitespace collapsed, case-folded and
+    with diacritics removed ("  Ernährung " -> "ernahrung"). The result is both
+    the cache key and what the sections match against the columns folded the
+    same way, so variants sharing a key always return the same rows.
+    """
+    return fold(" ".join(q.split()))
+
+# Section name -> (search function, time budget in seconds)
+SECTIONS = {
+    "doctors": (_search_doctors, settings.SEARCH_DOCTORS_TIMEOUT_MS / 1000),
+    "health_tips": (_search_health_tips, settings.SEARCH_HEALTH_TIPS_TIMEOUT_MS / 1000),
+    "faqs": (_search_faqs, settings.SEARCH_FAQS_TIMEOUT_MS / 1000),
+}
+
 @router.get("/", response_model=Dict[str, List[Any]])
 def global_search(
     q: str = Query(..., min_length=3),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Global search across Doctors, Health Tips, and FAQs.
+    
+    The sections run concurrently, each with its own time budget enforced by
+    the database. Sections that miss their budget come back empty and are
+    listed under "incomplete".
+    Complete results are cached per folded query, so spelling variants that
+    only differ in case, spacing or diacritics share one entry.
     """
-    results = {
-        "doctors": [],
-        "health_tips": [],
-        "faqs": []
+    q = key = normalize_query(q)
+    version = write_versions.current("search")
+    cached = search_cache.get(key, is_valid=lambda entry: entry[0] == version)
+    if cached is not None:
+        return cached[1]
+    
+    futures = {
+        name: _executor.submit(_run_section, search, q, budget)
+        for name, (search, budget) in SECTIONS.items()
     }
-
-    # Search Doctors
-    doctors = db.query(Doctor).filter(
-        or_(
-            Doctor.name.ilike(f"%{q}%"),
-            Doctor.specialty.ilike(f"%{q}%")
-        )
-    ).limit(5).all()
-    results["doctors"] = doctors
-
-    # Search Health Tips
-    tips = db.query(HealthTip).filter(
-        or_(
-            HealthTip.title.ilike(f"%{q}%"),
-            HealthTip.content.ilike(f"%{q}%")
-        )
-    ).limit(5).all()
-    results["health_tips"] = tips
-
-    # Search FAQs
-    faqs = db.query(FAQ).filter(
-        or_(
-            FAQ.question.ilike(f"%{q}%"),
-            FAQ.answer.ilike(f"%{q}%")
-        )
-    ).limit(5).all()
-    results["faqs"] = faqs
-
+    
+    results = {"incomplete": []}
+    for name, future in futures.items():
+        # Bounded by the section's budget once it runs; the database aborts it
+        section = future.result()
+        if section is None:
+            results[name] = []
+            results["incomplete"].append(name)
+        else:
+            results[name] = section
+    
+    if not results["incomplete"]:
+        search_cache.put(key, (version, results))
     return results
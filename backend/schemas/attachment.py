@@ -0,0 +1,32 @@
+"""Pydantic schemas for report and lab result attachments."""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class AttachmentCreate(BaseModel):
+    """Schema for starting an attachment upload."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., ge=0, description="Total file size in bytes")
+    content_type: Optional[str] = None
+    chunk_size: Optional[int] = Field(None, gt=0, description="Bytes per chunk (server default if omitted)")
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$", description="Checksum of the whole file")
+
+class AttachmentResponse(BaseModel):
+    """Schema for attachment response, including the upload state."""
+    id: int
+    report_id: Optional[int]
+    lab_result_id: Optional[int]
+    filename: str
+    content_type: str
+    size: int
+    chunk_size: int
+    received_bytes: int
+    total_chunks: int
+    next_chunk: Optional[int]  # Chunk index to upload next; None once complete
+    sha256: Optional[str]
+    status: str
+    created_at: datetime
+    completed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 """Pydantic schemas for doctor-related endpoints."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class DoctorBase(BaseModel):
     """Base schema for doctor information."""
@@ -20,3 +20,18 @@ class DoctorResponse(DoctorBase):
     
     class Config:
         from_attributes = True
+
+class DoctorNearbyResponse(DoctorResponse):
+    """Schema for a doctor returned by proximity search."""
+    distance_km: float
+
+class FacetCount(BaseModel):
+    """Schema for a single facet value and its number of matches."""
+    value: str
+    count: int
+
+class DoctorFacets(BaseModel):
+    """Schema for doctor directory totals and facet counts."""
+    total: int
+    specialization: List[FacetCount]
+    city: List[FacetCount]
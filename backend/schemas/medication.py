@@ -0,0 +1,80 @@
+"""Pydantic schemas for medication intakes and adherence."""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+
+from models.medication_intake import IntakeStatus
+from schemas.prescription import MedicationResponse
+
+# Intakes accepted per sync request
+MAX_SYNC_INTAKES = 1000
+
+class ActiveMedicationResponse(MedicationResponse):
+    """A medication the patient takes today."""
+    doctor_name: Optional[str] = None
+    doses_today: List[str] = []  # "HH:MM" planned for today; empty if today is no dosing day or unknown
+
+class IntakeSyncItem(BaseModel):
+    """One intake recorded on a client, identified by the client's own id."""
+    client_id: str = Field(..., min_length=1, max_length=64)
+    medication_id: int
+    planned_datetime: datetime
+    status: IntakeStatus
+    recorded_at: Optional[datetime] = None  # When the patient marked it; defaults to the sync time
+
+class IntakeSyncRequest(BaseModel):
+    """Batch of intakes to sync."""
+    intakes: List[IntakeSyncItem] = Field(..., max_length=MAX_SYNC_INTAKES)
+
+class IntakeSyncRejection(BaseModel):
+    """An intake that was not stored."""
+    client_id: str
+    error: str
+
+class IntakeSyncResponse(BaseModel):
+    """Outcome of an intake sync; resending the same batch reports everything as unchanged."""
+    received: int
+    created: int
+    updated: int
+    unchanged: int
+    rejected: List[IntakeSyncRejection]
+
+class AdherenceDay(BaseModel):
+    """Planned and recorded doses of one medication on one day."""
+    day: date
+    planned: Optional[int] = None  # None if the frequency description could not be parsed
+    taken: int
+    missed: int
+    adherence_rate: Optional[float] = None
+
+class MedicationAdherenceResponse(BaseModel):
+    """Adherence of one medication over a date range (days without planned or recorded doses are omitted)."""
+    medication_id: int
+    name: str
+    date_from: date
+    date_to: date
+    planned: Optional[int] = None
+    taken: int
+    missed: int
+    adherence_rate: Optional[float] = None
+    days: List[AdherenceDay]
+
+class MedicationAdherenceTotals(BaseModel):
+    """Adherence totals of one medication."""
+    medication_id: int
+    name: str
+    planned: Optional[int] = None
+    taken: int
+    missed: int
+    adherence_rate: Optional[float] = None
+
+class PatientAdherenceSummary(BaseModel):
+    """Adherence of all of a patient's medications over a date range."""
+    patient_id: int
+    date_from: date
+    date_to: date
+    planned: Optional[int] = None  # Sum over the medications with a parsed schedule
+    taken: int
+    missed: int
+    adherence_rate: Optional[float] = None
+    medications: List[MedicationAdherenceTotals]
@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from models.notification import NotificationType
+from models.user import UserRole
 
 class NotificationBase(BaseModel):
     title: str
@@ -19,3 +20,22 @@ class Notification(NotificationBase):
 
     class Config:
         from_attributes = True
+
+class NotificationBroadcast(NotificationBase):
+    """Notification for all users of a role or for a list of user ids (one of both)."""
+    role: Optional[UserRole] = None
+    user_ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    background: bool = False  # Run as a job and return its progress immediately
+    system: bool = False  # Any recipients, not only the doctor's patients (broadcast admins only)
+
+class BroadcastJob(BaseModel):
+    id: str
+    status: str  # pending, running, completed, failed
+    total: int  # Recipients
+    processed: int  # Notifications created so far
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -12,10 +12,18 @@ class MedicationBase(BaseModel):
     end_date: Optional[date] = None
     notes: Optional[str] = None
 
+class DosingSchedule(BaseModel):
+    """Structured schedule parsed from frequency_description."""
+    times: List[str]  # "HH:MM" dose times of a dosing day
+    interval_days: int = 1  # Every n-th day from start_date
+    weekdays: Optional[List[int]] = None  # 0 = Monday; None for every day
+    as_needed: bool = False  # "bei Bedarf": no planned doses
+
 class MedicationResponse(MedicationBase):
     """Schema for medication response."""
     id: int
     prescription_id: int
+    schedule: Optional[DosingSchedule] = None
     
     class Config:
         from_attributes = True
@@ -26,6 +34,14 @@ class PrescriptionCreate(BaseModel):
     description: Optional[str] = None
     medications: List[MedicationBase]
 
+class InteractionWarning(BaseModel):
+    """Known interaction between a new medication and another active medication of the patient."""
+    medication: str
+    interacting_medication: str
+    interacting_prescription_id: Optional[int] = None  # None if part of the same prescription
+    severity: str  # contraindicated, major, moderate or minor
+    description: str
+
 class PrescriptionResponse(BaseModel):
     """Schema for prescription response."""
     id: int
@@ -39,5 +55,8 @@ class PrescriptionResponse(BaseModel):
     patient_name: Optional[str] = None
     doctor_name: Optional[str] = None
     
+    # Only set when the prescription is created
+    interaction_warnings: List[InteractionWarning] = []
+    
     class Config:
         from_attributes = True
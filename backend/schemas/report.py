@@ -1,6 +1,6 @@
 """Pydantic schemas for reports and lab results."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
 
 class ReportCreate(BaseModel):
@@ -47,9 +47,51 @@ class LabResultResponse(BaseModel):
     date: date
     file_path: Optional[str]
     
+    # Parsed numeric values (None when not numeric)
+    value_num: Optional[float] = None
+    range_low: Optional[float] = None
+    range_high: Optional[float] = None
+    
     # Related data
     patient_name: Optional[str] = None
     doctor_name: Optional[str] = None
     
     class Config:
         from_attributes = True
+
+class LabSeriesPoint(BaseModel):
+    """One point of a lab value time series."""
+    date: date
+    value: float
+    rolling_mean: float
+    range_low: Optional[float] = None
+    range_high: Optional[float] = None
+    out_of_range: bool
+
+class LabSeriesResponse(BaseModel):
+    """Schema for a lab value time series with summary statistics."""
+    test_name: str
+    unit: Optional[str] = None
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    below_range_count: int
+    above_range_count: int
+    out_of_range_count: int
+    window: int
+    downsampled: bool
+    points: List[LabSeriesPoint]
+
+class LabResultImportError(BaseModel):
+    """A row that could not be imported (row is the line number in the upload)."""
+    row: int
+    error: str
+
+class LabResultImportResponse(BaseModel):
+    """Schema for the result of a bulk lab result import."""
+    received: int
+    imported: int
+    failed: int
+    errors: List[LabResultImportError]
+    errors_truncated: bool
@@ -0,0 +1 @@
+"""Services package initialization - shared application logic used by routers."""
@@ -0,0 +1,98 @@
+"""Daily medication adherence rollups.
+
+medication_adherence_days holds the taken/missed counts per (medication, day)
+so adherence over a date range reads one row per day instead of every intake.
+The rollups are maintained incrementally in the transaction that writes the
+intakes: ORM flushes of MedicationIntake are turned into per-day count deltas
+and applied with one INSERT ... ON CONFLICT DO UPDATE executemany.
+
+Writers that insert intakes with Core statements bypass the flush hook and
+must call ``apply_deltas`` themselves (see ``intake_deltas``).
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.medication import Medication
+from models.medication_adherence_day import MedicationAdherenceDay
+from models.medication_intake import IntakeStatus, MedicationIntake
+from services.session_state import maintain_deltas, previous_value
+from services.upsert import upsert_insert
+
+# (medication id, day) -> [taken delta, missed delta]
+Deltas = Dict[Tuple[int, date], List[int]]
+
+def adherence_rate(taken: int, missed: int) -> Optional[float]:
+    """Share of recorded doses that were taken; None without any recorded dose."""
+    recorded = taken + missed
+    return round(taken / recorded, 4) if recorded else None
+
+def add_delta(deltas: Deltas, medication_id: int, planned_datetime: datetime, status, sign: int) -> None:
+    """Count (sign=1) or uncount (sign=-1) one intake."""
+    counts = deltas[(medication_id, planned_datetime.date())]
+    counts[0 if IntakeStatus(status) == IntakeStatus.TAKEN else 1] += sign
+
+def intake_deltas(changes: Iterable[Tuple[int, datetime, str, int]]) -> Deltas:
+    """Deltas for (medication id, planned datetime, status, sign) changes."""
+    deltas = _new_deltas()
+    for medication_id, planned_datetime, status, sign in changes:
+        add_delta(deltas, medication_id, planned_datetime, status, sign)
+    return deltas
+
+def apply_deltas(connection, deltas: Deltas) -> None:
+    """Add the deltas to the rollup rows, creating missing rows, in one statement."""
+    rows = [
+        {"medication_id": medication_id, "day": day, "taken": taken, "missed": missed}
+        for (medication_id, day), (taken, missed) in deltas.items()
+        if taken or missed
+    ]
+    if not rows:
+        return
+    table = MedicationAdherenceDay.__table__
+    statement = upsert_insert(connection, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.medication_id, table.c.day],
+        set_={
+            "taken": table.c.taken + statement.excluded.taken,
+            "missed": table.c.missed + statement.excluded.missed,
+        }
+    )
+    connection.execute(statement, rows)
+
+def _new_deltas() -> Deltas:
+    return defaultdict(lambda: [0, 0])
+
+def _uncount_changed_intakes(session: Session, deltas: Deltas) -> None:
+    # Previous values are only available before the flush; new values (and ids
+    # assigned through relationships) only after it
+    deleted_medications = {
+        instance.id for instance in session.deleted if isinstance(instance, Medication)
+    }
+    for instance in session.dirty:
+        if isinstance(instance, MedicationIntake) and session.is_modified(instance):
+            add_delta(
+                deltas,
+                previous_value(instance, "medication_id"),
+                previous_value(instance, "planned_datetime"),
+                previous_value(instance, "status"),
+                -1
+            )
+    for instance in session.deleted:
+        # Rollups of deleted medications are deleted with them
+        if isinstance(instance, MedicationIntake) and instance.medication_id not in deleted_medications:
+            add_delta(
+                deltas,
+                previous_value(instance, "medication_id"),
+                previous_value(instance, "planned_datetime"),
+                previous_value(instance, "status"),
+                -1
+            )
+
+def _count_flushed_intakes(session: Session, deltas: Deltas) -> None:
+    for instance in list(session.new) + list(session.dirty):
+        if isinstance(instance, MedicationIntake) and session.is_modified(instance):
+            add_delta(deltas, instance.medication_id, instance.planned_datetime, instance.status, 1)
+
+maintain_deltas("adherence_deltas", _new_deltas, _uncount_changed_intakes, _count_flushed_intakes, apply_deltas)
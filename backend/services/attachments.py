@@ -0,0 +1,162 @@
+"""Chunked, resumable attachment uploads and ranged downloads.
+
+Uploads are append-only: chunk n is accepted only once chunks 0..n-1 have
+arrived, so the server state is a single byte offset (``received_bytes``) and
+a client that lost its connection asks for ``next_chunk`` and carries on.
+Each chunk is streamed from the request body straight into the partial file
+while its SHA-256 is computed; a chunk whose length or checksum does not match
+is cut off again and has to be re-sent. Nothing larger than one network read
+is held in memory.
+
+Downloads honour single HTTP byte ranges and read the file through a
+read-only memory map, handing out one block-sized slice at a time, so only
+the requested part of the file is ever paged in.
+"""
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import weakref
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Bytes handed to the response per iteration when serving a file
+DOWNLOAD_BLOCK_SIZE = 256 * 1024
+
+class AttachmentStore:
+    """Files of attachments on local disk: <id>.part while uploading, <id>.bin when complete."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # One upload per attachment at a time within this process
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def part_path(self, attachment_id: int) -> str:
+        return os.path.join(self.directory, f"{attachment_id}.part")
+
+    def path(self, attachment_id: int) -> str:
+        return os.path.join(self.directory, f"{attachment_id}.bin")
+
+    def lock(self, attachment_id: int) -> asyncio.Lock:
+        lock = self._locks.get(attachment_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[attachment_id] = lock
+        return lock
+
+    def create(self, attachment_id: int) -> None:
+        """Create the empty partial file for a new upload."""
+        os.makedirs(self.directory, exist_ok=True)
+        open(self.part_path(attachment_id), "wb").close()
+
+    async def receive_chunk(
+        self,
+        attachment_id: int,
+        offset: int,
+        length: int,
+        checksum: str,
+        body: AsyncIterator[bytes],
+    ) -> None:
+        """
+        Stream one chunk from body into the partial file at offset.
+
+        Raises HTTPException (400) if the chunk is longer or shorter than length
+        or its SHA-256 differs from checksum; the partial file is then truncated
+        back to offset so the chunk can simply be retried.
+        """
+        path = self.part_path(attachment_id)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload storage is missing")
+        digest = hashlib.sha256()
+        received = 0
+        file = await run_in_threadpool(open, path, "r+b")
+        try:
+            # Drop leftovers of an earlier failed attempt at this chunk
+            await run_in_threadpool(file.truncate, offset)
+            file.seek(offset)
+            async for data in body:
+                received += len(data)
+                if received > length:
+                    break
+                digest.update(data)
+                await run_in_threadpool(file.write, data)
+            await run_in_threadpool(file.flush)
+
+            if received != length:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Chunk must be exactly {length} bytes"
+                )
+            if digest.hexdigest() != checksum.lower():
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Chunk checksum mismatch")
+        except BaseException:
+            await run_in_threadpool(file.truncate, offset)
+            raise
+        finally:
+            file.close()
+
+    def file_sha256(self, attachment_id: int) -> str:
+        """SHA-256 of the partial file, read in blocks."""
+        digest = hashlib.sha256()
+        with open(self.part_path(attachment_id), "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def finish(self, attachment_id: int) -> None:
+        """Move a fully received upload to its final name."""
+        os.replace(self.part_path(attachment_id), self.path(attachment_id))
+
+    def delete(self, attachment_id: int) -> None:
+        for path in (self.part_path(attachment_id), self.path(attachment_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) byte range.
+
+    Returns None when the whole file should be sent (no header, a unit other
+    than bytes, or several ranges, which may be ignored per RFC 9110). Raises
+    HTTPException 416 for ranges outside the file.
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last n bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file from a read-only memory map."""
+    if end < start:
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = start
+        while position <= end:
+            stop = min(position + DOWNLOAD_BLOCK_SIZE, end + 1)
+            yield mapped[position:stop]
+            position = stop
+
+attachment_store = AttachmentStore(settings.ATTACHMENT_STORAGE_DIR)
@@ -0,0 +1,202 @@
+"""Versioned, precompressed JSON snapshots of health tips and FAQs.
+
+Content is read-mostly, so full lists are serialized once per content version
+and written next to gzip (and, when the ``brotli`` package is installed,
+brotli) variants. Endpoints then hand the file to ``FileResponse``, which
+streams it with sendfile instead of serializing rows on every request.
+
+The first snapshot is built at startup. Every request compares the snapshot's
+version with the current one and rebuilds it when they differ. The version
+combines a fingerprint read from the database (row count, highest id and
+newest created_at of each table), which also catches content written by other
+processes such as seed or admin scripts, with the in-process write counter of
+``services.write_versions``, which catches edits of existing rows made through
+this process. File names carry a content digest, which doubles as the ETag.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.health_tip import HealthTip, HealthTipCategory
+from models.faq import FAQ
+from services import write_versions
+
+try:
+    import brotli
+except ImportError:  # Optional: serve gzip/identity only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+write_versions.track("content", HealthTip, FAQ)
+
+# Encoding name -> file suffix, in server preference order
+_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+def _serialize_tip(tip: HealthTip) -> dict:
+    return {
+        "id": tip.id,
+        "title": tip.title,
+        "content": tip.content,
+        "category": tip.category.value,
+        "created_at": tip.created_at.isoformat(),
+    }
+
+def _serialize_faq(faq: FAQ) -> dict:
+    return {
+        "id": faq.id,
+        "question": faq.question,
+        "answer": faq.answer,
+        "created_at": faq.created_at.isoformat(),
+    }
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """Parse an Accept-Encoding header into the set of acceptable codings."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+def content_version(db: Session) -> Hashable:
+    """Current content version: in-process write counter and database fingerprint."""
+    fingerprint = db.execute(select(*(
+        select(aggregate).scalar_subquery()
+        for model in (HealthTip, FAQ)
+        for aggregate in (func.count(model.id), func.max(model.id), func.max(model.created_at))
+    ))).one()
+    return (write_versions.current("content"), tuple(fingerprint))
+
+class ContentSnapshot:
+    """One built snapshot: per-list file paths, ETags and row counts."""
+    
+    def __init__(self, version: Hashable, files: Dict[str, str], etags: Dict[str, str], counts: Dict[str, int]):
+        self.version = version
+        self.files = files
+        self.etags = etags
+        self.counts = counts
+    
+    def is_available(self) -> bool:
+        return all(os.path.exists(path) for path in self.files.values())
+    
+    def response(self, name: str, request: Request) -> Response:
+        """Serve a snapshot list, honoring If-None-Match and Accept-Encoding."""
+        etag = f'"{self.etags[name]}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        
+        path = self.files[name]
+        accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+        for encoding, suffix in _ENCODINGS:
+            if encoding in accepted and os.path.exists(path + suffix):
+                headers["Content-Encoding"] = encoding
+                path = path + suffix
+                break
+        return FileResponse(path, media_type="application/json", headers=headers)
+
+class ContentSnapshotStore:
+    """Builds and hands out the snapshot for the current content version."""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._snapshot: Optional[ContentSnapshot] = None
+        self._lock = threading.Lock()
+    
+    def warm(self) -> None:
+        """Build the initial snapshot (at startup, so no request has to wait for it)."""
+        try:
+            with self._lock:
+                self._snapshot = self.build()
+        except Exception:
+            logger.exception("Building the content snapshot failed; it is built on the next request")
+    
+    def current(self, db: Session) -> ContentSnapshot:
+        """Return a snapshot for the current content version, rebuilding if stale."""
+        version = content_version(db)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version and snapshot.is_available():
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version or not snapshot.is_available():
+                snapshot = self._snapshot = self.build()
+            return snapshot
+    
+    def build(self) -> ContentSnapshot:
+        """Serialize all health tips and FAQs and write compressed variants."""
+        db = SessionLocal()
+        try:
+            # Read the version first: a write committed during the build leaves the
+            # snapshot one version behind, so the next request rebuilds it.
+            version = content_version(db)
+            tips = db.query(HealthTip).order_by(HealthTip.created_at.desc()).all()
+            faqs = db.query(FAQ).order_by(FAQ.created_at.desc()).all()
+            lists = {
+                "health_tips": [_serialize_tip(tip) for tip in tips],
+                "faq": [_serialize_faq(faq) for faq in faqs],
+            }
+            for category in HealthTipCategory:
+                lists[f"health_tips.{category.name.lower()}"] = [
+                    _serialize_tip(tip) for tip in tips if tip.category == category
+                ]
+        finally:
+            db.close()
+        
+        os.makedirs(self.directory, exist_ok=True)
+        files, etags, counts = {}, {}, {}
+        for name, rows in lists.items():
+            body = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            digest = hashlib.sha256(body).hexdigest()[:16]
+            path = os.path.join(self.directory, f"{name}-{digest}.json")
+            if not os.path.exists(path):
+                _write_atomic(path + ".gz", gzip.compress(body, compresslevel=9))
+                if brotli is not None:
+                    _write_atomic(path + ".br", brotli.compress(body, quality=11))
+                _write_atomic(path, body)
+            files[name] = path
+            etags[name] = digest
+            counts[name] = len(rows)
+        
+        self._remove_stale_files(set(files.values()))
+        return ContentSnapshot(version, files, etags, counts)
+    
+    def _remove_stale_files(self, keep: set) -> None:
+        for path in glob.glob(os.path.join(self.directory, "*.json*")):
+            base = path
+            for _, suffix in _ENCODINGS:
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            if base not in keep and not path.endswith(".tmp"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+content_snapshots = ContentSnapshotStore(settings.CONTENT_SNAPSHOT_DIR)
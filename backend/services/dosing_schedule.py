@@ -0,0 +1,236 @@
+"""Structured dosing schedules parsed from medication frequency descriptions.
+
+Prescriptions describe the frequency as free text ("3x täglich", "morgens und
+abends", "1-0-1", "alle 8 Stunden", "jeden zweiten Tag", "Mo, Mi, Fr").
+``parse_frequency`` turns it into a schedule:
+
+    {"times": ["08:00", "20:00"], "interval_days": 1, "weekdays": None, "as_needed": False}
+
+times are the dose times of a dosing day, interval_days > 1 means every n-th
+day counted from the start date, weekdays (0 = Monday) restricts dosing to
+those days, and as_needed ("bei Bedarf") has no planned doses. Text that
+cannot be understood gives None. Results are cached per distinct string;
+prescriptions reuse a small set of phrasings.
+
+The schedule is stored with the medication; ``expand_planned_doses`` and
+``planned_doses_per_day`` turn it into planned doses for a date range with
+NumPy array operations instead of a Python loop over days.
+"""
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Default dose times for "n x täglich" without further detail
+DEFAULT_TIMES = {
+    1: ("08:00",),
+    2: ("08:00", "20:00"),
+    3: ("08:00", "14:00", "20:00"),
+    4: ("08:00", "12:00", "16:00", "20:00"),
+}
+# Positions of the German dosing schema morgens-mittags-abends(-nachts), e.g. "1-0-1"
+SCHEMA_TIMES = ("08:00", "12:00", "20:00", "22:00")
+TIME_OF_DAY = {
+    "früh": "08:00",
+    "morgens": "08:00",
+    "vormittags": "10:00",
+    "mittags": "12:00",
+    "nachmittags": "16:00",
+    "abends": "20:00",
+    "nachts": "22:00",
+    "zur nacht": "22:00",
+    "zum schlafengehen": "22:00",
+}
+WEEKDAYS = {
+    "montag": 0, "dienstag": 1, "mittwoch": 2, "donnerstag": 3, "freitag": 4, "samstag": 5, "sonntag": 6,
+}
+WEEKDAY_ABBREVIATIONS = {"mo": 0, "di": 1, "mi": 2, "do": 3, "fr": 4, "sa": 5, "so": 6}
+# Spread of "n x wöchentlich" without named days
+DEFAULT_WEEKDAYS = {2: (0, 3), 3: (0, 2, 4), 4: (0, 1, 3, 4), 5: (0, 1, 2, 3, 4), 6: (0, 1, 2, 3, 4, 5)}
+NUMBER_WORDS = {
+    "ein": 1, "eine": 1, "einen": 1, "zwei": 2, "drei": 3, "vier": 4, "fünf": 5, "sechs": 6,
+    "zweiten": 2, "dritten": 3, "vierten": 4,
+}
+
+_COUNT = r"(\d+|ein|zwei|drei|vier|fünf|sechs)"
+_AMOUNT = r"(\d+(?:[.,/]\d+)?|½|¼|¾)"
+_SCHEMA_PATTERN = re.compile(rf"(?<![\d.,/]){_AMOUNT}\s*-\s*{_AMOUNT}\s*-\s*{_AMOUNT}(?:\s*-\s*{_AMOUNT})?(?![\d.,/])")
+_CLOCK_PATTERN = re.compile(r"\b([01]?\d|2[0-3])(?::([0-5]\d))?\s*uhr\b|\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_TIME_OF_DAY_PATTERN = re.compile(r"\b(" + "|".join(sorted(TIME_OF_DAY, key=len, reverse=True)) + r")\b")
+_DAILY_PATTERN = re.compile(rf"\b{_COUNT}\s*(?:x|-?mal)\s*(?:täglich|tgl\.?|am tag|pro tag|/\s*tag|tag)")
+_WEEKLY_PATTERN = re.compile(rf"\b{_COUNT}\s*(?:x|-?mal)\s*(?:wöchentlich|pro woche|in der woche|die woche|/\s*woche)")
+_HOURLY_PATTERN = re.compile(r"\balle\s+(\d+)\s*(?:stunden|std\.?|h)\b")
+_INTERVAL_PATTERN = re.compile(r"\b(?:alle\s+(\d+|zwei|drei|vier)\s+tage|jeden\s+(\d+)\.\s*tag|jeden\s+(zweiten|dritten|vierten)\s+tag)\b")
+_WORD_PATTERN = re.compile(r"[a-zäöüß]+")
+
+def _number(text: str) -> int:
+    return int(text) if text.isdigit() else NUMBER_WORDS[text]
+
+def _amount_is_zero(text: str) -> bool:
+    return text not in "½¼¾" and float(text.replace(",", ".").split("/")[0]) == 0
+
+def _weekdays(text: str) -> Optional[Tuple[int, ...]]:
+    words = _WORD_PATTERN.findall(text)
+    days = set()
+    for word in words:
+        stem = word[:-1] if word.endswith("s") else word
+        if stem in WEEKDAYS:
+            days.add(WEEKDAYS[stem])
+    # Abbreviations ("Mo, Mi, Fr") are common words too ("so"); only lists of them count
+    abbreviations = {WEEKDAY_ABBREVIATIONS[word] for word in words if word in WEEKDAY_ABBREVIATIONS}
+    if len(abbreviations) >= 2:
+        days |= abbreviations
+    return tuple(sorted(days)) or None
+
+def _times(text: str, per_day: Optional[int]) -> Tuple[str, ...]:
+    """Dose times of a dosing day; empty if the text names none and gives no count."""
+    clock_times = [
+        f"{int(match.group(1) or match.group(3)):02d}:{int(match.group(2) or match.group(4) or 0):02d}"
+        for match in _CLOCK_PATTERN.finditer(text)
+    ]
+    if clock_times:
+        return tuple(sorted(set(clock_times)))
+
+    schema = _SCHEMA_PATTERN.search(text)
+    if schema:
+        return tuple(
+            time for time, amount in zip(SCHEMA_TIMES, schema.groups())
+            if amount is not None and not _amount_is_zero(amount)
+        )
+
+    named = tuple(sorted({TIME_OF_DAY[word] for word in _TIME_OF_DAY_PATTERN.findall(text)}))
+    if named and (per_day is None or len(named) == per_day):
+        return named
+
+    hourly = _HOURLY_PATTERN.search(text)
+    if hourly and per_day is None:
+        hours = int(hourly.group(1))
+        if 1 <= hours <= 24:
+            return tuple(sorted(f"{(8 + hours * index) % 24:02d}:00" for index in range(24 // hours)))
+
+    if per_day:
+        if per_day in DEFAULT_TIMES:
+            return DEFAULT_TIMES[per_day]
+        # Spread evenly between 08:00 and 20:00
+        return tuple(f"{8 + (12 * index) // (per_day - 1):02d}:00" for index in range(per_day))
+    return named
+
+@lru_cache(maxsize=2048)
+def _parse(text: str) -> Optional[Tuple[Tuple[str, ...], int, Optional[Tuple[int, ...]], bool]]:
+    if "bei bedarf" in text or "nach bedarf" in text:
+        return (), 1, None, True
+
+    daily = _DAILY_PATTERN.search(text)
+    per_day = _number(daily.group(1)) if daily else None
+    if per_day is not None and not 1 <= per_day <= 24:
+        return None
+
+    interval_days = 1
+    interval = _INTERVAL_PATTERN.search(text)
+    if interval:
+        interval_days = _number(next(group for group in interval.groups() if group))
+
+    weekdays = _weekdays(text)
+    weekly = _WEEKLY_PATTERN.search(text)
+    if weekly or re.search(r"\bwöchentlich\b|\beinmal pro woche\b", text):
+        per_week = _number(weekly.group(1)) if weekly else 1
+        if not weekdays:
+            if per_week == 1:
+                interval_days = 7
+            elif per_week in DEFAULT_WEEKDAYS:
+                weekdays = DEFAULT_WEEKDAYS[per_week]
+            else:
+                return None
+
+    times = _times(text, per_day)
+    if not times:
+        # "täglich", "jeden zweiten Tag" or named days without times: one dose in the morning
+        if per_day is None and (re.search(r"\btäglich\b", text) or interval or weekly or weekdays or interval_days > 1):
+            times = DEFAULT_TIMES[1]
+        else:
+            return None
+    return times, max(interval_days, 1), weekdays, False
+
+def parse_frequency(frequency_description: Optional[str]) -> Optional[dict]:
+    """Parse a frequency description into a schedule dict, or None if it cannot be understood."""
+    if not frequency_description:
+        return None
+    parsed = _parse(" ".join(frequency_description.lower().split()))
+    if parsed is None:
+        return None
+    times, interval_days, weekdays, as_needed = parsed
+    # A fresh dict per call: the cached tuple must not be shared with mutable JSON values
+    return {
+        "times": list(times),
+        "interval_days": interval_days,
+        "weekdays": list(weekdays) if weekdays else None,
+        "as_needed": as_needed,
+    }
+
+def _dosing_days(schedule: dict, date_from: date, date_to: date, anchor: Optional[date]) -> np.ndarray:
+    """Dosing days in [date_from, date_to] as datetime64[D]."""
+    if date_from > date_to:
+        return np.array([], dtype="datetime64[D]")
+    days = np.arange(np.datetime64(date_from, "D"), np.datetime64(date_to, "D") + 1)
+    mask = np.ones(days.size, dtype=bool)
+    interval_days = schedule.get("interval_days") or 1
+    if interval_days > 1:
+        offsets = (days - np.datetime64(anchor or date_from, "D")).astype(np.int64)
+        mask &= offsets % interval_days == 0
+    if schedule.get("weekdays"):
+        # 1970-01-01 (day 0) was a Thursday; shift so that Monday is 0
+        mask &= np.isin((days.astype(np.int64) + 3) % 7, schedule["weekdays"])
+    return days[mask]
+
+def _clip(date_from: date, date_to: date, start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    return max(date_from, start_date or date_from), min(date_to, end_date or date_to)
+
+def expand_planned_doses(
+    schedule: Optional[dict],
+    date_from: date,
+    date_to: date,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> np.ndarray:
+    """
+    Planned dose times (datetime64[m], ascending) in [date_from, date_to],
+    limited to the medication's start/end dates.
+    """
+    if not schedule or schedule.get("as_needed") or not schedule.get("times"):
+        return np.array([], dtype="datetime64[m]")
+    first, last = _clip(date_from, date_to, start_date, end_date)
+    days = _dosing_days(schedule, first, last, start_date).astype("datetime64[m]")
+    minutes = np.array(
+        [int(time[:2]) * 60 + int(time[3:5]) for time in schedule["times"]], dtype="timedelta64[m]"
+    )
+    return (days[:, None] + minutes[None, :]).ravel()
+
+def planned_doses_per_day(
+    schedule: Optional[dict],
+    date_from: date,
+    date_to: date,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[date, int]:
+    """Number of planned doses per dosing day in [date_from, date_to]."""
+    if not schedule or schedule.get("as_needed") or not schedule.get("times"):
+        return {}
+    first, last = _clip(date_from, date_to, start_date, end_date)
+    days = _dosing_days(schedule, first, last, start_date)
+    per_day = len(schedule["times"])
+    return dict.fromkeys(days.astype(object).tolist(), per_day)
+
+def planned_dose_count(
+    schedule: Optional[dict],
+    date_from: date,
+    date_to: date,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Optional[int]:
+    """Total planned doses in [date_from, date_to]; None without a usable schedule."""
+    if not schedule or schedule.get("as_needed"):
+        return None
+    first, last = _clip(date_from, date_to, start_date, end_date)
+    return int(_dosing_days(schedule, first, last, start_date).size) * len(schedule.get("times") or ())
@@ -0,0 +1,172 @@
+"""Offline geocoding and grid index for doctor proximity search.
+
+Coordinates come from a bundled CSV of German postcode centroids
+(``data/plz_centroids.csv``): the centroid of every five-digit postcode area
+(OpenDataSoft "georef-germany-postleitzahl", via the zipcode-coordinates
+package) with the place names of the postcode (GeoNames), one row per place.
+Postcodes missing from the table (e.g. PO box or bulk recipient codes) fall
+back to the longest known prefix; prefix centroids are the mean of the
+postcodes below them unless the file has an explicit row for the prefix.
+A city name resolves to the mean of its postcode centroids.
+
+If the table cannot be read, lookups find nothing and doctors are stored
+without coordinates instead of failing the write.
+
+Positions are bucketed into a fixed lat/lon grid. Cell ids are numbered row by
+row, so every grid row intersecting a search circle is one contiguous id range
+that an index on ``Doctor.geocell`` can answer directly.
+"""
+import csv
+import logging
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Grid resolution in degrees (~11 km north-south, ~7 km east-west in Germany)
+CELL_SIZE_DEG = 0.1
+GRID_COLUMNS = int(round(360 / CELL_SIZE_DEG))
+EARTH_RADIUS_KM = 6371.0
+
+_POSTCODE_PATTERN = re.compile(r"\b(\d{5})\b")
+
+def _mean(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    return (
+        round(sum(point[0] for point in points) / len(points), 4),
+        round(sum(point[1] for point in points) / len(points), 4),
+    )
+
+@lru_cache(maxsize=1)
+def _load_centroids() -> Tuple[Dict[str, Tuple[float, float]], Dict[str, Tuple[float, float]]]:
+    """Load postcode, prefix and city centroids from the bundled dataset (once per process)."""
+    by_postcode = {}
+    city_points = defaultdict(dict)  # city -> {postcode: point}
+    try:
+        with open(settings.PLZ_CENTROIDS_PATH, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                plz = row["plz"].strip()
+                point = (float(row["latitude"]), float(row["longitude"]))
+                by_postcode[plz] = point
+                city = row["city"].strip().lower()
+                if city:
+                    city_points[city][plz] = point
+    except (OSError, KeyError, ValueError, csv.Error):
+        logger.exception(
+            "Could not load postcode centroids from %s; doctors are stored without coordinates",
+            settings.PLZ_CENTROIDS_PATH
+        )
+        return {}, {}
+    
+    prefix_points = defaultdict(list)
+    for plz, point in by_postcode.items():
+        if len(plz) == 5:
+            for length in range(2, 5):
+                prefix_points[plz[:length]].append(point)
+    for prefix, points in prefix_points.items():
+        by_postcode.setdefault(prefix, _mean(points))
+    
+    by_city = {}
+    for city, points in city_points.items():
+        # Prefer full postcodes over coarser prefix rows of the same city
+        full = [point for plz, point in points.items() if len(plz) == 5]
+        by_city[city] = _mean(full or list(points.values()))
+    return by_postcode, by_city
+
+def centroids_available() -> bool:
+    """Whether the centroid table could be loaded."""
+    by_postcode, _ = _load_centroids()
+    return bool(by_postcode)
+
+def extract_postcode(address: Optional[str]) -> Optional[str]:
+    """Return the first five-digit postcode in an address string, if any."""
+    if not address:
+        return None
+    match = _POSTCODE_PATTERN.search(address)
+    return match.group(1) if match else None
+
+def lookup_postcode(plz: str) -> Optional[Tuple[float, float]]:
+    """Return (latitude, longitude) for a postcode using the longest known prefix."""
+    by_postcode, _ = _load_centroids()
+    for length in range(len(plz), 1, -1):
+        point = by_postcode.get(plz[:length])
+        if point:
+            return point
+    return None
+
+def lookup_city(city: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Return (latitude, longitude) for a city name from the dataset, if known."""
+    if not city:
+        return None
+    _, by_city = _load_centroids()
+    return by_city.get(city.strip().lower())
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """Return the grid cell id containing a coordinate."""
+    row = int(math.floor((latitude + 90) / CELL_SIZE_DEG))
+    column = int(math.floor((longitude + 180) / CELL_SIZE_DEG)) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+def cell_ranges(latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+    """
+    Return inclusive grid cell id ranges covering a circle's bounding box.
+    
+    There is one range per grid row; rows are contiguous id ranges, so each
+    range is a single index range scan.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # Widen by the cosine at the pole-ward edge so the box covers the whole circle
+    edge_lat = min(89.9, abs(latitude) + lat_delta)
+    lon_delta = min(180.0, lat_delta / max(math.cos(math.radians(edge_lat)), 1e-6))
+    
+    min_row = int(math.floor((max(-90.0, latitude - lat_delta) + 90) / CELL_SIZE_DEG))
+    max_row = int(math.floor((min(90.0, latitude + lat_delta) + 90) / CELL_SIZE_DEG))
+    min_col = int(math.floor((longitude - lon_delta + 180) / CELL_SIZE_DEG))
+    max_col = int(math.floor((longitude + lon_delta + 180) / CELL_SIZE_DEG))
+    
+    # Split column spans that cross the antimeridian
+    if max_col - min_col + 1 >= GRID_COLUMNS:
+        column_spans = [(0, GRID_COLUMNS - 1)]
+    elif min_col < 0:
+        column_spans = [(min_col + GRID_COLUMNS, GRID_COLUMNS - 1), (0, max_col)]
+    elif max_col >= GRID_COLUMNS:
+        column_spans = [(min_col, GRID_COLUMNS - 1), (0, max_col - GRID_COLUMNS)]
+    else:
+        column_spans = [(min_col, max_col)]
+    
+    ranges = []
+    for row in range(min_row, max_row + 1):
+        for first, last in column_spans:
+            ranges.append((row * GRID_COLUMNS + first, row * GRID_COLUMNS + last))
+    return ranges
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometers."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def geocode_doctor(doctor) -> None:
+    """
+    Fill a doctor's postcode, coordinates and grid cell from the clinic address.
+    Falls back to the city centroid when the address has no known postcode.
+    """
+    postal_code = extract_postcode(doctor.clinic_address)
+    point = lookup_postcode(postal_code) if postal_code else None
+    if point is None:
+        point = lookup_city(doctor.city)
+    
+    doctor.postal_code = postal_code
+    if point is None:
+        doctor.latitude = None
+        doctor.longitude = None
+        doctor.geocell = None
+    else:
+        doctor.latitude, doctor.longitude = point
+        doctor.geocell = grid_cell(*point)
@@ -0,0 +1,132 @@
+"""Batched, idempotent sync of medication intakes recorded by offline clients.
+
+Clients generate an id for every intake they record and resend whole batches
+until a sync succeeds. The batch is written with one INSERT ... ON CONFLICT
+(medication_id, client_id) DO UPDATE; the update only applies when the
+incoming record is newer (recorded_at), so retries of the same batch change
+nothing. RETURNING tells which rows were actually inserted or updated, and
+the adherence rollups are adjusted for exactly those in the same
+transaction (Core statements bypass the ORM flush hook in services.adherence).
+
+The deltas need each intake's previous state, which is read before the
+upsert. Syncs touching the same medications are therefore serialized: the
+medication rows are locked first, so a concurrent retry waits and then sees
+the rows this one wrote instead of applying the same change twice.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import tuple_, update
+from sqlalchemy.orm import Session
+
+from models.medication import Medication
+from models.medication_intake import MedicationIntake
+from models.prescription import Prescription
+from services.adherence import apply_deltas, intake_deltas
+from services.upsert import upsert_insert
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _lock_medications(db: Session, medication_ids: set) -> None:
+    """Hold the medications' rows locked until the transaction ends."""
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite has no row locks and ignores FOR UPDATE; any write takes the
+        # database write lock, which other writers wait for until commit
+        db.execute(
+            update(Medication.__table__).where(Medication.id.in_(medication_ids)).values(id=Medication.id)
+        )
+    else:
+        # In id order, so overlapping syncs cannot deadlock
+        db.query(Medication.id).filter(Medication.id.in_(medication_ids)).order_by(
+            Medication.id
+        ).with_for_update().all()
+
+def sync_intakes(db: Session, patient_id: int, items: list) -> dict:
+    """
+    Upsert a batch of client intakes for a patient and commit.
+
+    items are IntakeSyncItem models. Intakes for medications that are not the
+    patient's are rejected; for a client id sent twice the newest record wins.
+    """
+    medication_ids = {item.medication_id for item in items}
+    own_medications = {
+        medication_id for (medication_id,) in db.query(Medication.id).join(
+            Prescription, Medication.prescription_id == Prescription.id
+        ).filter(
+            Medication.id.in_(medication_ids),
+            Prescription.patient_id == patient_id
+        )
+    }
+
+    now = datetime.utcnow()
+    rejected = []
+    latest: Dict[Tuple[int, str], dict] = {}
+    for item in items:
+        if item.medication_id not in own_medications:
+            rejected.append({"client_id": item.client_id, "error": "Medication not found"})
+            continue
+        row = {
+            "client_id": item.client_id,
+            "medication_id": item.medication_id,
+            # Planned times are wall-clock times of the patient's schedule
+            "planned_datetime": item.planned_datetime.replace(tzinfo=None),
+            "status": item.status,
+            "recorded_at": _naive_utc(item.recorded_at) if item.recorded_at else now,
+        }
+        key = (item.medication_id, item.client_id)
+        if key not in latest or row["recorded_at"] >= latest[key]["recorded_at"]:
+            latest[key] = row
+
+    created = updated = 0
+    if latest:
+        table = MedicationIntake.__table__
+        _lock_medications(db, {medication_id for medication_id, _ in latest})
+        # Previous state of the intakes that already exist, for the rollup deltas
+        # (read under the lock, so it is still current when the upsert runs)
+        existing = {
+            (row.medication_id, row.client_id): row
+            for row in db.query(
+                MedicationIntake.medication_id,
+                MedicationIntake.client_id,
+                MedicationIntake.planned_datetime,
+                MedicationIntake.status,
+            ).filter(
+                tuple_(MedicationIntake.medication_id, MedicationIntake.client_id).in_(list(latest))
+            )
+        }
+
+        statement = upsert_insert(db.get_bind(), table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.medication_id, table.c.client_id],
+            set_={
+                "planned_datetime": statement.excluded.planned_datetime,
+                "status": statement.excluded.status,
+                "recorded_at": statement.excluded.recorded_at,
+            },
+            where=statement.excluded.recorded_at > table.c.recorded_at
+        ).returning(table.c.medication_id, table.c.client_id)
+        written = db.execute(statement, list(latest.values())).all()
+
+        changes: List[tuple] = []
+        for medication_id, client_id in written:
+            row = latest[(medication_id, client_id)]
+            changes.append((medication_id, row["planned_datetime"], row["status"], 1))
+            previous = existing.get((medication_id, client_id))
+            if previous is None:
+                created += 1
+            else:
+                updated += 1
+                changes.append((medication_id, previous.planned_datetime, previous.status, -1))
+        apply_deltas(db.connection(), intake_deltas(changes))
+    db.commit()
+
+    return {
+        "received": len(items),
+        "created": created,
+        "updated": updated,
+        "unchanged": len(latest) - created - updated,
+        "rejected": rejected,
+    }
@@ -0,0 +1,110 @@
+"""Drug interaction check against a bundled offline dataset.
+
+``data/drug_interactions.csv`` lists interacting substance pairs with a
+severity and a German description; ``data/drug_aliases.csv`` maps short and
+brand names (ASS, Marcumar, HCT) to substances. Both are loaded once per
+process into hash maps: the pair index is keyed by the sorted substance pair,
+so checking n new against m existing medications is n·m dict lookups.
+
+Medication names are free text ("ASS 100mg", "Simvastatin-ratiopharm 20");
+the substances of a name are found by looking up each word, cached per name.
+"""
+import csv
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from config import settings
+
+SEVERITY_ORDER = {"contraindicated": 0, "major": 1, "moderate": 2, "minor": 3}
+
+_WORD_PATTERN = re.compile(r"[a-zäöüß]+")
+
+class Interaction(NamedTuple):
+    severity: str
+    description: str
+
+class InteractionIndex:
+    """Hashed index of interacting substance pairs."""
+
+    def __init__(self, interactions_path: str, aliases_path: str):
+        self.interactions_path = interactions_path
+        self.aliases_path = aliases_path
+        self._pairs: Optional[Dict[Tuple[str, str], Interaction]] = None
+        self._substances: Dict[str, str] = {}  # word -> substance
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read the dataset (at startup; otherwise on first use)."""
+        pairs = {}
+        substances = {}
+        with open(self.interactions_path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                first, second = row["substance_a"].strip().lower(), row["substance_b"].strip().lower()
+                pairs[(min(first, second), max(first, second))] = Interaction(
+                    row["severity"].strip(), row["description"].strip()
+                )
+                substances[first] = first
+                substances[second] = second
+        with open(self.aliases_path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                substances[row["alias"].strip().lower()] = row["substance"].strip().lower()
+        with self._lock:
+            self._substances = substances
+            self._pairs = pairs
+        self.substances_of.cache_clear()
+
+    def _ensure_loaded(self) -> Dict[Tuple[str, str], Interaction]:
+        if self._pairs is None:
+            self.load()
+        return self._pairs
+
+    @lru_cache(maxsize=4096)
+    def substances_of(self, medication_name: str) -> FrozenSet[str]:
+        """Known substances named in a medication name."""
+        self._ensure_loaded()
+        return frozenset(
+            self._substances[word]
+            for word in _WORD_PATTERN.findall(medication_name.lower())
+            if word in self._substances
+        )
+
+    def check(self, new: Sequence[str], existing: Sequence[Tuple[str, Optional[int]]]) -> List[dict]:
+        """
+        Interactions of new medication names with each other and with existing
+        (name, prescription id) medications, most severe first.
+        """
+        pairs = self._ensure_loaded()
+        warnings = []
+        candidates = [(name, None) for name in new] + list(existing)
+        for index, name in enumerate(new):
+            substances = self.substances_of(name)
+            if not substances:
+                continue
+            # Other new medications only once per pair (those after this one)
+            for other_name, prescription_id in candidates[index + 1:]:
+                for first in substances:
+                    for second in self.substances_of(other_name):
+                        interaction = pairs.get((first, second) if first < second else (second, first))
+                        if interaction:
+                            warnings.append({
+                                "medication": name,
+                                "interacting_medication": other_name,
+                                "interacting_prescription_id": prescription_id,
+                                "severity": interaction.severity,
+                                "description": interaction.description,
+                            })
+        warnings.sort(key=lambda warning: SEVERITY_ORDER.get(warning["severity"], len(SEVERITY_ORDER)))
+        return warnings
+
+    def stats(self) -> dict:
+        info = self.substances_of.cache_info()
+        return {
+            "pairs": len(self._pairs or ()),
+            "names_cached": info.currsize,
+            "name_hits": info.hits,
+            "name_misses": info.misses,
+        }
+
+interaction_index = InteractionIndex(settings.DRUG_INTERACTIONS_PATH, settings.DRUG_ALIASES_PATH)
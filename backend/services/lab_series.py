@@ -0,0 +1,106 @@
+"""Vectorized statistics and downsampling for lab value time series.
+
+A patient's history for one test is loaded as plain columns (date, value,
+reference range) and turned into NumPy arrays once; rolling mean, min/max and
+out-of-range counts are then computed without per-row Python work. Long
+histories are reduced to a bounded number of points with
+Largest-Triangle-Three-Buckets (LTTB), which keeps the visual shape of the
+curve (peaks and dips survive) far better than taking every n-th sample.
+"""
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+def to_arrays(rows: Sequence[Tuple[date, float, Optional[float], Optional[float]]]):
+    """Convert (date, value, range_low, range_high) rows to arrays; open range ends become NaN."""
+    count = len(rows)
+    x = np.fromiter((row[0].toordinal() for row in rows), dtype=np.float64, count=count)
+    y = np.fromiter((row[1] for row in rows), dtype=np.float64, count=count)
+    low = np.fromiter((np.nan if row[2] is None else row[2] for row in rows), dtype=np.float64, count=count)
+    high = np.fromiter((np.nan if row[3] is None else row[3] for row in rows), dtype=np.float64, count=count)
+    return x, y, low, high
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over the last `window` samples (shorter at the start of the series)."""
+    if values.size == 0:
+        return values.copy()
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, values.size + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+def range_flags(values: np.ndarray, low: np.ndarray, high: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Boolean arrays marking values below and above their reference range (NaN bounds never match)."""
+    with np.errstate(invalid="ignore"):
+        return values < low, values > high
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; the rest is split into
+    threshold - 2 buckets and from each bucket the point forming the largest
+    triangle with the previously kept point and the next bucket's average is
+    chosen.
+    """
+    size = x.size
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    # Per-bucket averages via cumulative sums, used as the third triangle corner
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < threshold - 1:
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = size - 1, size
+        avg_x = (x_sums[next_end] - x_sums[next_start]) / (next_end - next_start)
+        avg_y = (y_sums[next_end] - y_sums[next_start]) / (next_end - next_start)
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+def build_series(rows: Sequence[Tuple[date, float, Optional[float], Optional[float]]], window: int, max_points: int) -> dict:
+    """Summary statistics over all rows plus at most `max_points` chart points."""
+    x, y, low, high = to_arrays(rows)
+    below, above = range_flags(y, low, high)
+    means = rolling_mean(y, window)
+
+    indices = lttb_indices(x, y, max_points)
+    points: List[dict] = [
+        {
+            "date": date.fromordinal(int(x[i])),
+            "value": float(y[i]),
+            "rolling_mean": float(means[i]),
+            "range_low": None if np.isnan(low[i]) else float(low[i]),
+            "range_high": None if np.isnan(high[i]) else float(high[i]),
+            "out_of_range": bool(below[i] or above[i]),
+        }
+        for i in indices.tolist()
+    ]
+
+    return {
+        "count": int(y.size),
+        "min": float(y.min()) if y.size else None,
+        "max": float(y.max()) if y.size else None,
+        "mean": float(y.mean()) if y.size else None,
+        "below_range_count": int(below.sum()),
+        "above_range_count": int(above.sum()),
+        "out_of_range_count": int(below.sum() + above.sum()),
+        "downsampled": len(points) < y.size,
+        "points": points,
+    }
@@ -0,0 +1,56 @@
+"""Parsing of lab result values and reference ranges into numbers.
+
+Lab values arrive as free text ("95", "5,4", "< 0.5") and reference ranges as
+"70-100 mg/dL", "4,5 – 6,0", "<200" or "> 40 mg/dL". The parsed numbers are
+stored next to the original strings so out-of-range and trend queries can
+run in SQL.
+"""
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_NUMBER = r"[-+]?\d+(?:[.,]\d+)?"
+_NUMBER_PATTERN = re.compile(_NUMBER)
+_RANGE_PATTERN = re.compile(rf"({_NUMBER})\s*(?:-|–|—|bis|to)\s*({_NUMBER})", re.IGNORECASE)
+_UPPER_PATTERN = re.compile(rf"(?:<=?|≤|bis|unter|max\.?)\s*({_NUMBER})", re.IGNORECASE)
+_LOWER_PATTERN = re.compile(rf"(?:>=?|≥|über|ab|min\.?)\s*({_NUMBER})", re.IGNORECASE)
+
+def _to_float(text: str) -> float:
+    return float(text.replace(",", "."))
+
+def parse_value(value: Optional[str]) -> Optional[float]:
+    """Return the first number in a lab value ("5,4" -> 5.4), or None for non-numeric values."""
+    if not value:
+        return None
+    match = _NUMBER_PATTERN.search(value)
+    return _to_float(match.group(0)) if match else None
+
+@lru_cache(maxsize=1024)
+def parse_range(normal_range: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse a reference range into (low, high); open ends are None.
+    
+    "70-100 mg/dL" -> (70.0, 100.0), "<200" -> (None, 200.0), "> 40" -> (40.0, None)
+    """
+    if not normal_range:
+        return None, None
+    match = _RANGE_PATTERN.search(normal_range)
+    if match:
+        low, high = _to_float(match.group(1)), _to_float(match.group(2))
+        return (low, high) if low <= high else (high, low)
+    match = _UPPER_PATTERN.search(normal_range)
+    if match:
+        return None, _to_float(match.group(1))
+    match = _LOWER_PATTERN.search(normal_range)
+    if match:
+        return _to_float(match.group(1)), None
+    return None, None
+
+def parse_lab_result(result_value: Optional[str], normal_range: Optional[str]) -> dict:
+    """Return the numeric columns for a lab result as a dict."""
+    range_low, range_high = parse_range(normal_range)
+    return {
+        "value_num": parse_value(result_value),
+        "range_low": range_low,
+        "range_high": range_high,
+    }
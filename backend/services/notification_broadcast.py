@@ -0,0 +1,235 @@
+"""Broadcast one notification to many users.
+
+A doctor can only reach their own patients: the patients they have an
+appointment, prescription, report or lab result with. Recipients are all of
+those patients or a list of their user ids. System broadcasts (all users of a
+role, e.g. every patient) are reserved for broadcast admins and skip the
+patient filter.
+
+Recipients are never loaded as objects. The notifications are created with
+INSERT ... SELECT from users, one statement per chunk of user ids (keyset over
+users.id), and the unread counters with a matching INSERT ... SELECT ... ON
+CONFLICT. Each chunk is committed on its own and then published to its
+recipients that have an open stream, so a broadcast to hundreds of thousands
+of users neither holds one long write transaction nor keeps every id in
+memory. A broadcast that fails midway has delivered the chunks before the
+failure; ``processed`` tells how many.
+
+Broadcasts can run inline or as a background job whose progress is kept in
+process memory (``broadcast_jobs``).
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List, Optional
+
+from sqlalchemy import Boolean, DateTime, and_, func, insert, literal, select, union
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.appointment import Appointment
+from models.lab_result import LabResult
+from models.notification import Notification
+from models.notification_count import NotificationCount
+from models.patient import Patient
+from models.prescription import Prescription
+from models.report import Report
+from models.user import User, UserRole
+from services.notification_hub import notification_event, notification_hub
+from services.upsert import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+# Recipients per INSERT ... SELECT
+BROADCAST_CHUNK_SIZE = 10_000
+# Finished jobs kept for status queries
+MAX_FINISHED_JOBS = 100
+
+class BroadcastJob:
+    """State and progress of one broadcast."""
+
+    def __init__(
+        self,
+        notification: dict,
+        doctor_id: int,
+        role: Optional[UserRole],
+        user_ids: Optional[List[int]],
+        system: bool = False,
+    ):
+        self.id = uuid.uuid4().hex
+        self.notification = notification
+        self.doctor_id = doctor_id
+        self.role = role
+        self.user_ids = user_ids
+        self.system = system  # Not limited to the doctor's patients
+        self.status = "pending"
+        self.total = 0
+        self.processed = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+def doctor_patient_user_ids(doctor_id: int):
+    """Subquery of the user ids of a doctor's patients (any appointment, prescription, report or lab result)."""
+    patient_ids = union(*(
+        select(model.patient_id).where(model.doctor_id == doctor_id)
+        for model in (Appointment, Prescription, Report, LabResult)
+    ))
+    return select(Patient.user_id).where(Patient.id.in_(patient_ids))
+
+def _recipients(job: BroadcastJob):
+    if job.role is not None:
+        selected = User.role == job.role
+    else:
+        selected = User.id.in_(job.user_ids)
+    if job.system:
+        return selected
+    return and_(User.id.in_(doctor_patient_user_ids(job.doctor_id)), selected)
+
+def run_broadcast(db: Session, job: BroadcastJob) -> None:
+    """Create the job's notifications and counter updates, committing and publishing each chunk."""
+    job.status = "running"
+    recipients = _recipients(job)
+    job.total = db.query(func.count(User.id)).filter(recipients).scalar()
+
+    table = Notification.__table__
+    counts = NotificationCount.__table__
+    values = job.notification
+    created_at = datetime.utcnow()
+    notification_columns = [
+        User.id,
+        literal(values["title"]),
+        literal(values["message"]),
+        literal(values["type"], table.c.type.type),
+        literal(False, Boolean),
+        literal(created_at, DateTime),
+        literal(values.get("link")),
+    ]
+    row = dict(values, is_read=False, created_at=created_at)  # Event payload, per recipient id
+    last_user_id = None
+    while True:
+        after = recipients if last_user_id is None else and_(recipients, User.id > last_user_id)
+        chunk_last = db.execute(
+            select(func.max(User.id)).where(
+                User.id.in_(select(User.id).where(after).order_by(User.id).limit(BROADCAST_CHUNK_SIZE))
+            )
+        ).scalar()
+        if chunk_last is None:
+            break
+        chunk = and_(after, User.id <= chunk_last)
+        created = db.execute(
+            insert(table).from_select(
+                ["user_id", "title", "message", "type", "is_read", "created_at", "link"],
+                select(*notification_columns).where(chunk)
+            ).returning(table.c.id, table.c.user_id)
+        ).all()
+        # Core inserts bypass the flush hooks that maintain the unread counters
+        statement = upsert_insert(db.get_bind(), counts).from_select(
+            ["user_id", "unread"], select(User.id, literal(1)).where(chunk)
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[counts.c.user_id],
+            set_={"unread": counts.c.unread + statement.excluded.unread}
+        ))
+        db.commit()
+
+        # Only recipients with an open stream need the event encoded
+        events = []
+        for notification_id, user_id in created:
+            if notification_hub.is_subscribed(user_id):
+                row.update(id=notification_id, user_id=user_id)
+                events.append((user_id, notification_event(SimpleNamespace(**row))))
+        notification_hub.publish(events)
+        job.processed += len(created)
+        last_user_id = chunk_last
+
+    job.status = "completed"
+    job.finished_at = datetime.utcnow()
+
+class BroadcastJobs:
+    """Runs broadcasts inline or in background threads and keeps their progress."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, BroadcastJob]" = OrderedDict()
+        self.completed = 0
+        self.failed = 0
+        self.notifications = 0
+
+    def get(self, job_id: str) -> Optional[BroadcastJob]:
+        return self._jobs.get(job_id)
+
+    def run(self, db: Session, job: BroadcastJob) -> BroadcastJob:
+        """Run a broadcast in the caller's session."""
+        self._add(job)
+        try:
+            run_broadcast(db, job)
+        except Exception as error:
+            db.rollback()
+            self._failed(job, error)
+            raise
+        self._completed(job)
+        return job
+
+    def submit(self, job: BroadcastJob) -> BroadcastJob:
+        """Run a broadcast in a background thread with its own session."""
+        self._add(job)
+        threading.Thread(target=self._run, args=(job,), name=f"broadcast-{job.id}", daemon=True).start()
+        return job
+
+    def _run(self, job: BroadcastJob) -> None:
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            run_broadcast(db, job)
+            self._completed(job)
+            logger.info(
+                "Broadcast %s created %d notifications in %.0f ms",
+                job.id, job.processed, (time.perf_counter() - started) * 1000
+            )
+        except Exception as error:
+            db.rollback()
+            self._failed(job, error)
+            logger.exception("Broadcast %s failed", job.id)
+        finally:
+            db.close()
+
+    def _add(self, job: BroadcastJob) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [job_id for job_id, other in self._jobs.items() if other.finished]
+            for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+                del self._jobs[job_id]
+
+    def _completed(self, job: BroadcastJob) -> None:
+        with self._lock:
+            self.completed += 1
+            self.notifications += job.processed
+
+    def _failed(self, job: BroadcastJob, error: Exception) -> None:
+        job.status = "failed"
+        job.error = str(error)
+        job.finished_at = datetime.utcnow()
+        with self._lock:
+            self.failed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if not job.finished)
+        return {
+            "running": running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "notifications": self.notifications,
+        }
+
+broadcast_jobs = BroadcastJobs(SessionLocal)
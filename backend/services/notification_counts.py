@@ -0,0 +1,184 @@
+"""Denormalized per-user unread notification counters.
+
+notification_counts holds the number of unread notifications per user, so
+``GET /notifications/unread-count`` is a primary-key lookup instead of a
+COUNT over the user's notifications. The counters change in the transaction
+that writes the notifications: ORM flushes of ``Notification`` (new rows,
+is_read or user changes, deletes) are turned into per-user deltas and
+applied with one INSERT ... ON CONFLICT DO UPDATE.
+
+Writers that bypass the flush (Core inserts, ``query.update()``) must call
+``apply_unread_deltas`` themselves in the same transaction. As a safety net
+against drift from writers that forget, ``CounterReconciler`` periodically
+recounts and corrects the counters that differ.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.notification import Notification
+from models.notification_count import NotificationCount
+from models.user import User
+from services.session_state import maintain_deltas, previous_value
+from services.upsert import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+# Counters corrected per executemany batch
+RECONCILE_CHUNK_SIZE = 5000
+
+def apply_unread_deltas(connection, deltas: Dict[int, int]) -> None:
+    """Add per-user deltas to the counters, creating missing rows, in one statement."""
+    rows = [
+        {"user_id": user_id, "unread": delta}
+        for user_id, delta in deltas.items()
+        if delta and user_id is not None
+    ]
+    if not rows:
+        return
+    table = NotificationCount.__table__
+    statement = upsert_insert(connection, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"unread": table.c.unread + statement.excluded.unread}
+    )
+    connection.execute(statement, rows)
+
+def unread_count(db: Session, user_id: int) -> int:
+    """Unread notifications of a user, read from the counter."""
+    return db.query(NotificationCount.unread).filter(NotificationCount.user_id == user_id).scalar() or 0
+
+def reconcile_unread_counts(db: Session) -> int:
+    """
+    Recount unread notifications, fix the counters that differ and commit.
+    Returns the number of corrected counters.
+    """
+    actual = dict(
+        db.query(Notification.user_id, func.count(Notification.id)).filter(
+            Notification.user_id.isnot(None),
+            Notification.is_read == False
+        ).group_by(Notification.user_id).all()
+    )
+    stored = dict(db.query(NotificationCount.user_id, NotificationCount.unread).all())
+    drifted = sorted(
+        user_id for user_id in actual.keys() | stored.keys()
+        if actual.get(user_id, 0) != stored.get(user_id, 0)
+    )
+    if drifted:
+        # Recount inside the statement so notifications written since the scan are included
+        recount = select(func.count(Notification.id)).where(
+            Notification.user_id == bindparam("drifted_user_id"),
+            Notification.is_read == False
+        ).scalar_subquery()
+        table = NotificationCount.__table__
+        statement = upsert_insert(db.get_bind(), table).values(
+            user_id=bindparam("drifted_user_id"), unread=recount
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"unread": statement.excluded.unread}
+        )
+        # Counters of deleted users are not recreated
+        existing_users = {
+            user_id for (user_id,) in db.query(User.id).filter(User.id.in_(drifted))
+        }
+        rows = [{"drifted_user_id": user_id} for user_id in drifted if user_id in existing_users]
+        for start in range(0, len(rows), RECONCILE_CHUNK_SIZE):
+            db.execute(statement, rows[start:start + RECONCILE_CHUNK_SIZE])
+    db.commit()
+    return len(drifted)
+
+class CounterReconciler:
+    """Background thread that runs ``reconcile_unread_counts`` periodically."""
+
+    def __init__(self, session_factory, interval_seconds: float):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.runs = 0
+        self.corrected = 0
+        self.last_run_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running or self.interval_seconds <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-count-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Unread notification count reconciliation failed")
+
+    def run_once(self) -> int:
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            corrected = reconcile_unread_counts(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.runs += 1
+        self.corrected += corrected
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+        if corrected:
+            logger.warning("Corrected %d drifted unread notification counters", corrected)
+        return corrected
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "corrected": self.corrected,
+            "last_run_ms": round(self.last_run_ms, 2),
+        }
+
+def _new_deltas() -> Dict[int, int]:
+    return defaultdict(int)
+
+def _uncount_changed_notifications(session: Session, deltas: Dict[int, int]) -> None:
+    # Previous values are only available before the flush
+    deleted_users = {instance.id for instance in session.deleted if isinstance(instance, User)}
+    for instance in session.dirty:
+        if isinstance(instance, Notification) and session.is_modified(instance):
+            if not previous_value(instance, "is_read"):
+                deltas[previous_value(instance, "user_id")] -= 1
+    for instance in session.deleted:
+        # Counters of deleted users are deleted with them
+        if isinstance(instance, Notification) and instance.user_id not in deleted_users:
+            if not previous_value(instance, "is_read"):
+                deltas[previous_value(instance, "user_id")] -= 1
+
+def _count_flushed_notifications(session: Session, deltas: Dict[int, int]) -> None:
+    for instance in list(session.new) + list(session.dirty):
+        if isinstance(instance, Notification) and session.is_modified(instance) and not instance.is_read:
+            deltas[instance.user_id] += 1
+
+maintain_deltas(
+    "unread_count_deltas", _new_deltas, _uncount_changed_notifications, _count_flushed_notifications, apply_unread_deltas
+)
+
+counter_reconciler = CounterReconciler(SessionLocal, settings.NOTIFICATION_COUNT_RECONCILE_SECONDS)
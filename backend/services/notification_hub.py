@@ -0,0 +1,145 @@
+"""In-process pub/sub that pushes notification events to Server-Sent Events streams.
+
+Every open ``GET /notifications/stream`` connection subscribes with its user
+id and gets a bounded queue. Writers publish once their transaction has
+committed: new ``Notification`` rows and notifications marked as read through
+the ORM are collected by the session hooks below, other writers (Core inserts,
+bulk updates) call ``publish`` or ``publish_after_commit`` themselves. Each
+event is encoded once and handed only to the queues of its user.
+
+Notification events carry the notification id as SSE event id, so a client
+that reconnects with Last-Event-ID can be sent what it missed from the
+database. A subscriber whose queue overflows (a stalled client) is closed
+instead of buffering without limit; the browser reconnects and resumes.
+
+Subscribers live in this process: with several API workers a stream only
+sees notifications written by the worker it is connected to.
+"""
+import asyncio
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from models.notification import Notification
+from schemas.notification import Notification as NotificationSchema
+from services.session_state import PendingState
+
+# Events buffered per connection before it is closed as too slow
+SUBSCRIBER_QUEUE_SIZE = 256
+
+def format_event(event_name: str, data, event_id: Optional[int] = None) -> str:
+    """Encode one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_name}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+def notification_event(notification) -> str:
+    """SSE message for a new notification (ORM instance or row with the schema's fields)."""
+    payload = NotificationSchema.model_validate(notification).model_dump(mode="json")
+    return format_event("notification", payload, event_id=notification.id)
+
+class Subscriber:
+    """One open stream: a queue filled from the event loop it was created on."""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+class NotificationHub:
+    """Fans published events out to the subscribers of their user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int) -> Subscriber:
+        """Register a stream of user_id; must be called on the event loop that reads it."""
+        subscriber = Subscriber(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+
+    def is_subscribed(self, user_id: int) -> bool:
+        return user_id in self._subscribers
+
+    def publish(self, events: Iterable[Tuple[int, str]]) -> None:
+        """Deliver (user id, encoded message) events; safe to call from any thread."""
+        targets: List[Tuple[Subscriber, str]] = []
+        count = 0
+        with self._lock:
+            for user_id, message in events:
+                count += 1
+                for subscriber in self._subscribers.get(user_id, ()):
+                    targets.append((subscriber, message))
+        self.published += count
+        for subscriber, message in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, message)
+            except RuntimeError:
+                # The subscriber's event loop has been closed
+                self.unsubscribe(subscriber)
+
+    def _deliver(self, subscriber: Subscriber, message: str) -> None:
+        if subscriber.overflowed:
+            return
+        try:
+            subscriber.queue.put_nowait(message)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            subscriber.overflowed = True
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            users = len(self._subscribers)
+            subscribers = sum(len(subscribers) for subscribers in self._subscribers.values())
+        return {
+            "users": users,
+            "subscribers": subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+def publish_after_commit(session: Session, user_id: int, message: str) -> None:
+    """Queue an event that is published when the session's transaction commits."""
+    _pending_events.get(session).append((user_id, message))
+
+@event.listens_for(Session, "after_flush")
+def _collect_notification_events(session, flush_context):
+    read_ids: Dict[int, List[int]] = {}
+    for instance in session.new:
+        if isinstance(instance, Notification):
+            publish_after_commit(session, instance.user_id, notification_event(instance))
+    for instance in session.dirty:
+        if isinstance(instance, Notification) and instance.is_read and get_history(instance, "is_read").added:
+            read_ids.setdefault(instance.user_id, []).append(instance.id)
+    for user_id, ids in read_ids.items():
+        publish_after_commit(session, user_id, format_event("read", {"ids": sorted(ids)}))
+
+def _publish_pending_events(events: List[Tuple[int, str]]) -> None:
+    notification_hub.publish(events)
+
+_pending_events = PendingState("notification_hub_events", list, on_commit=_publish_pending_events)
+
+notification_hub = NotificationHub()
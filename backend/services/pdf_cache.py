@@ -0,0 +1,457 @@
+"""Content-addressed on-disk cache for generated PDFs.
+
+Reports and lab results are immutable once created, so a rendered PDF can be
+reused for as long as its inputs are unchanged. Files are named by a SHA-256
+over the entity kind, id, every value that ends up in the document and the
+renderer's template version; changing any of them simply produces a new key.
+
+Total size is bounded: least recently used files are evicted first. Recency is
+tracked in memory and persisted through file mtimes, so the order survives
+restarts. Lookups hand out a ``PinnedFile``: a pinned entry is skipped by
+eviction until it is released, so a file cannot disappear between the lookup
+and the response that sends it (``PinnedFileResponse`` releases once sent).
+Concurrent misses for the same key share one render.
+"""
+import functools
+import hashlib
+import json
+import os
+import selectors
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional
+
+from fastapi.responses import FileResponse
+
+from config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+class PinnedFile:
+    """
+    Path of a PDF that stays on disk until released. Release is idempotent and
+    also happens when the object is garbage collected (e.g. a response that was
+    never sent); files outside the cache (stored PDFs) have nothing to release.
+    """
+    
+    def __init__(self, path: str, release: Optional[Callable[[], None]] = None):
+        self.path = path
+        self._release = weakref.finalize(self, release) if release is not None else None
+    
+    def release(self) -> None:
+        if self._release is not None:
+            self._release()
+    
+    def __enter__(self) -> "PinnedFile":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+class PinnedFileResponse(FileResponse):
+    """FileResponse for a PinnedFile that releases it once sent, or when sending fails."""
+    
+    def __init__(self, pinned: PinnedFile, **kwargs: Any):
+        super().__init__(pinned.path, **kwargs)
+        self.pinned = pinned
+    
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.pinned.release()
+
+class _StreamedRender:
+    """A render being copied into the cache that readers follow while it is written."""
+    
+    def __init__(self, path: str, deadline: float):
+        self.path = path  # temporary file, the cache file once finished
+        self.deadline = deadline
+        self.future: Optional[Future] = None  # the renderer's future (pipe mode)
+        self.started = Future()  # first bytes written, or the render's error
+        self.done = Future()  # file cached, or the render's error
+        self.changed = threading.Condition()
+        self.size = 0
+        self.finished = False
+        self.error: Optional[BaseException] = None
+    
+    def append(self, count: int) -> None:
+        with self.changed:
+            self.size += count
+            self.changed.notify_all()
+        if not self.started.done():
+            self.started.set_result(None)
+
+class PdfCache:
+    """Size-bounded LRU cache of PDF files keyed by content hash."""
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, LRU first
+        self._pins: Dict[str, int] = {}  # key -> files being served
+        self._rendering: Dict[str, Future] = {}  # key -> render in flight
+        self._streams: Dict[str, _StreamedRender] = {}  # key -> streamed render in flight
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(kind: str, entity_id: int, template_version: int, **fields: Any) -> str:
+        """Build a cache key from everything that influences the rendered document."""
+        payload = json.dumps(
+            {"kind": kind, "id": entity_id, "template": template_version, "fields": fields},
+            sort_keys=True,
+            default=str,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+    
+    def acquire(self, key: str) -> Optional[PinnedFile]:
+        """Return the cached file for a key, pinned against eviction, and mark it recently used."""
+        with self._lock:
+            self._load()
+            path = self.path_for(key)
+            if key not in self._entries or not os.path.exists(path):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            pinned = self._pin(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pinned
+    
+    def put_file(self, key: str, source_path: str) -> PinnedFile:
+        """Move a rendered file into the cache under key and return it pinned."""
+        path = self.path_for(key)
+        os.replace(source_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._load()
+            self._forget(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            pinned = self._pin(key)
+            self._evict()
+        return pinned
+    
+    def get_or_render(self, key: str, render: Callable[[str], None]) -> PinnedFile:
+        """
+        Return the cached file for key (pinned), rendering it on a miss.
+        render receives a temporary path in the cache directory to write the PDF to.
+        Concurrent misses for the same key wait for the first caller's render.
+        """
+        while True:
+            pinned = self.acquire(key)
+            if pinned is not None:
+                return pinned
+            with self._lock:
+                in_flight = self._rendering.get(key)
+                if in_flight is None:
+                    done = self._rendering[key] = Future()
+            if in_flight is not None:
+                # Re-raises the render's error; on success the file is looked up again
+                in_flight.result()
+                continue
+            
+            tmp_path = self.temp_path()
+            try:
+                render(tmp_path)
+                pinned = self.put_file(key, tmp_path)
+            except BaseException as error:
+                self._render_finished(key, done, error)
+                raise
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._render_finished(key, done)
+            return pinned
+    
+    def _render_finished(self, key: str, done: Future, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._rendering.pop(key, None)
+        if error is None:
+            done.set_result(None)
+        else:
+            done.set_exception(error)
+    
+    def stream_render(self, key: str, submit: Callable[[str], Future], timeout: float) -> Iterator[bytes]:
+        """
+        Render key into the cache and stream the PDF while it is written.
+        
+        submit receives the path to write to and must return the render future.
+        The renderer writes into a named pipe; a pump thread copies it into a
+        temporary file and wakes readers on a condition as data arrives, then
+        adds the finished file to the cache. This returns only once the first
+        bytes are there, so a render that is rejected (e.g. a full queue), fails
+        or times out before producing anything raises here, before a response
+        has been started. Concurrent downloads of the same key follow the render
+        in progress. Without named pipes (Windows) the render writes the file
+        directly and the stream starts when it is complete.
+        
+        Raises:
+            TimeoutError: nothing was written within timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                stream = self._streams.get(key)
+                in_flight = self._rendering.get(key)
+                if in_flight is None:
+                    stream = self._streams[key] = _StreamedRender(self.temp_path(), deadline)
+                    self._rendering[key] = stream.done
+            if in_flight is None:
+                self._start_stream(key, stream, submit)
+            if stream is not None:
+                return self._follow(stream, deadline)
+            
+            # Rendered by get_or_render; wait for it and send the cached file
+            try:
+                in_flight.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeoutError:
+                raise TimeoutError(f"PDF render for {key} exceeded its time budget")
+            pinned = self.acquire(key)
+            if pinned is not None:
+                return self._read_file(pinned)
+    
+    def _start_stream(self, key: str, stream: "_StreamedRender", submit: Callable[[str], Future]) -> None:
+        if not hasattr(os, "mkfifo"):
+            try:
+                future = submit(stream.path)
+            except BaseException as error:
+                self._stream_finished(key, stream, error)
+                raise
+            future.add_done_callback(lambda done: self._stream_finished(key, stream, done.exception()))
+            return
+        
+        pipe_path = self.temp_path()
+        os.mkfifo(pipe_path)
+        # Opened before submitting so the renderer's open() does not block;
+        # non-blocking because a render may fail before it ever opens the pipe
+        pipe = os.open(pipe_path, os.O_RDONLY | os.O_NONBLOCK)
+        wake_read, wake_write = os.pipe()
+        threading.Thread(
+            target=self._pump, args=(key, stream, pipe_path, pipe, wake_read), daemon=True
+        ).start()
+        try:
+            stream.future = submit(pipe_path)
+        except BaseException as error:
+            stream.future = Future()
+            stream.future.set_exception(error)
+            raise
+        finally:
+            # Wake the pump once the render is done, then close the write end
+            stream.future.add_done_callback(lambda done: self._signal(wake_write))
+            stream.future.add_done_callback(lambda done: os.close(wake_write))
+    
+    def _pump(self, key: str, stream: "_StreamedRender", pipe_path: str, pipe: int, wake_read: int) -> None:
+        """Copy the render from the pipe into the stream's file until the render is done (own thread)."""
+        error = None
+        selector = selectors.DefaultSelector()
+        selector.register(pipe, selectors.EVENT_READ)
+        selector.register(wake_read, selectors.EVENT_READ)
+        try:
+            with open(stream.path, "wb", buffering=0) as output:
+                while True:
+                    remaining = stream.deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"PDF render for {key} exceeded its time budget")
+                    ready = {selected.fd for selected, _ in selector.select(remaining)}
+                    if pipe in ready:
+                        data = os.read(pipe, CHUNK_SIZE)
+                        if data:
+                            output.write(data)
+                            stream.append(len(data))
+                        else:
+                            # Renderer closed the pipe; wait for its result
+                            selector.unregister(pipe)
+                    elif wake_read in ready:
+                        stream.future.result()
+                        # Everything the finished renderer wrote is still buffered in the pipe
+                        for data in iter(functools.partial(self._read_available, pipe), b""):
+                            output.write(data)
+                            stream.append(len(data))
+                        break
+        except BaseException as exc:
+            error = exc
+        finally:
+            selector.close()
+            # Unlink first: a renderer that has not opened the pipe yet must not block on it
+            os.remove(pipe_path)
+            os.close(pipe)
+            os.close(wake_read)
+        if error is not None and stream.future is not None and not stream.future.done():
+            # Abandoned render: it fails writing to the closed pipe or creates a stray file
+            stream.future.add_done_callback(lambda done: self._remove_quietly(pipe_path))
+        self._stream_finished(key, stream, error)
+    
+    @staticmethod
+    def _signal(wake_write: int) -> None:
+        try:
+            os.write(wake_write, b"\0")
+        except OSError:
+            pass  # The pump has already given up
+    
+    @staticmethod
+    def _read_available(pipe: int) -> bytes:
+        try:
+            return os.read(pipe, CHUNK_SIZE)
+        except BlockingIOError:
+            return b""
+    
+    def _stream_finished(self, key: str, stream: "_StreamedRender", error: Optional[BaseException]) -> None:
+        with stream.changed:
+            if error is None:
+                try:
+                    if stream.size == 0:
+                        # Rendered without a pipe (or nothing was read): the file is complete now
+                        stream.append(os.path.getsize(stream.path))
+                    self.put_file(key, stream.path).release()
+                    stream.path = self.path_for(key)
+                except OSError as exc:
+                    error = exc
+            if error is not None:
+                self._remove_quietly(stream.path)
+            stream.finished = True
+            stream.error = error
+            stream.changed.notify_all()
+        with self._lock:
+            self._streams.pop(key, None)
+            self._rendering.pop(key, None)
+        for future in (stream.started, stream.done):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+    
+    def _follow(self, stream: "_StreamedRender", deadline: float) -> Iterator[bytes]:
+        """Wait until the render has produced its first bytes, then return a reader following it."""
+        try:
+            stream.started.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            raise TimeoutError("PDF render produced no output within its time budget")
+        with stream.changed:
+            reader = open(stream.path, "rb")
+        return self._read_stream(stream, reader)
+    
+    @staticmethod
+    def _read_stream(stream: "_StreamedRender", reader: BinaryIO) -> Iterator[bytes]:
+        with reader:
+            while True:
+                chunk = reader.read(CHUNK_SIZE)
+                if chunk:
+                    yield chunk
+                    continue
+                with stream.changed:
+                    while stream.size <= reader.tell() and not stream.finished:
+                        stream.changed.wait()
+                    if stream.size <= reader.tell():
+                        if stream.error is not None:
+                            raise stream.error
+                        return
+    
+    @staticmethod
+    def _read_file(pinned: PinnedFile) -> Iterator[bytes]:
+        with pinned, open(pinned.path, "rb") as reader:
+            yield from iter(functools.partial(reader.read, CHUNK_SIZE), b"")
+    
+    @staticmethod
+    def _remove_quietly(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def temp_path(self) -> str:
+        """Return a unique temporary path inside the cache directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "files": len(self._entries),
+                "pinned": len(self._pins),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+    
+    def _load(self) -> None:
+        """Index existing cache files, oldest mtime first (lock held)."""
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir() and entry.name.endswith(".tmp"):
+                # Files and pipes left behind by abandoned renders (timeouts, crashes)
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+    
+    def _pin(self, key: str) -> PinnedFile:
+        """Pin an entry against eviction (lock held)."""
+        self._pins[key] = self._pins.get(key, 0) + 1
+        return PinnedFile(self.path_for(key), lambda: self._unpin(key))
+    
+    def _unpin(self, key: str) -> None:
+        with self._lock:
+            count = self._pins.pop(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                # Evictions skipped while the file was being served
+                self._evict()
+    
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+    
+    def _evict(self) -> None:
+        """Remove least recently used unpinned files until under the size bound (lock held)."""
+        for key in list(self._entries):
+            if self._total_bytes <= self.max_bytes or len(self._entries) <= 1:
+                break
+            if key in self._pins:
+                continue
+            size = self._entries.pop(key)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass  # Already gone or still open elsewhere
+
+pdf_cache = PdfCache(settings.PDF_CACHE_DIR, settings.PDF_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,189 @@
+"""Process pool for CPU-bound PDF rendering.
+
+reportlab holds the GIL while laying out a document, so rendering in request
+threads stalls every other endpoint served by the same worker. Renders are
+sent to a process pool instead. Submissions are bounded: when all workers are
+busy and the waiting queue is full, callers get 503 with Retry-After rather
+than piling up more work.
+
+Workers are started with forkserver (spawn where it is unavailable), not
+fork: forking the multithreaded API process would copy locks held by other
+threads (SQLAlchemy pool, logging) into children that can never release
+them. Workers therefore import render functions by module path; they must be
+importable top-level callables in modules without app side effects (see
+services.pdf_templates) and their arguments picklable. They write the PDF to
+a path, so only the path crosses the process boundary.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+# Imported once by the fork server so forked workers start warm
+PRELOAD_MODULES = ["services.pdf_templates"]
+
+def _mp_context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context("spawn")
+
+def _timed_call(fn: Callable, args: tuple) -> float:
+    """Run fn(*args) in the worker and return its duration in seconds."""
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+class PdfRenderService:
+    """Bounded submission front-end for a PDF rendering process pool."""
+    
+    def __init__(self, workers: int, queue_size: int, timeout: float, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._render_times = deque(maxlen=1000)
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the app does not spawn processes
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+        return self._executor
+    
+    def submit(self, fn: Callable, *args: Any, wait_for_slot: bool = False) -> Future:
+        """
+        Queue fn(*args) for rendering and return its future without waiting.
+        The future resolves to the render duration in seconds.
+        
+        Interactive downloads fail fast when the queue is full; batch callers
+        can pass wait_for_slot=True to wait (up to the timeout) instead.
+        
+        Raises:
+            HTTPException: 503 if all workers are busy and the queue is full
+        """
+        if wait_for_slot:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._stats_lock:
+                self.rejected += 1
+            raise self._busy()
+        
+        with self._stats_lock:
+            self._in_flight += 1
+        
+        if self.workers <= 0:
+            # Inline mode (PDF_RENDER_WORKERS=0), e.g. for development
+            future = Future()
+            try:
+                future.set_result(_timed_call(fn, args))
+            except Exception as exc:
+                future.set_exception(exc)
+        else:
+            future = self._get_executor().submit(_timed_call, fn, args)
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def wait(self, future: Future) -> None:
+        """
+        Wait for a submitted render, re-raising its error.
+        
+        Raises:
+            HTTPException: 503 if the render exceeds the configured timeout
+        """
+        try:
+            future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise self.timeout_error()
+    
+    def timeout_error(self) -> HTTPException:
+        """Count a render that exceeded the timeout and return the 503 to raise for it."""
+        with self._stats_lock:
+            self.timed_out += 1
+        return self._busy()
+    
+    def render(self, fn: Callable, *args: Any, wait_for_slot: bool = False) -> None:
+        """Render fn(*args) in the pool and wait for it."""
+        self.wait(self.submit(fn, *args, wait_for_slot=wait_for_slot))
+    
+    def _on_done(self, future) -> None:
+        try:
+            elapsed = future.result()
+        except Exception:
+            elapsed = None
+        self._record(elapsed)
+        self._release()
+    
+    def _record(self, elapsed: Optional[float]) -> None:
+        with self._stats_lock:
+            if elapsed is None:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self._render_times.append(elapsed)
+    
+    def _release(self) -> None:
+        with self._stats_lock:
+            self._in_flight -= 1
+        self._slots.release()
+    
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PDF rendering is busy, please retry shortly",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters and render-time percentiles over the last 1000 renders."""
+        with self._stats_lock:
+            times = sorted(self._render_times)
+            
+            def percentile(p: float) -> float:
+                if not times:
+                    return 0.0
+                return round(times[min(len(times) - 1, int(p * len(times)))] * 1000, 2)
+            
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "render_ms_p50": percentile(0.5),
+                "render_ms_p95": percentile(0.95),
+                "render_ms_max": round(times[-1] * 1000, 2) if times else 0.0,
+            }
+    
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+pdf_renderer = PdfRenderService(
+    workers=settings.PDF_RENDER_WORKERS,
+    queue_size=settings.PDF_RENDER_QUEUE_SIZE,
+    timeout=settings.PDF_RENDER_TIMEOUT_SECONDS,
+    retry_after=settings.PDF_RENDER_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,84 @@
+"""Durable storage for PDFs pre-rendered when a document is created.
+
+create_report and create_lab_result schedule a background render right after
+the row is committed; the finished file is written under PDF_STORAGE_DIR and
+its path (relative to that directory) is recorded in the row's ``file_path``
+column. The file name carries the document's PDF cache key, which covers the
+template version and every rendered value (including patient and doctor
+names), so a stored file is only served while it matches what would be
+rendered now. Downloads fall back to on-demand rendering (and the PDF cache)
+when the file is missing or stale, e.g. because the background render has
+not finished yet or failed, the template version was bumped or a name changed.
+
+Unlike the PDF cache these files are never evicted.
+"""
+import logging
+import os
+import uuid
+from typing import Callable, Optional
+
+from database import SessionLocal
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class PdfStorage:
+    """Stores one rendered PDF per document under a name derived from its id and cache key."""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    @staticmethod
+    def relative_path(kind: str, entity_id: int, key: str) -> str:
+        return os.path.join(f"{kind}s", f"{kind}_{entity_id}_{key}.pdf")
+    
+    def resolve(self, file_path: Optional[str], kind: str, entity_id: int, key: str) -> Optional[str]:
+        """
+        Absolute path of a stored file, or None if it is not recorded, was rendered
+        for a different cache key (template version or inputs) or is missing on disk.
+        """
+        if not file_path or file_path != self.relative_path(kind, entity_id, key):
+            return None
+        root = os.path.abspath(self.directory)
+        path = os.path.abspath(os.path.join(root, file_path))
+        # file_path comes from the database; never serve anything outside storage
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            return None
+        return path
+    
+    def store(self, kind: str, entity_id: int, key: str, render: Callable[[str], None]) -> str:
+        """Render into a temporary file, move it into place atomically and return its relative path."""
+        file_path = self.relative_path(kind, entity_id, key)
+        path = os.path.join(self.directory, file_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.tmp")
+        try:
+            render(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return file_path
+    
+    def prerender(self, model, entity_id: int, kind: str, key: str, render: Callable[[str], None]) -> None:
+        """
+        Render and store a document's PDF, then record it in model.file_path.
+        Meant to run as a background task after the response has been sent;
+        failures are logged and leave file_path empty so downloads render on demand.
+        """
+        try:
+            file_path = self.store(kind, entity_id, key, render)
+        except Exception:
+            logger.exception("Pre-rendering %s %s failed", kind, entity_id)
+            return
+        
+        db = SessionLocal()
+        try:
+            db.query(model).filter(model.id == entity_id).update(
+                {"file_path": file_path}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+pdf_storage = PdfStorage(settings.PDF_STORAGE_DIR)
@@ -0,0 +1,253 @@
+"""Minimal PDF writer that emits every page as soon as it is finished.
+
+reportlab's canvas keeps the whole document in memory and serializes it in
+``save()``, so nothing can be sent before the last page is laid out. Text-only
+documents such as doctor reports do not need a layout engine: this writer
+emits the fixed objects up front, then each page's content stream and page
+object when ``add_page`` is called (flushing the output), and the page tree,
+catalog and cross-reference table at the end. Objects may appear in any order
+in a PDF file as long as the xref table points at them, which is what makes
+page-by-page output possible.
+
+Only the standard Helvetica fonts are used (no embedding), with text encoded
+as WinAnsiEncoding so German umlauts and ß render correctly. Their glyph
+widths come from reportlab's AFM tables and are cached per font, so text can
+be measured and wrapped without a canvas. Content repeated on every page
+(headers, footers) can be written once as a form XObject and placed with
+``form_op``.
+"""
+import zlib
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate, repeat
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from reportlab.pdfbase import pdfmetrics
+
+LETTER = (612.0, 792.0)
+
+# Resource name -> standard Type 1 font
+FONTS = {
+    "F1": "Helvetica",
+    "F2": "Helvetica-Bold",
+}
+
+_CATALOG_ID = 1
+_PAGES_ID = 2
+
+def escape_text(text: str) -> bytes:
+    """Encode text for a PDF string literal (WinAnsiEncoding)."""
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def text_op(x: float, y: float, font: str, size: float, text: str) -> bytes:
+    """Content stream operators drawing one line of text at (x, y)."""
+    return b"BT /%s %g Tf %g %g Td (%s) Tj ET\n" % (font.encode(), size, x, y, escape_text(text))
+
+def text_block_op(x: float, y: float, font: str, size: float, leading: float, lines: Sequence[str]) -> bytes:
+    """Content stream operators drawing lines top-down from (x, y) in a single text object."""
+    # Escape the whole block at once; T* moves to the next line by the leading
+    body = escape_text("\n".join(lines)).replace(b"\n", b") Tj T* (")
+    return b"BT /%s %g Tf %g TL %g %g Td (%s) Tj ET\n" % (font.encode(), size, leading, x, y, body)
+
+def line_op(x1: float, y1: float, x2: float, y2: float, width: float = 0.5) -> bytes:
+    """Content stream operators stroking a straight line."""
+    return b"q %g w %g %g m %g %g l S Q\n" % (width, x1, y1, x2, y2)
+
+def form_op(name: str) -> bytes:
+    """Content stream operators placing a form XObject written with add_form."""
+    return b"q /%s Do Q\n" % name.encode()
+
+@lru_cache(maxsize=None)
+def _glyph_widths(font: str) -> Tuple[int, ...]:
+    """Glyph widths (1/1000 em) indexed by WinAnsi code for a font resource name."""
+    return tuple(pdfmetrics.getFont(FONTS[font]).widths)
+
+@lru_cache(maxsize=None)
+def _width_array(font: str) -> np.ndarray:
+    return np.array(_glyph_widths(font), dtype=np.int64)
+
+@lru_cache(maxsize=None)
+def _widest_glyph(font: str) -> int:
+    return max(_glyph_widths(font))
+
+@lru_cache(maxsize=8192)
+def _text_units(font: str, text: str) -> int:
+    return sum(map(_glyph_widths(font).__getitem__, text.encode("cp1252", errors="replace")))
+
+def string_width(text: str, font: str, size: float) -> float:
+    """Width of text in points when set in font (resource name) at size."""
+    return _text_units(font, text) * size / 1000.0
+
+def _split_word(word: str, font: str, max_units: float) -> List[str]:
+    """Hard-break a word wider than a line (URLs, lab codes) between characters."""
+    widths = _glyph_widths(font)
+    pieces: List[str] = []
+    piece: List[str] = []
+    piece_units = 0
+    for char in word:
+        char_units = widths[char.encode("cp1252", errors="replace")[0]]
+        if piece and piece_units + char_units > max_units:
+            pieces.append("".join(piece))
+            piece, piece_units = [], 0
+        piece.append(char)
+        piece_units += char_units
+    pieces.append("".join(piece))
+    return pieces
+
+def wrap_text(text: str, font: str, size: float, max_width: float) -> List[str]:
+    """
+    Break text into lines no wider than max_width, breaking at spaces.
+    Words longer than a line are split between characters; an empty string yields one empty line.
+    """
+    max_units = max_width * 1000.0 / size
+    if len(text) * _widest_glyph(font) <= max_units:
+        # Short enough to fit even in the widest glyphs; no need to measure
+        return [text]
+    words = text.split(" ")
+    units = list(map(_text_units, repeat(font), words))
+    if max(units) > max_units:
+        words = [piece for word in words for piece in _split_word(word, font, max_units)]
+        units = list(map(_text_units, repeat(font), words))
+
+    # ends[i]: width of words[:i + 1] each followed by a space, so a line from
+    # word a to word b is ends[b] - ends[a - 1] - space wide
+    space = _text_units(font, " ")
+    ends = list(accumulate(map(space.__add__, units)))
+    lines: List[str] = []
+    start = 0
+    while start < len(words):
+        base = ends[start - 1] if start else 0
+        stop = max(bisect_right(ends, base + max_units + space), start + 1)
+        lines.append(" ".join(words[start:stop]))
+        start = stop
+    return lines
+
+def wrap_lines(text: str, font: str, size: float, max_width: float) -> List[str]:
+    """
+    Wrap every newline-separated paragraph of text with wrap_text.
+    All paragraphs are measured in one vectorized pass over the encoded text,
+    so only the ones that are actually too wide are broken up word by word.
+    """
+    paragraphs = text.split("\n")
+    # cp1252 with errors="replace" yields exactly one byte per character
+    codes = np.frombuffer(text.encode("cp1252", errors="replace"), dtype=np.uint8)
+    cumulative = np.concatenate(([0], np.cumsum(_width_array(font)[codes])))
+    newlines = np.flatnonzero(codes == 10)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [codes.size]))
+    too_wide = (cumulative[ends] - cumulative[starts]) * size / 1000.0 > max_width
+
+    lines: List[str] = []
+    for paragraph, wide in zip(paragraphs, too_wide.tolist()):
+        if wide:
+            lines.extend(wrap_text(paragraph, font, size, max_width))
+        else:
+            lines.append(paragraph)
+    return lines
+
+class StreamingPdfWriter:
+    """Write a PDF page by page to a binary file object or path."""
+
+    def __init__(self, output: Union[str, BinaryIO], page_size: Tuple[float, float] = LETTER, title: Optional[str] = None):
+        if isinstance(output, str):
+            self._file = open(output, "wb")
+            self._owns_file = True
+        else:
+            self._file = output
+            self._owns_file = False
+        self.page_size = page_size
+        self._title = title
+        self._position = 0
+        self._offsets: Dict[int, int] = {}
+        self._page_ids: List[int] = []
+        self._next_id = _PAGES_ID + 1
+        self._font_ids: Dict[str, int] = {}
+        self._form_ids: Dict[str, int] = {}
+
+        # Binary comment marks the file as binary for transfer tools
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for name, base_font in FONTS.items():
+            self._font_ids[name] = self._add_object(
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode()
+            )
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._position += len(data)
+
+    def _allocate_id(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _add_object(self, body: bytes, obj_id: Optional[int] = None) -> int:
+        if obj_id is None:
+            obj_id = self._allocate_id()
+        self._offsets[obj_id] = self._position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, body))
+        return obj_id
+
+    def _add_stream(self, dictionary: bytes, data: bytes) -> int:
+        compressed = zlib.compress(data)
+        return self._add_object(
+            b"<< %s /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+            % (dictionary, len(compressed), compressed)
+        )
+
+    def _resources(self, include_forms: bool = True) -> bytes:
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), obj_id) for name, obj_id in self._font_ids.items())
+        if not include_forms or not self._form_ids:
+            return b"<< /Font << %s >> >>" % fonts
+        forms = b" ".join(b"/%s %d 0 R" % (name.encode(), obj_id) for name, obj_id in self._form_ids.items())
+        return b"<< /Font << %s >> /XObject << %s >> >>" % (fonts, forms)
+
+    def add_form(self, content: bytes) -> str:
+        """
+        Write a form XObject covering the whole page and return its resource name.
+        Its content is stored once; every page placing it with form_op references the same object.
+        """
+        width, height = self.page_size
+        name = f"Fm{len(self._form_ids) + 1}"
+        self._form_ids[name] = self._add_stream(
+            b"/Type /XObject /Subtype /Form /BBox [0 0 %g %g] /Resources %s"
+            % (width, height, self._resources(include_forms=False)),
+            content
+        )
+        return name
+
+    def add_page(self, content: bytes) -> None:
+        """Write a finished page and flush it to the output."""
+        width, height = self.page_size
+        content_id = self._add_stream(b"", content)
+        page_id = self._add_object(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %g %g] /Resources %s /Contents %d 0 R >>"
+            % (_PAGES_ID, width, height, self._resources(), content_id)
+        )
+        self._page_ids.append(page_id)
+        self._file.flush()
+
+    def close(self) -> None:
+        """Write the page tree, catalog, info, xref and trailer."""
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._add_object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)), _PAGES_ID)
+        self._add_object(b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES_ID, _CATALOG_ID)
+        info = b"/Producer (Telemedicine Patient Portal)"
+        if self._title:
+            info += b" /Title (%s)" % escape_text(self._title)
+        info_id = self._add_object(b"<< %s >>" % info)
+
+        xref_position = self._position
+        size = self._next_id
+        entries = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            entries.append(b"%010d 00000 n \n" % self._offsets[obj_id])
+        self._write(b"".join(entries))
+        self._write(
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, _CATALOG_ID, info_id, xref_position)
+        )
+        self._file.flush()
+        if self._owns_file:
+            self._file.close()
@@ -0,0 +1,148 @@
+"""PDF templates rendered in the PDF process pool (services.pdf_renderer).
+
+The render workers are started with forkserver, so they import these
+functions by module path instead of inheriting the API process. This module
+therefore depends only on the PDF libraries: no database, models, config or
+routers, whose import would open connections, register session hooks or
+start services in every worker. The functions take plain copies of the
+rendered fields (SimpleNamespace) and write the PDF to a path or binary file.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from services.pdf_stream import (
+    LETTER, StreamingPdfWriter, form_op, line_op, string_width, text_block_op, text_op, wrap_lines
+)
+
+# Page layout (points)
+_MARGIN = 50
+_BODY_FONT_SIZE = 11
+_BODY_LEADING = 15
+_BODY_TOP = LETTER[1] - 110
+_BODY_BOTTOM = 60
+_LINES_PER_PAGE = int((_BODY_TOP - _BODY_BOTTOM) // _BODY_LEADING) + 1
+
+def _report_header(report, patient_name: str, doctor_name: str) -> bytes:
+    """Header drawn on every page: title, patient, doctor and date above a rule."""
+    width, height = LETTER
+    return b"".join([
+        text_op(_MARGIN, height - 50, "F2", 16, f"Arztbericht: {report.title}"),
+        text_op(
+            _MARGIN, height - 72, "F1", 10,
+            f"Patient: {patient_name}   Arzt: {doctor_name}   Datum: {report.created_at.strftime('%d.%m.%Y')}"
+        ),
+        line_op(_MARGIN, height - 84, width - _MARGIN, height - 84),
+    ])
+
+def _report_footer() -> bytes:
+    """Footer drawn on every page: rule and portal name (page numbers are added per page)."""
+    width, _ = LETTER
+    return line_op(_MARGIN, 45, width - _MARGIN, 45) + text_op(_MARGIN, 32, "F1", 8, "Telemedicine Patient Portal")
+
+def generate_report_pdf(report, patient_name: str, doctor_name: str, output) -> None:
+    """
+    Generate a PDF from report data into output (file path or binary file).
+    Header and footer are written once as form XObjects and placed on every page;
+    content lines are wrapped to the page width. Each page is flushed as soon as it is laid out.
+    """
+    writer = StreamingPdfWriter(output, title=f"Arztbericht: {report.title}")
+    width, _ = LETTER
+    template = form_op(writer.add_form(_report_header(report, patient_name, doctor_name) + _report_footer()))
+    
+    body = wrap_lines(report.content, "F1", _BODY_FONT_SIZE, width - 2 * _MARGIN)
+    for number, start in enumerate(range(0, max(len(body), 1), _LINES_PER_PAGE), start=1):
+        label = f"Seite {number}"
+        writer.add_page(b"".join([
+            template,
+            text_op(width - _MARGIN - string_width(label, "F1", 8), 32, "F1", 8, label),
+            text_block_op(_MARGIN, _BODY_TOP, "F1", _BODY_FONT_SIZE, _BODY_LEADING, body[start:start + _LINES_PER_PAGE]),
+        ]))
+    writer.close()
+
+def generate_lab_result_pdf(result, patient_name: str, output) -> None:
+    """Generate a simple PDF from lab result data into output (file path or binary file)."""
+    p = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+    
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, height - 50, f"Laborergebnis: {result.test_name}")
+    
+    p.setFont("Helvetica", 12)
+    p.drawString(50, height - 80, f"Patient: {patient_name}")
+    p.drawString(50, height - 100, f"Datum: {result.date.strftime('%d.%m.%Y')}")
+    p.drawString(50, height - 140, f"Test: {result.test_name}")
+    p.drawString(50, height - 160, f"Wert: {result.result_value} {result.unit or ''}")
+    if result.normal_range:
+        p.drawString(50, height - 180, f"Normalbereich: {result.normal_range}")
+    
+    p.save()
+
+# Prescription layout (points): body lines run from below the header to the bottom margin
+_PRESCRIPTION_BODY_TOP = LETTER[1] - 150
+_PRESCRIPTION_CONTINUATION_TOP = LETTER[1] - 50
+_PRESCRIPTION_BOTTOM = 50
+_PRESCRIPTION_BLOCK_GAP = 10
+
+def _lines_fitting(y: float) -> int:
+    """Number of body lines that fit on the page from baseline y down to the bottom margin."""
+    return int((y - _PRESCRIPTION_BOTTOM) // _BODY_LEADING) + 1 if y >= _PRESCRIPTION_BOTTOM else 0
+
+def _draw_lines(page: list, y: float, lines) -> float:
+    """Draw (font, text) lines top-down from y, one text object per run of the same font; returns the next y."""
+    for font, run in groupby(lines, key=itemgetter(0)):
+        texts = [text for _, text in run]
+        page.append(text_block_op(_MARGIN, y, font, _BODY_FONT_SIZE, _BODY_LEADING, texts))
+        y -= _BODY_LEADING * len(texts)
+    return y
+
+def generate_prescription_pdf(prescription, patient_name: str, doctor_name: str, output) -> None:
+    """
+    Generate a PDF listing a prescription's medications into output (file path or binary file).
+    The description and all medication fields are wrapped to the page width, never cut off;
+    a medication starts on a new page when it would not fit, and longer ones continue there.
+    """
+    writer = StreamingPdfWriter(output, title=f"Rezept {prescription.id}")
+    width, height = LETTER
+    max_width = width - 2 * _MARGIN
+    
+    def wrapped(text: str, font: str):
+        return [(font, line) for line in wrap_lines(text, font, _BODY_FONT_SIZE, max_width)]
+    
+    blocks = []
+    if prescription.description:
+        blocks.append(wrapped(prescription.description, "F1"))
+    for medication in prescription.medications:
+        block = wrapped(f"{medication.name} - {medication.dosage}", "F2")
+        block += wrapped(f"Einnahme: {medication.frequency_description}", "F1")
+        if medication.start_date or medication.end_date:
+            start = medication.start_date.strftime('%d.%m.%Y') if medication.start_date else "-"
+            end = medication.end_date.strftime('%d.%m.%Y') if medication.end_date else "-"
+            block += wrapped(f"Zeitraum: {start} bis {end}", "F1")
+        if medication.notes:
+            block += wrapped(f"Hinweis: {medication.notes}", "F1")
+        blocks.append(block)
+    
+    page = [text_op(50, height - 50, "F2", 16, "Rezept")]
+    page.append(text_op(50, height - 80, "F1", 12, f"Patient: {patient_name}"))
+    page.append(text_op(50, height - 100, "F1", 12, f"Arzt: {doctor_name}"))
+    page.append(text_op(50, height - 120, "F1", 12, f"Datum: {prescription.created_at.strftime('%d.%m.%Y')}"))
+    y = _PRESCRIPTION_BODY_TOP
+    for block in blocks:
+        # Move a block that does not fit to a new page unless it is longer than a page anyway
+        if len(block) > _lines_fitting(y) and len(block) <= _lines_fitting(_PRESCRIPTION_CONTINUATION_TOP):
+            writer.add_page(b"".join(page))
+            page, y = [], _PRESCRIPTION_CONTINUATION_TOP
+        while block:
+            if not _lines_fitting(y):
+                writer.add_page(b"".join(page))
+                page, y = [], _PRESCRIPTION_CONTINUATION_TOP
+            count = _lines_fitting(y)
+            y = _draw_lines(page, y, block[:count])
+            block = block[count:]
+        y -= _PRESCRIPTION_BLOCK_GAP
+    
+    writer.add_page(b"".join(page))
+    writer.close()
@@ -0,0 +1,347 @@
+"""In-process scheduler that turns medication reminders into notifications.
+
+Today's active reminders (reminder_time "HH:MM" of medications with
+start_date <= today <= end_date) are loaded once per day into a timer wheel of
+1440 one-minute slots. A background thread ticks every few seconds, takes the
+slots of the minutes that have passed since the previous tick and inserts one
+notification per due reminder, all of a tick in one transaction. The table is
+read in full only at startup and at midnight, never per tick.
+
+The wheel is kept current incrementally: ORM writes to reminders and
+medications mark the medication as changed, and once the transaction commits
+the next tick reloads just the reminders of the changed medications (one
+indexed query for all of them) and puts them back into their slots. A timer
+wheel rather than a heap because every slot covers exactly one minute of the
+day: adding or removing a reminder is a dict operation and a tick never has to
+skip stale heap entries left behind by edits.
+
+The schedule lives in this process. With several API workers, enable the
+scheduler (REMINDER_SCHEDULER_ENABLED) in only one of them, otherwise every
+worker emits its own copy of each reminder. Reminders use the server's local
+time; minutes that pass while the scheduler is stopped are not caught up.
+Reminders whose notifications could not be committed stay queued and are
+emitted with the next tick.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from functools import lru_cache
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, insert, or_, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.medication import Medication
+from models.medication_reminder import MedicationReminder
+from models.notification import Notification, NotificationType
+from models.patient import Patient
+from models.prescription import Prescription
+from services.notification_counts import apply_unread_deltas
+from services.notification_hub import notification_event, notification_hub
+from services.session_state import PendingState
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+# Rows read per round trip when loading a day
+LOAD_BATCH_SIZE = 10_000
+# Notifications per executemany batch
+INSERT_CHUNK_SIZE = 5000
+# Medications reloaded per IN (...) list
+REFRESH_CHUNK_SIZE = 5000
+
+@lru_cache(maxsize=4096)
+def parse_reminder_time(value: Optional[str]) -> Optional[int]:
+    """Minute of the day for "HH:MM" (or "H:MM"); None if the value is not a valid time."""
+    try:
+        hours, minutes = (value or "").strip().split(":")
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+class ReminderWheel:
+    """
+    One day of reminders bucketed by minute of the day.
+    
+    Slots count reminders per medication rather than holding each reminder:
+    all reminders of a medication are replaced together and produce the same
+    notification, so reminder ids are not needed once a day is loaded.
+    """
+
+    def __init__(self, day: date):
+        self.day = day
+        self.slots: List[Dict[int, int]] = [{} for _ in range(MINUTES_PER_DAY)]  # medication id -> reminders
+        # medication id -> (patient user id, name, dosage), shared by its reminders
+        self.medications: Dict[int, Tuple[int, str, str]] = {}
+        self.minutes: Dict[int, List[int]] = {}  # medication id -> scheduled minutes
+        self.size = 0
+        self._strings: Dict[str, str] = {}  # one copy of each repeated name/dosage
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, minute: int, medication_id: int, user_id: int, name: str, dosage: str) -> None:
+        slot = self.slots[minute]
+        slot[medication_id] = slot.get(medication_id, 0) + 1
+        if medication_id not in self.medications:
+            strings = self._strings
+            self.medications[medication_id] = (
+                user_id, strings.setdefault(name, name), strings.setdefault(dosage, dosage)
+            )
+        self.minutes.setdefault(medication_id, []).append(minute)
+        self.size += 1
+
+    def remove_medication(self, medication_id: int) -> None:
+        for minute in self.minutes.pop(medication_id, ()):
+            self.size -= self.slots[minute].pop(medication_id, 0)
+        self.medications.pop(medication_id, None)
+
+    def pop_range(self, first: int, last: int) -> List[Tuple[int, str, str]]:
+        """Take the reminders of minutes first..last; returns (patient user id, name, dosage) per reminder."""
+        due = []
+        medications = self.medications
+        for minute in range(max(first, 0), min(last, MINUTES_PER_DAY - 1) + 1):
+            slot = self.slots[minute]
+            if slot:
+                self.slots[minute] = {}
+                for medication_id, count in slot.items():
+                    due.extend([medications[medication_id]] * count)
+                    self.size -= count
+        return due
+
+class ReminderScheduler:
+    """Background thread that emits medication reminder notifications."""
+
+    def __init__(self, session_factory, tick_seconds: float = 5.0):
+        self.session_factory = session_factory
+        self.tick_seconds = tick_seconds
+        self._lock = threading.Lock()
+        self._wheel: Optional[ReminderWheel] = None
+        self._last_minute = -1  # last minute of the wheel's day already emitted
+        self._dirty: Set[int] = set()  # medications changed since the last tick
+        self._undelivered: List[Tuple[int, str, str]] = []  # due reminders whose insert failed
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.emitted = 0
+        self.ticks = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.last_tick_ms = 0.0
+        self.last_load_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.tick_seconds + 5)
+            self._thread = None
+        with self._lock:
+            self._wheel = None
+            self._dirty.clear()
+        self._undelivered = []
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Medication reminder tick failed")
+            self._stop.wait(self.tick_seconds)
+
+    def mark_changed(self, medication_ids: Iterable[int]) -> None:
+        """Reload these medications' reminders on the next tick (called after commit)."""
+        if self.running:
+            with self._lock:
+                self._dirty.update(medication_ids)
+
+    def _active_reminders(self, day: date):
+        """Select (time, medication id, name, dosage, patient user id) of the reminders active on day."""
+        return select(
+            MedicationReminder.reminder_time,
+            Medication.id,
+            Medication.name,
+            Medication.dosage,
+            Patient.user_id,
+        ).join(
+            Medication, MedicationReminder.medication_id == Medication.id
+        ).join(
+            Prescription, Medication.prescription_id == Prescription.id
+        ).join(
+            Patient, Prescription.patient_id == Patient.id
+        ).where(
+            or_(Medication.start_date.is_(None), Medication.start_date <= day),
+            or_(Medication.end_date.is_(None), Medication.end_date >= day),
+        )
+
+    def _fill(self, wheel: ReminderWheel, rows, after_minute: int) -> None:
+        add = wheel.add
+        for reminder_time, medication_id, name, dosage, user_id in rows:
+            minute = parse_reminder_time(reminder_time)
+            # Times already past today are not added (they are not caught up)
+            if minute is not None and minute > after_minute:
+                add(minute, medication_id, user_id, name, dosage)
+
+    def _load_day(self, day: date, after_minute: int) -> ReminderWheel:
+        started = time.perf_counter()
+        wheel = ReminderWheel(day)
+        db = self.session_factory()
+        try:
+            rows = db.execute(self._active_reminders(day).execution_options(yield_per=LOAD_BATCH_SIZE))
+            self._fill(wheel, rows, after_minute)
+        finally:
+            db.close()
+        self.loads += 1
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+        logger.info("Loaded %d medication reminders for %s in %.0f ms", len(wheel), day, self.last_load_ms)
+        return wheel
+
+    def _refresh(self, wheel: ReminderWheel, medication_ids: List[int]) -> None:
+        db = self.session_factory()
+        try:
+            for start in range(0, len(medication_ids), REFRESH_CHUNK_SIZE):
+                chunk = medication_ids[start:start + REFRESH_CHUNK_SIZE]
+                rows = db.execute(self._active_reminders(wheel.day).where(Medication.id.in_(chunk))).all()
+                for medication_id in chunk:
+                    wheel.remove_medication(medication_id)
+                self._fill(wheel, rows, self._last_minute)
+        finally:
+            db.close()
+        self.refreshes += 1
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Emit the reminders due since the previous tick; returns the number of notifications created."""
+        started = time.perf_counter()
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        due, self._undelivered = self._undelivered, []
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+
+        wheel = self._wheel
+        if wheel is None or wheel.day != now.date():
+            if wheel is not None and wheel.day < now.date():
+                # Finish the previous day before switching to the new one
+                due.extend(wheel.pop_range(self._last_minute + 1, MINUTES_PER_DAY - 1))
+                after_minute = -1
+            else:
+                # First load: start with the current minute
+                after_minute = minute - 1
+            wheel = self._wheel = self._load_day(now.date(), after_minute)
+            self._last_minute = after_minute
+        if dirty:
+            self._refresh(wheel, sorted(dirty))
+
+        if minute > self._last_minute:
+            due.extend(wheel.pop_range(self._last_minute + 1, minute))
+            self._last_minute = minute
+
+        if due:
+            try:
+                self._emit(due)
+            except Exception:
+                # Taken from the wheel but not committed: retry them next tick
+                self._undelivered = due
+                raise
+        self.ticks += 1
+        self.last_tick_ms = (time.perf_counter() - started) * 1000
+        return len(due)
+
+    def _emit(self, due: List[Tuple[int, str, str]]) -> None:
+        """
+        Insert one notification per due reminder in a single transaction and
+        publish them to open notification streams once committed.
+        """
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "title": "Medikamentenerinnerung",
+                "message": f"Zeit für {name}: {dosage}",
+                "type": NotificationType.PRESCRIPTION,
+                "is_read": False,
+                "created_at": created_at,
+                "link": "/prescriptions",
+            }
+            for user_id, name, dosage in due
+        ]
+        table = Notification.__table__
+        # Core inserts bypass the ORM flush hooks that count and publish notifications
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        ids = []
+        db = self.session_factory()
+        try:
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                ids.extend(db.execute(statement, rows[start:start + INSERT_CHUNK_SIZE]).scalars())
+            apply_unread_deltas(db.connection(), Counter(user_id for user_id, _, _ in due))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.emitted += len(rows)
+
+        # Only users with an open stream need the event encoded
+        events = []
+        for notification_id, row in zip(ids, rows):
+            if notification_hub.is_subscribed(row["user_id"]):
+                events.append((row["user_id"], notification_event(SimpleNamespace(id=notification_id, **row))))
+        notification_hub.publish(events)
+
+    def stats(self) -> dict:
+        wheel = self._wheel
+        return {
+            "running": self.running,
+            "day": wheel.day.isoformat() if wheel else None,
+            "scheduled": len(wheel) if wheel else 0,
+            "undelivered": len(self._undelivered),
+            "emitted": self.emitted,
+            "ticks": self.ticks,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "last_tick_ms": round(self.last_tick_ms, 2),
+            "last_load_ms": round(self.last_load_ms, 2),
+        }
+
+def mark_changed_after_commit(session: Session, medication_ids: Iterable[int]) -> None:
+    """Reload these medications' reminders once the session commits (for writes that bypass the ORM flush)."""
+    _changed_medications.get(session).update(medication_ids)
+
+def _mark(session: Session, medication_id: Optional[int]) -> None:
+    if medication_id is not None:
+        _changed_medications.get(session).add(medication_id)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_medications(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, MedicationReminder):
+            _mark(session, instance.medication_id)
+        elif isinstance(instance, Medication):
+            _mark(session, instance.id)
+
+def _apply_changed_medications(medication_ids: Set[int]) -> None:
+    reminder_scheduler.mark_changed(medication_ids)
+
+_changed_medications = PendingState(
+    "reminder_scheduler_medications", set, on_commit=_apply_changed_medications
+)
+
+reminder_scheduler = ReminderScheduler(SessionLocal, tick_seconds=settings.REMINDER_TICK_SECONDS)
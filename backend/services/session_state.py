@@ -0,0 +1,80 @@
+"""Per-transaction state that services collect in ``Session.info``.
+
+Several services gather something while a transaction writes (counter deltas,
+events to publish, ids of changed rows) and act on it at flush or commit time.
+``PendingState`` keeps that value in ``session.info`` under one key, discards it
+on rollback and, with ``on_commit``, hands it over once the transaction has
+committed. ``maintain_deltas`` adds the before/after flush pair used by
+denormalized counters that are updated in the flushing transaction.
+"""
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+def previous_value(instance, key: str):
+    """Value of an attribute before the pending change (the columns use active_history)."""
+    history = get_history(instance, key)
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+class PendingState:
+    """A value collected per session transaction, discarded when it rolls back."""
+
+    def __init__(self, key: str, factory: Callable[[], Any], on_commit: Optional[Callable[[Any], None]] = None):
+        self.key = key
+        self.factory = factory
+        self.on_commit = on_commit
+        event.listen(Session, "after_rollback", self.discard)
+        if on_commit is not None:
+            event.listen(Session, "after_commit", self._committed)
+
+    def get(self, session: Session):
+        """The session's pending value, created on first use."""
+        value = session.info.get(self.key)
+        if value is None:
+            value = session.info[self.key] = self.factory()
+        return value
+
+    def pop(self, session: Session):
+        """Remove and return the session's pending value (None if nothing was collected)."""
+        return session.info.pop(self.key, None)
+
+    def discard(self, session: Session) -> None:
+        session.info.pop(self.key, None)
+
+    def _committed(self, session: Session) -> None:
+        value = self.pop(session)
+        if value:
+            self.on_commit(value)
+
+def maintain_deltas(
+    key: str,
+    factory: Callable[[], Any],
+    uncount: Callable[[Session, Any], None],
+    count: Callable[[Session, Any], None],
+    apply: Callable[[Any, Any], None],
+) -> PendingState:
+    """
+    Keep denormalized counters in step with ORM flushes.
+
+    ``uncount(session, deltas)`` runs before each flush, while previous values
+    are still available; ``count(session, deltas)`` runs after it, when new
+    values (and ids assigned through relationships) are. The combined deltas
+    are then written with ``apply(connection, deltas)`` in the same transaction.
+    """
+    state = PendingState(key, factory)
+
+    @event.listens_for(Session, "before_flush")
+    def _before_flush(session, flush_context, instances):
+        uncount(session, state.get(session))
+
+    @event.listens_for(Session, "after_flush")
+    def _after_flush(session, flush_context):
+        deltas = state.pop(session) or factory()
+        count(session, deltas)
+        apply(session.connection(), deltas)
+
+    return state
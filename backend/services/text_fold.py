@@ -0,0 +1,31 @@
+"""Case and diacritic folding for text search.
+
+``fold`` maps text to a search form: case-folded (``ß`` becomes ``ss``) and
+with combining marks removed after NFKD decomposition (``ä`` becomes ``a``),
+so "Ernährung", "ERNAHRUNG" and "ernährung" all fold to "ernahrung".
+
+Queries and searched columns must be folded alike. On SQLite the function is
+registered on every connection as ``search_fold`` (see database.py); on
+PostgreSQL ``lower(unaccent(...))`` from the unaccent extension is the
+equivalent.
+"""
+import re
+import unicodedata
+from typing import Optional
+
+SQLITE_FUNCTION_NAME = "search_fold"
+
+# Combining diacritical marks left over after NFKD decomposition
+_COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+
+def fold(value: Optional[str]) -> Optional[str]:
+    """Case-fold a string and strip its diacritics."""
+    if value is None:
+        return None
+    if value.isascii():
+        return value.lower()
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", value.casefold()))
+
+def register_sqlite_function(dbapi_connection) -> None:
+    """Make ``search_fold(text)`` available in SQL on a SQLite connection."""
+    dbapi_connection.create_function(SQLITE_FUNCTION_NAME, 1, fold, deterministic=True)
@@ -0,0 +1,166 @@
+"""Thread-safe W-TinyLFU cache for skewed key distributions.
+
+New keys enter a small LRU window. When the window overflows, its oldest key
+only makes it into the main segmented LRU if a count-min sketch says it has
+been requested more often than the main segment's eviction victim, so a burst
+of one-off keys cannot flush out the popular ones.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class CountMinSketch:
+    """Approximate access frequencies with periodic halving (aging)."""
+    
+    DEPTH = 4
+    MAX_COUNT = 15
+    
+    def __init__(self, capacity: int):
+        width = 16
+        while width < capacity * 4:
+            width *= 2
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(self.DEPTH)]
+        self._sample_size = max(10 * capacity, 100)
+        self._additions = 0
+    
+    def _indexes(self, key: Hashable):
+        h = hash(key)
+        for seed in range(self.DEPTH):
+            yield (hash((seed, h)) & self._mask)
+    
+    def increment(self, key: Hashable) -> None:
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+    
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+    
+    def _age(self) -> None:
+        for i, row in enumerate(self._rows):
+            self._rows[i] = bytearray(count >> 1 for count in row)
+        self._additions //= 2
+
+class TinyLFUCache:
+    """W-TinyLFU cache: 1% LRU window, 99% segmented LRU admitted via a frequency sketch."""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = max(maxsize, 2)
+        self._window_size = max(1, self.maxsize // 100)
+        main_size = self.maxsize - self._window_size
+        self._protected_size = max(1, int(main_size * 0.8))
+        self._main_size = main_size
+        
+        self._window: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._probation: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._protected: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sketch = CountMinSketch(self.maxsize)
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(
+        self,
+        key: Hashable,
+        default: Optional[Any] = None,
+        is_valid: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value for key, recording the access.
+        Values rejected by is_valid (e.g. stale versions) count as misses and
+        keep their slot until the next put for the same key replaces them.
+        """
+        with self._lock:
+            self._sketch.increment(key)
+            if key in self._window:
+                self._window.move_to_end(key)
+                value = self._window[key]
+            elif key in self._protected:
+                self._protected.move_to_end(key)
+                value = self._protected[key]
+            elif key in self._probation:
+                value = self._probation.pop(key)
+                self._promote(key, value)
+            else:
+                self.misses += 1
+                return default
+            if is_valid is not None and not is_valid(value):
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or replace a value."""
+        with self._lock:
+            for segment in (self._window, self._probation, self._protected):
+                if key in segment:
+                    segment[key] = value
+                    segment.move_to_end(key)
+                    return
+            
+            self._window[key] = value
+            if len(self._window) > self._window_size:
+                candidate, candidate_value = self._window.popitem(last=False)
+                self._admit(candidate, candidate_value)
+    
+    def discard(self, key: Hashable) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            for segment in (self._window, self._probation, self._protected):
+                segment.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all entries (frequency history is kept)."""
+        with self._lock:
+            self._window.clear()
+            self._probation.clear()
+            self._protected.clear()
+    
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self),
+                "maxsize": self.maxsize,
+            }
+    
+    def _promote(self, key: Hashable, value: Any) -> None:
+        """Move a probation hit into the protected segment, demoting its LRU if full."""
+        self._protected[key] = value
+        if len(self._protected) > self._protected_size:
+            demoted, demoted_value = self._protected.popitem(last=False)
+            self._probation[demoted] = demoted_value
+    
+    def _admit(self, candidate: Hashable, value: Any) -> None:
+        """Admit a key leaving the window into the main segment if it is popular enough."""
+        if len(self._probation) + len(self._protected) < self._main_size:
+            self._probation[candidate] = value
+            return
+        
+        # Main segment is full: compete against the probation LRU victim
+        victim = next(iter(self._probation), None)
+        if victim is None:
+            victim = next(iter(self._protected))
+            segment = self._protected
+        else:
+            segment = self._probation
+        
+        if self._sketch.estimate(candidate) > self._sketch.estimate(victim):
+            del segment[victim]
+            self._probation[candidate] = value
+        self.evictions += 1
@@ -0,0 +1,14 @@
+"""INSERT ... ON CONFLICT statements for the supported databases (SQLite, PostgreSQL)."""
+from sqlalchemy.dialects import postgresql, sqlite
+
+def upsert_insert(bind, table):
+    """
+    INSERT for table on the bind's dialect, supporting on_conflict_do_update()
+    and on_conflict_do_nothing().
+    """
+    name = bind.dialect.name
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upserts are not supported on {name}")
@@ -0,0 +1,58 @@
+"""Per-namespace write version counters for invalidating in-process caches.
+
+A namespace tracks a set of models. Whenever a committed transaction inserted,
+updated or deleted rows of one of those models (through the ORM unit of work or
+a bulk ``query.update()``/``query.delete()``), the namespace version is bumped.
+Caches store the version they were filled at and treat older entries as stale.
+
+Versions live in process memory, so each worker process tracks its own writes.
+"""
+import threading
+from typing import Dict, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from services.session_state import PendingState
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = {}
+_namespaces_by_model: Dict[type, Set[str]] = {}
+
+def track(namespace: str, *models) -> None:
+    """Register models whose writes bump the given namespace."""
+    with _lock:
+        _versions.setdefault(namespace, 0)
+        for model in models:
+            _namespaces_by_model.setdefault(model, set()).add(namespace)
+
+def current(namespace: str) -> int:
+    """Return the current version of a namespace."""
+    return _versions.get(namespace, 0)
+
+def bump(namespace: str) -> int:
+    """Increment a namespace version and return the new value."""
+    with _lock:
+        _versions[namespace] = _versions.get(namespace, 0) + 1
+        return _versions[namespace]
+
+def _mark(session: Session, model) -> None:
+    namespaces = _namespaces_by_model.get(model)
+    if namespaces:
+        _pending_bumps.get(session).update(namespaces)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_writes(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        _mark(session, type(instance))
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+        _mark(orm_execute_state.session, orm_execute_state.bind_mapper.class_)
+
+def _apply_pending_bumps(namespaces: Set[str]) -> None:
+    for namespace in namespaces:
+        bump(namespace)
+
+_pending_bumps = PendingState("pending_version_bumps", set, on_commit=_apply_pending_bumps)
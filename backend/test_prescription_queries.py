@@ -0,0 +1,132 @@
+"""Query-count regression tests for the prescriptions router.
+
+Listing or reading prescriptions must take a fixed number of SQL statements no
+matter how many prescriptions and medications exist, and creating one must
+insert all of its medications with a single statement.
+
+Runs against a temporary SQLite database:
+
+    cd backend && pytest test_prescription_queries.py
+"""
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="prescription-queries-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["STORAGE_DIR"] = os.path.join(_TMP_DIR, "storage")
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import Base, SessionLocal, engine
+from models import Doctor, Medication, Patient, Prescription, User
+from models.user import UserRole
+from auth.utils import get_current_doctor, get_current_patient
+from routers import prescriptions
+
+app = FastAPI()
+app.include_router(prescriptions.router)
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def accounts():
+    """Fresh tables with one patient and one doctor, who are signed in for every request."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient_user = User(email="patient@example.com", password_hash="-", name="Pat Patient", role=UserRole.PATIENT)
+    doctor_user = User(email="doctor@example.com", password_hash="-", name="Dr. Doc", role=UserRole.DOCTOR)
+    db.add_all([patient_user, doctor_user])
+    db.flush()
+    patient = Patient(user_id=patient_user.id)
+    doctor = Doctor(user_id=doctor_user.id, specialization="Allgemeinmedizin", city="Berlin")
+    db.add_all([patient, doctor])
+    db.commit()
+    for instance in (patient_user, doctor_user, patient, doctor):
+        db.refresh(instance)
+    db.expunge_all()
+    db.close()
+
+    app.dependency_overrides[get_current_patient] = lambda: patient_user
+    app.dependency_overrides[get_current_doctor] = lambda: doctor_user
+    yield patient, doctor
+    app.dependency_overrides.clear()
+
+def add_prescriptions(patient: Patient, doctor: Doctor, count: int, medications_each: int = 3) -> None:
+    db = SessionLocal()
+    for index in range(count):
+        prescription = Prescription(patient_id=patient.id, doctor_id=doctor.id, description=f"Rezept {index}")
+        prescription.medications = [
+            Medication(name=f"Medikament {m}", dosage="1 Tablette", frequency_description="1x täglich")
+            for m in range(medications_each)
+        ]
+        db.add(prescription)
+    db.commit()
+    db.close()
+
+class StatementCounter:
+    """Collects the SQL statements executed on the engine while active."""
+
+    def __init__(self):
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(engine, "before_cursor_execute", self._record)
+
+    def count(self, prefix: str = "") -> int:
+        return sum(1 for statement in self.statements if statement.lstrip().upper().startswith(prefix))
+
+def test_list_prescriptions_query_count_is_constant(accounts):
+    patient, doctor = accounts
+    add_prescriptions(patient, doctor, 1)
+    with StatementCounter() as few:
+        response = client.get("/api/prescriptions")
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+    add_prescriptions(patient, doctor, 30)
+    with StatementCounter() as many:
+        response = client.get("/api/prescriptions")
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 31
+    assert all(len(item["medications"]) == 3 and item["doctor_name"] == "Dr. Doc" for item in body)
+
+    # Patient lookup, prescriptions joined to the doctor's name, medications
+    assert few.count() == many.count() == 3
+
+def test_get_prescription_query_count(accounts):
+    patient, doctor = accounts
+    add_prescriptions(patient, doctor, 1, medications_each=5)
+    with StatementCounter() as counter:
+        response = client.get("/api/prescriptions/1")
+    assert response.status_code == 200
+    assert len(response.json()["medications"]) == 5
+    assert counter.count() == 3
+
+def test_create_prescription_inserts_medications_in_one_statement(accounts):
+    patient, _ = accounts
+    payload = {
+        "patient_id": patient.id,
+        "description": "Neue Verordnung",
+        "medications": [
+            {"name": f"Medikament {m}", "dosage": "1 Tablette", "frequency_description": "2x täglich"}
+            for m in range(6)
+        ],
+    }
+    with StatementCounter() as counter:
+        response = client.post(f"/api/prescriptions/patients/{patient.id}", json=payload)
+    assert response.status_code == 201
+    medications = response.json()["medications"]
+    assert [m["name"] for m in medications] == [f"Medikament {m}" for m in range(6)]
+    assert all(m["id"] for m in medications)
+    assert counter.count("INSERT INTO MEDICATIONS") == 1
@@ -99,7 +99,7 @@ export default function GlobalSearch({ open, onClose }: GlobalSearchProps) {
                                     <ListItem key={doc.id} disablePadding>
                                         <ListItemButton onClick={() => handleNavigate('/doctors')}>
                                             <ListItemIcon><Person color="primary" /></ListItemIcon>
-                                            <ListItemText primary={doc.name} secondary={doc.specialty} />
+                                            <ListItemText primary={doc.name} secondary={doc.specialization} />
                                             <ArrowForward fontSize="small" color="action" />
                                         </ListItemButton>
                                     </ListItem>
@@ -42,7 +42,6 @@ export default function NotificationsMenu() {
             const res = await apiClient.get('/notifications');
             return res.data;
         },
-        refetchInterval: 30000, // Poll every 30 seconds
     });
 
     const { data: unreadCount } = useQuery({
@@ -51,9 +50,54 @@ export default function NotificationsMenu() {
             const res = await apiClient.get('/notifications/unread-count');
             return res.data.count;
         },
-        refetchInterval: 30000,
     });
 
+    // Live updates instead of polling; EventSource reconnects by itself and
+    // sends Last-Event-ID so missed notifications are replayed
+    useEffect(() => {
+        const token = localStorage.getItem('access_token');
+        if (!token) return;
+        const source = new EventSource(`/api/notifications/stream?token=${encodeURIComponent(token)}`);
+
+        source.addEventListener('notification', (event) => {
+            const notification = JSON.parse((event as MessageEvent).data);
+            let isNew = true;
+            queryClient.setQueryData(['notifications'], (old: any[] | undefined) => {
+                if (!old) return old;
+                if (old.some((n) => n.id === notification.id)) {
+                    isNew = false;
+                    return old;
+                }
+                return [notification, ...old];
+            });
+            if (isNew) {
+                queryClient.setQueryData(['notifications-unread'], (count: number | undefined) => (count ?? 0) + 1);
+            }
+        });
+
+        source.addEventListener('read', (event) => {
+            const { ids, all } = JSON.parse((event as MessageEvent).data);
+            let newlyRead = 0;
+            queryClient.setQueryData(['notifications'], (old: any[] | undefined) =>
+                old?.map((n) => {
+                    if (n.is_read || !(all || ids.includes(n.id))) return n;
+                    newlyRead += 1;
+                    return { ...n, is_read: true };
+                })
+            );
+            queryClient.setQueryData(['notifications-unread'], (count: number | undefined) =>
+                all ? 0 : Math.max(0, (count ?? 0) - newlyRead)
+            );
+        });
+
+        source.addEventListener('resync', () => {
+            queryClient.invalidateQueries({ queryKey: ['notifications'] });
+            queryClient.invalidateQueries({ queryKey: ['notifications-unread'] });
+        });
+
+        return () => source.close();
+    }, [queryClient]);
+
     const markReadMutation = useMutation({
         mutationFn: async (id: number) => {
             await apiClient.post(`/notifications/${id}/read`);